@@ -1,5 +1,24 @@
 from django.contrib import admin
-from .models import Vendor, RFP, Proposal, Comparison, RFPSendLog
+from .models import (Vendor, RFP, RFPItem, Proposal, ProposalLineItem, Comparison, RFPSendLog, Blob, Job, Requirement,
+                     RequirementAlias, RequirementCompliance)
+
+class RFPItemInline(admin.TabularInline):
+    model = RFPItem
+    extra = 0
+
+class ProposalLineItemInline(admin.TabularInline):
+    model = ProposalLineItem
+    extra = 0
+    raw_id_fields = ['rfp_item']
+
+class RequirementComplianceInline(admin.TabularInline):
+    model = RequirementCompliance
+    extra = 0
+    raw_id_fields = ['requirement']
+
+class RequirementAliasInline(admin.TabularInline):
+    model = RequirementAlias
+    extra = 0
 
 @admin.register(Vendor)
 class VendorAdmin(admin.ModelAdmin):
@@ -12,6 +31,7 @@ class RFPAdmin(admin.ModelAdmin):
     list_display = ['title', 'status', 'total_budget', 'deadline', 'created_at']
     list_filter = ['status']
     search_fields = ['title', 'description']
+    inlines = [RFPItemInline]
     # REMOVED: filter_horizontal = ['vendors'] because it has a through model
 
 @admin.register(Proposal)
@@ -19,6 +39,8 @@ class ProposalAdmin(admin.ModelAdmin):
     list_display = ['vendor', 'rfp', 'total_price', 'compliance_score', 'is_parsed', 'received_at']
     list_filter = ['is_parsed', 'is_preferred']
     search_fields = ['vendor__name', 'rfp__title']
+    raw_id_fields = ['email_body_blob', 'raw_response_blob']
+    inlines = [ProposalLineItemInline, RequirementComplianceInline]
 
 @admin.register(Comparison)
 class ComparisonAdmin(admin.ModelAdmin):
@@ -29,4 +51,23 @@ class ComparisonAdmin(admin.ModelAdmin):
 class RFPSendLogAdmin(admin.ModelAdmin):
     list_display = ['rfp', 'vendor', 'sent_at', 'is_sent']
     list_filter = ['is_sent']
-    readonly_fields = ['sent_at']
\ No newline at end of file
+    readonly_fields = ['sent_at']
+    raw_id_fields = ['email_body_blob']
+
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ['digest', 'size', 'created_at']
+    readonly_fields = ['digest', 'size', 'created_at']
+    exclude = ['data']
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'status', 'progress', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['kind', 'status']
+    readonly_fields = ['created_at', 'started_at', 'finished_at', 'heartbeat_at', 'worker']
+
+@admin.register(Requirement)
+class RequirementAdmin(admin.ModelAdmin):
+    list_display = ['text', 'created_at']
+    search_fields = ['text', 'aliases__key']
+    inlines = [RequirementAliasInline]
@@ -1,55 +1,87 @@
 import os
 import json
-import openai
 import random
 from django.conf import settings
 from datetime import datetime, timedelta
+from . import metrics, profiling
+
+
+def _openai():
+    """
+    The OpenAI SDK, imported on first use. It pulls in requests and aiohttp,
+    which used to be half the import time of every process.
+    """
+    import openai
+    openai.api_key = settings.OPENAI_API_KEY
+    return openai
 
 class AIService:
     DEMO_MODE = getattr(settings, 'AI_DEMO_MODE', True)
+    MODEL = "gpt-3.5-turbo"
+    EMBEDDING_MODEL = "text-embedding-ada-002"
+    
+    # Every public method has an async twin prefixed with "a" for the ASGI views.
+    # Both share the prompt builders, the demo fallbacks and the result handling
+    # below, so only the OpenAI round trip differs.
     
     @staticmethod
-    def parse_natural_language_to_rfp(user_input):
-        """
-        Converts natural language procurement request to structured RFP
-        """
-        print(f"DEBUG: Processing user input: {user_input}")
+    def _completion_kwargs(system_prompt, user_prompt):
+        return {
+            'model': AIService.MODEL,
+            'messages': [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            'temperature': 0.1,
+            'max_tokens': 1000,
+        }
+    
+    @staticmethod
+    def _extract_json(response):
+        content = response.choices[0].message.content.strip()
         
-        if AIService.DEMO_MODE:
-            # Extract budget from user input
-            import re
-            budget_match = re.search(r'\$(\d+(?:,\d{3})*(?:\.\d{2})?)', user_input)
-            total_budget = float(budget_match.group(1).replace(',', '')) if budget_match else 5000.00
-            
-            # Extract delivery days
-            delivery_match = re.search(r'(\d+)\s*days?', user_input, re.IGNORECASE)
-            delivery_days = int(delivery_match.group(1)) if delivery_match else 30
-            
-            # Extract keywords for better titles
-            keywords = ["laptops", "computers", "monitors", "equipment", "software", "services"]
-            matched_keyword = next((k for k in keywords if k in user_input.lower()), "procurement")
-            
-            # Return fields that match RFP model
-            return {
-                "title": f"RFP for {matched_keyword.title()} - {datetime.now().strftime('%Y-%m-%d')}",
-                "description": user_input,
-                "total_budget": total_budget,  # Use extracted budget
-                "delivery_days": delivery_days,  # Use extracted delivery days
-                "payment_terms": "Net 30",
-                "warranty": "1 year",
-                "requirements": [
-                    "New units only with original packaging",
-                    "On-site warranty support required",
-                    "Must include installation services",
-                    "Delivery within specified timeframe"
-                ]
-            }
+        # Extract JSON from response
+        if '```json' in content:
+            content = content.split('```json')[1].split('```')[0].strip()
+        elif '```' in content:
+            content = content.split('```')[1].strip()
         
-        try:
-            # Use OpenAI API
-            openai.api_key = settings.OPENAI_API_KEY
-            
-            prompt = f"""
+        return json.loads(content)
+    
+    @staticmethod
+    def _record_usage(method, response):
+        usage = getattr(response, 'usage', None)
+        if not usage:
+            return
+        profiling.add_tokens(getattr(usage, 'total_tokens', 0))
+        metrics.LLM_TOKENS.inc(getattr(usage, 'prompt_tokens', 0), method=method, type='prompt')
+        metrics.LLM_TOKENS.inc(getattr(usage, 'completion_tokens', 0), method=method, type='completion')
+    
+    # `method` names the public AIService method in metrics; async twins share it
+    
+    @staticmethod
+    def _chat(method, system_prompt, user_prompt):
+        with metrics.llm_call(method):
+            with profiling.timed('ai'):
+                response = _openai().ChatCompletion.create(**AIService._completion_kwargs(system_prompt, user_prompt))
+            AIService._record_usage(method, response)
+            return AIService._extract_json(response)
+    
+    @staticmethod
+    async def _achat(method, system_prompt, user_prompt):
+        with metrics.llm_call(method):
+            with profiling.timed('ai'):
+                response = await _openai().ChatCompletion.acreate(**AIService._completion_kwargs(system_prompt, user_prompt))
+            AIService._record_usage(method, response)
+            return AIService._extract_json(response)
+    
+    # Natural language -> RFP
+    
+    @staticmethod
+    def _rfp_prompts(user_input):
+        return (
+            "You are a procurement assistant that converts natural language to structured RFP data. Always return valid JSON.",
+            f"""
             Convert this procurement request into a structured RFP JSON format:
             
             "{user_input}"
@@ -66,85 +98,137 @@ class AIService:
                 "requirements": ["string"]
             }}
             """
-            
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a procurement assistant that converts natural language to structured RFP data. Always return valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                max_tokens=1000
-            )
-            
-            content = response.choices[0].message.content.strip()
-            
-            # Extract JSON from response
-            if '```json' in content:
-                content = content.split('```json')[1].split('```')[0].strip()
-            elif '```' in content:
-                content = content.split('```')[1].strip()
-            
-            parsed_data = json.loads(content)
-            
-            # Ensure all required fields exist
-            if 'requirements' not in parsed_data:
-                parsed_data['requirements'] = []
-            if 'items' not in parsed_data:
-                parsed_data['items'] = []
-            
-            return parsed_data
-            
+        )
+    
+    @staticmethod
+    def _rfp_result(parsed_data):
+        # Ensure all required fields exist
+        if 'requirements' not in parsed_data:
+            parsed_data['requirements'] = []
+        if 'items' not in parsed_data:
+            parsed_data['items'] = []
+        
+        return parsed_data
+    
+    @staticmethod
+    def _demo_rfp(user_input):
+        # Extract budget from user input
+        import re
+        budget_match = re.search(r'\$(\d+(?:,\d{3})*(?:\.\d{2})?)', user_input)
+        total_budget = float(budget_match.group(1).replace(',', '')) if budget_match else 5000.00
+        
+        # Extract delivery days
+        delivery_match = re.search(r'(\d+)\s*days?', user_input, re.IGNORECASE)
+        delivery_days = int(delivery_match.group(1)) if delivery_match else 30
+        
+        # Extract keywords for better titles
+        keywords = ["laptops", "computers", "monitors", "equipment", "software", "services"]
+        matched_keyword = next((k for k in keywords if k in user_input.lower()), "procurement")
+        
+        # "20 laptops" becomes one item to price
+        items = []
+        if matched_keyword != "procurement":
+            quantity_match = re.search(rf'(\d+)\s+{matched_keyword}', user_input, re.IGNORECASE)
+            items.append({
+                "name": matched_keyword.title(),
+                "quantity": int(quantity_match.group(1)) if quantity_match else 1,
+                "specifications": ""
+            })
+        
+        # Return fields that match RFP model
+        return {
+            "title": f"RFP for {matched_keyword.title()} - {datetime.now().strftime('%Y-%m-%d')}",
+            "description": user_input,
+            "total_budget": total_budget,  # Use extracted budget
+            "delivery_days": delivery_days,  # Use extracted delivery days
+            "payment_terms": "Net 30",
+            "warranty": "1 year",
+            "requirements": [
+                "New units only with original packaging",
+                "On-site warranty support required",
+                "Must include installation services",
+                "Delivery within specified timeframe"
+            ],
+            "items": items
+        }
+    
+    @staticmethod
+    def parse_natural_language_to_rfp(user_input):
+        """
+        Converts natural language procurement request to structured RFP
+        """
+        print(f"DEBUG: Processing user input: {user_input}")
+        
+        if AIService.DEMO_MODE:
+            return AIService._demo_rfp(user_input)
+        
+        try:
+            return AIService._rfp_result(AIService._chat('parse_natural_language_to_rfp', *AIService._rfp_prompts(user_input)))
         except Exception as e:
             print(f"OpenAI Error: {e}")
             # Fallback to demo data
-            return AIService.parse_natural_language_to_rfp(user_input)
+            return AIService._demo_rfp(user_input)
     
     @staticmethod
-    def compare_proposals_and_recommend(proposals_data, rfp_data):
+    async def aparse_natural_language_to_rfp(user_input):
         """
-        AI-powered comparison and recommendation of proposals
+        Async variant of parse_natural_language_to_rfp
         """
-        if not proposals_data:
-            return {
-                "summary": "No proposals available for comparison.",
-                "recommendation": {
-                    "vendor_id": None,
-                    "vendor_name": "None",
-                    "reasoning": "No proposals received",
-                    "confidence_score": 0
-                },
-                "analysis": {
-                    "price_analysis": "N/A",
-                    "compliance_analysis": "N/A",
-                    "delivery_analysis": "N/A",
-                    "risk_assessment": "N/A"
-                }
-            }
-        
         if AIService.DEMO_MODE:
-            # Find best proposal based on score
-            best_proposal = max(proposals_data, key=lambda x: x.get('compliance_score', 0))
-            
-            return {
-                "summary": f"Compared {len(proposals_data)} proposals. {best_proposal['vendor_name']} offers the best value.",
-                "recommendation": {
-                    "vendor_id": best_proposal.get('vendor_id'),
-                    "vendor_name": best_proposal.get('vendor_name'),
-                    "reasoning": f"Best compliance score ({best_proposal.get('compliance_score')}%) with competitive pricing.",
-                    "confidence_score": 85
-                },
-                "analysis": {
-                    "price_analysis": f"Price range: ${min(p.get('total_price', 0) for p in proposals_data):,.2f} - ${max(p.get('total_price', 0) for p in proposals_data):,.2f}",
-                    "compliance_analysis": f"Compliance scores range from {min(p.get('compliance_score', 0) for p in proposals_data)}% to {max(p.get('compliance_score', 0) for p in proposals_data)}%",
-                    "delivery_analysis": f"Delivery times range from {min(p.get('proposed_delivery_days', 30) for p in proposals_data)} to {max(p.get('proposed_delivery_days', 30) for p in proposals_data)} days",
-                    "risk_assessment": "All vendors have good track records. Recommended vendor has highest compliance."
-                }
-            }
+            return AIService._demo_rfp(user_input)
         
         try:
-            # Use OpenAI for real comparison
-            prompt = f"""
+            return AIService._rfp_result(await AIService._achat('parse_natural_language_to_rfp', *AIService._rfp_prompts(user_input)))
+        except Exception as e:
+            print(f"OpenAI Error: {e}")
+            return AIService._demo_rfp(user_input)
+    
+    # Proposal comparison
+    
+    @staticmethod
+    def _empty_comparison():
+        return {
+            "summary": "No proposals available for comparison.",
+            "recommendation": {
+                "vendor_id": None,
+                "vendor_name": "None",
+                "reasoning": "No proposals received",
+                "confidence_score": 0
+            },
+            "analysis": {
+                "price_analysis": "N/A",
+                "compliance_analysis": "N/A",
+                "delivery_analysis": "N/A",
+                "risk_assessment": "N/A"
+            }
+        }
+    
+    @staticmethod
+    def _demo_comparison(proposals_data):
+        # Find best proposal based on score
+        best_proposal = max(proposals_data, key=lambda x: x.get('compliance_score', 0))
+        
+        return {
+            "summary": f"Compared {len(proposals_data)} proposals. {best_proposal['vendor_name']} offers the best value.",
+            "recommendation": {
+                "vendor_id": best_proposal.get('vendor_id'),
+                "vendor_name": best_proposal.get('vendor_name'),
+                "reasoning": f"Best compliance score ({best_proposal.get('compliance_score')}%) with competitive pricing.",
+                "confidence_score": 85
+            },
+            "analysis": {
+                "price_analysis": f"Price range: ${min(p.get('total_price', 0) for p in proposals_data):,.2f} - ${max(p.get('total_price', 0) for p in proposals_data):,.2f}",
+                "compliance_analysis": f"Compliance scores range from {min(p.get('compliance_score', 0) for p in proposals_data)}% to {max(p.get('compliance_score', 0) for p in proposals_data)}%",
+                "delivery_analysis": f"Delivery times range from {min(p.get('proposed_delivery_days', 30) for p in proposals_data)} to {max(p.get('proposed_delivery_days', 30) for p in proposals_data)} days",
+                "risk_assessment": "All vendors have good track records. Recommended vendor has highest compliance."
+            }
+        }
+    
+    @staticmethod
+    def _comparison_prompts(proposals_data, rfp_data):
+        return (
+            "You are a procurement analyst. Compare proposals and recommend the best vendor with reasoning.",
+            f"""
             Compare these vendor proposals for RFP: {rfp_data.get('title', 'Unknown')}
             
             RFP Requirements:
@@ -172,58 +256,97 @@ class AIService:
                 }}
             }}
             """
-            
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a procurement analyst. Compare proposals and recommend the best vendor with reasoning."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                max_tokens=1000
-            )
-            
-            content = response.choices[0].message.content.strip()
-            
-            # Extract JSON from response
-            if '```json' in content:
-                content = content.split('```json')[1].split('```')[0].strip()
-            elif '```' in content:
-                content = content.split('```')[1].strip()
-            
-            return json.loads(content)
-            
+        )
+    
+    @staticmethod
+    def compare_proposals_and_recommend(proposals_data, rfp_data):
+        """
+        AI-powered comparison and recommendation of proposals
+        """
+        if not proposals_data:
+            return AIService._empty_comparison()
+        
+        if AIService.DEMO_MODE:
+            return AIService._demo_comparison(proposals_data)
+        
+        try:
+            # Use OpenAI for real comparison
+            return AIService._chat('compare_proposals_and_recommend', *AIService._comparison_prompts(proposals_data, rfp_data))
         except Exception as e:
             print(f"AI Comparison Error: {e}")
             # Fallback to simple comparison
-            return AIService.compare_proposals_and_recommend(proposals_data, rfp_data)
-            
+            return AIService._demo_comparison(proposals_data)
+    
     @staticmethod
-    def parse_vendor_response(email_text, rfp_requirements):
+    async def acompare_proposals_and_recommend(proposals_data, rfp_data):
         """
-        Extracts key details from vendor email responses
+        Async variant of compare_proposals_and_recommend
         """
+        if not proposals_data:
+            return AIService._empty_comparison()
+        
         if AIService.DEMO_MODE:
-            # Demo parsing logic
-            return {
-                "total_price": 45000 + random.randint(-5000, 5000),
-                "delivery_days": 25 + random.randint(-5, 10),
-                "payment_terms": "Net 30",
-                "warranty": "3 years",
-                "compliance_analysis": [
-                    {"requirement": req, "status": "yes", "notes": "Compliant"} 
-                    for req in rfp_requirements[:3]
-                ],
-                "additional_notes": "We look forward to working with you",
-                "compliance_score": 85 + random.randint(-10, 10)
-            }
+            return AIService._demo_comparison(proposals_data)
         
         try:
-            prompt = f"""
+            return await AIService._achat('compare_proposals_and_recommend', *AIService._comparison_prompts(proposals_data, rfp_data))
+        except Exception as e:
+            print(f"AI Comparison Error: {e}")
+            return AIService._demo_comparison(proposals_data)
+    
+    # Vendor response parsing
+    
+    @staticmethod
+    def _demo_vendor_response(rfp_requirements, rfp_items=None):
+        # Demo parsing logic
+        items = [
+            {
+                "name": item['name'],
+                "quantity": item.get('quantity') or 1,
+                "unit_price": round(random.uniform(200, 2000), 2)
+            }
+            for item in rfp_items or []
+        ]
+        for item in items:
+            item['total_price'] = round(float(item['quantity']) * item['unit_price'], 2)
+        return {
+            "total_price": round(sum(item['total_price'] for item in items), 2) if items else 45000 + random.randint(-5000, 5000),
+            "delivery_days": 25 + random.randint(-5, 10),
+            "payment_terms": "Net 30",
+            "warranty": "3 years",
+            "compliance_analysis": [
+                {"requirement": req, "status": "yes", "notes": "Compliant"} 
+                for req in rfp_requirements[:3]
+            ],
+            "additional_notes": "We look forward to working with you",
+            "items": items,
+            "compliance_score": 85 + random.randint(-10, 10)
+        }
+    
+    @staticmethod
+    def _empty_vendor_response():
+        return {
+            "total_price": None,
+            "delivery_days": None,
+            "payment_terms": "",
+            "warranty": "",
+            "compliance_analysis": [],
+            "additional_notes": "",
+            "items": [],
+            "compliance_score": 0
+        }
+    
+    @staticmethod
+    def _vendor_response_prompts(email_text, rfp_requirements, rfp_items=None):
+        return (
+            "You are a procurement analyst that extracts structured data from vendor emails.",
+            f"""
             Extract procurement proposal details from vendor email response.
             
             RFP Requirements: {json.dumps(rfp_requirements, indent=2)}
             
+            RFP Items: {json.dumps(rfp_items or [], indent=2)}
+            
             Vendor Email: {email_text}
             
             Extract the following information:
@@ -233,6 +356,7 @@ class AIService:
             4. Warranty details offered
             5. Compliance with requirements (list each requirement with yes/no/partial)
             6. Additional notes or conditions
+            7. Each item priced: its name (use the RFP item's name where it matches), quantity, unit price and line total
             
             Return as JSON with this structure:
             {{
@@ -243,49 +367,97 @@ class AIService:
                 "compliance_analysis": [
                     {{"requirement": "string", "status": "yes|no|partial", "notes": "string"}}
                 ],
-                "additional_notes": "string"
+                "additional_notes": "string",
+                "items": [
+                    {{"name": "string", "quantity": number, "unit_price": number, "total_price": number}}
+                ]
             }}
             """
+        )
+    
+    @staticmethod
+    def _vendor_response_result(parsed_data):
+        # Calculate compliance score
+        compliance_items = parsed_data.get('compliance_analysis', [])
+        if compliance_items:
+            total = len(compliance_items)
+            compliant = sum(1 for item in compliance_items if item.get('status') == 'yes')
+            partial = sum(1 for item in compliance_items if item.get('status') == 'partial') * 0.5
+            parsed_data['compliance_score'] = round(((compliant + partial) / total) * 100, 2)
+        else:
+            parsed_data['compliance_score'] = 0
             
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a procurement analyst that extracts structured data from vendor emails."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                max_tokens=1000
-            )
-            
-            content = response.choices[0].message.content.strip()
-            # Extract JSON from response
-            if '```json' in content:
-                content = content.split('```json')[1].split('```')[0].strip()
-            elif '```' in content:
-                content = content.split('```')[1].strip()
-                
-            parsed_data = json.loads(content)
-            
-            # Calculate compliance score
-            compliance_items = parsed_data.get('compliance_analysis', [])
-            if compliance_items:
-                total = len(compliance_items)
-                compliant = sum(1 for item in compliance_items if item.get('status') == 'yes')
-                partial = sum(1 for item in compliance_items if item.get('status') == 'partial') * 0.5
-                parsed_data['compliance_score'] = round(((compliant + partial) / total) * 100, 2)
-            else:
-                parsed_data['compliance_score'] = 0
-                
-            return parsed_data
-            
+        return parsed_data
+    
+    @staticmethod
+    def parse_vendor_response(email_text, rfp_requirements, rfp_items=None):
+        """
+        Extracts key details from vendor email responses
+        """
+        if AIService.DEMO_MODE:
+            return AIService._demo_vendor_response(rfp_requirements, rfp_items)
+        
+        try:
+            parsed_data = AIService._chat('parse_vendor_response', *AIService._vendor_response_prompts(email_text, rfp_requirements, rfp_items))
+            return AIService._vendor_response_result(parsed_data)
+        except Exception as e:
+            print(f"Vendor Response Parsing Error: {e}")
+            return AIService._empty_vendor_response()
+    
+    @staticmethod
+    async def aparse_vendor_response(email_text, rfp_requirements, rfp_items=None):
+        """
+        Async variant of parse_vendor_response
+        """
+        if AIService.DEMO_MODE:
+            return AIService._demo_vendor_response(rfp_requirements, rfp_items)
+        
+        try:
+            parsed_data = await AIService._achat('parse_vendor_response', *AIService._vendor_response_prompts(email_text, rfp_requirements, rfp_items))
+            return AIService._vendor_response_result(parsed_data)
         except Exception as e:
             print(f"Vendor Response Parsing Error: {e}")
-            return {
-                "total_price": None,
-                "delivery_days": None,
-                "payment_terms": "",
-                "warranty": "",
-                "compliance_analysis": [],
-                "additional_notes": "",
-                "compliance_score": 0
-            }
\ No newline at end of file
+            return AIService._empty_vendor_response()
+    
+    # Embeddings
+    
+    @staticmethod
+    def _embeddings(response):
+        return [item['embedding'] for item in sorted(response['data'], key=lambda item: item['index'])]
+    
+    @staticmethod
+    def embed(texts):
+        """
+        One embedding vector per text, or None in demo mode or when the call
+        fails; callers then fall back to exact wording
+        """
+        if AIService.DEMO_MODE or not texts:
+            return None
+        
+        try:
+            with metrics.llm_call('embed'):
+                with profiling.timed('ai'):
+                    response = _openai().Embedding.create(model=AIService.EMBEDDING_MODEL, input=list(texts))
+                AIService._record_usage('embed', response)
+                return AIService._embeddings(response)
+        except Exception as e:
+            print(f"Embedding Error: {e}")
+            return None
+    
+    @staticmethod
+    async def aembed(texts):
+        """
+        Async variant of embed
+        """
+        if AIService.DEMO_MODE or not texts:
+            return None
+        
+        try:
+            with metrics.llm_call('embed'):
+                with profiling.timed('ai'):
+                    response = await _openai().Embedding.acreate(model=AIService.EMBEDDING_MODEL, input=list(texts))
+                AIService._record_usage('embed', response)
+                return AIService._embeddings(response)
+        except Exception as e:
+            print(f"Embedding Error: {e}")
+            return None
@@ -4,3 +4,25 @@ from django.apps import AppConfig
 class RfpConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'rfp'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_save, post_delete
+        from django.conf import settings
+        from . import events, profiling, search
+        from .db_routers import apply_sqlite_pragmas
+        from .models import RFP, Proposal, Vendor
+
+        connection_created.connect(apply_sqlite_pragmas)
+        if settings.PROFILING_ENABLED:
+            connection_created.connect(profiling.install_sql_wrapper)
+
+        # Keep the full-text index in step with RFP and proposal writes
+        post_save.connect(search.rfp_saved, sender=RFP, dispatch_uid='search_rfp_saved')
+        post_delete.connect(search.rfp_deleted, sender=RFP, dispatch_uid='search_rfp_deleted')
+        post_save.connect(search.proposal_saved, sender=Proposal, dispatch_uid='search_proposal_saved')
+        post_delete.connect(search.proposal_deleted, sender=Proposal, dispatch_uid='search_proposal_deleted')
+        post_save.connect(search.vendor_saved, sender=Vendor, dispatch_uid='search_vendor_saved')
+
+        # Tell connected browsers about newly ingested proposals
+        post_save.connect(events.proposal_saved, sender=Proposal, dispatch_uid='events_proposal_saved')
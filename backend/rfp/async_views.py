@@ -0,0 +1,118 @@
+"""
+Native async versions of the endpoints that spend most of their time waiting
+on OpenAI or the mail server. Under ASGI they let one worker keep many of these
+requests in flight; urls.py switches to them when settings.ASYNC_VIEWS is set.
+DRF 3.14 has no async APIView, so these are plain Django views that return the
+same JSON bodies and status codes as their APIView counterparts.
+"""
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import Http404
+
+from .models import RFP
+from .ai_services import AIService
+from .email_services import EmailService
+from .json_codec import JsonResponse
+from .serializers import JobSerializer
+from . import comparisons, jobs
+
+logger = logging.getLogger(__name__)
+
+
+async def _job_accepted(kind, **params):
+    job = await sync_to_async(jobs.enqueue)(kind, **params)
+    data = await sync_to_async(lambda: JobSerializer(job).data)()
+    response = JsonResponse(data, status=202)
+    response['Location'] = data['status_url']
+    return response
+
+
+def _json_body(request):
+    """
+    The request's JSON object and None, or None and the 400 response DRF's
+    parser and the sync view give for a body that is not a JSON object
+    """
+    try:
+        body = json.loads(request.body or b'{}')
+    except ValueError as e:
+        return None, JsonResponse({'detail': f'JSON parse error - {e}'}, status=400)
+    if not isinstance(body, dict):
+        return None, JsonResponse({'error': 'Request body must be a JSON object'}, status=400)
+    return body, None
+
+
+async def parse_natural_language(request):
+    if request.method != 'POST':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+    
+    body, error = _json_body(request)
+    if error is not None:
+        return error
+    user_input = body.get('text', '')
+    if not user_input:
+        return JsonResponse({'error': 'No text provided'}, status=400)
+    
+    structured_data = await AIService.aparse_natural_language_to_rfp(user_input)
+    return JsonResponse(structured_data)
+
+parse_natural_language.csrf_exempt = True
+
+
+async def compare_proposals(request, pk):
+    if request.method != 'GET':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+    
+    try:
+        rfp = await RFP.objects.aget(pk=pk)
+    except RFP.DoesNotExist:
+        raise Http404('No RFP matches the given query.')
+    
+    if await sync_to_async(jobs.prefers_async)(request):
+        return await _job_accepted('compare_proposals', rfp_id=rfp.pk)
+    
+    try:
+        inputs = await sync_to_async(comparisons.comparison_inputs)(rfp)
+        if not inputs['parsed_proposals']:
+            return JsonResponse(comparisons.missing_proposals_error(inputs), status=400)
+        
+        # Get AI comparison
+        ai_result = await AIService.acompare_proposals_and_recommend(inputs['proposals_data'], inputs['rfp_data'])
+        
+        return JsonResponse(await sync_to_async(comparisons.save_comparison)(rfp, ai_result, inputs))
+        
+    except Exception as e:
+        logger.error(f"Compare proposals error: {str(e)}", exc_info=True)
+        return JsonResponse({
+            'error': 'Failed to compare proposals',
+            'details': str(e),
+            'message': f'❌ Error comparing proposals: {str(e)}'
+        }, status=500)
+
+
+async def check_emails(request):
+    if request.method != 'POST':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+    
+    if await sync_to_async(jobs.prefers_async)(request):
+        return await _job_accepted('check_emails')
+    
+    try:
+        # Check for new emails
+        new_proposal_ids = await EmailService.acheck_incoming_emails()
+        
+        # Parse new proposals
+        parsed_count = await EmailService.aparse_new_proposals()
+        
+        return JsonResponse(await sync_to_async(EmailService.inbox_summary)(new_proposal_ids, parsed_count))
+        
+    except Exception as e:
+        logger.error(f"Check emails error: {str(e)}", exc_info=True)
+        return JsonResponse({
+            'error': 'Failed to check emails',
+            'details': str(e),
+            'message': f'❌ Error checking emails: {str(e)}'
+        }, status=500)
+
+check_emails.csrf_exempt = True
@@ -0,0 +1,352 @@
+"""
+Performance benchmarks, run with `manage.py bench`.
+
+Every case runs in a throwaway database filled by rfp.synthetic_data, with
+local stand-ins for the outside world: Django's locmem mail backend instead
+of SMTP, FakeIMAP instead of the mail server and a canned completion instead
+of OpenAI. A case is timed `repeat` times and reports the median, so the
+numbers can be compared with a stored baseline from the same machine.
+"""
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import tempfile
+import time
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core import mail
+from django.db import transaction
+from django.test import Client, override_settings
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from . import json_codec, logs, synthetic_data
+from .fast_serializers import ProposalListSerializer, RFPListSerializer, VendorListSerializer
+from .ai_services import AIService
+from .email_services import EmailService
+from .models import Blob, Proposal, RFP, RFPSendLog, Vendor
+from .serializers import ProposalSerializer, ProposalSummarySerializer, RFPSerializer, VendorSerializer
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+# Rows for the cases whose cost is per item rather than per table size
+SERIALIZER_ROWS = 1000
+INBOX_MESSAGES = 200
+FAN_OUT_VENDORS = 1000
+PARSE_PROPOSALS = 200
+LOGGED_REQUESTS = 50
+JSON_ROWS = 10000
+
+PROPOSAL_TEXT = (
+    "Thank you for the RFP. We can supply 20 laptops at $1,150 each and 15 monitors at $240 each, "
+    "total $26,600, delivered within 21 days. Payment terms Net 30, 3 year on-site warranty."
+)
+# An RFP pasted in from a long tender document
+LARGE_RFP = {
+    'title': 'Office refresh',
+    'description': 'Laptops and monitors for the new office, delivered and installed. ' * 1000,
+    'total_budget': 50000,
+    'requirements': [f'Requirement {i}: 16GB RAM, 3 year on-site warranty' for i in range(300)],
+}
+PARSED_PROPOSAL = {
+    'total_price': 26600,
+    'delivery_days': 21,
+    'payment_terms': 'Net 30',
+    'warranty': '3 years',
+    'compliance_score': 92,
+    'items': [{'name': 'Laptop', 'quantity': 20, 'unit_price': 1150}],
+}
+
+
+def populate(size):
+    """
+    Top the synthetic dataset up to `size` vendors and RFPs, with about as
+    many proposals. Every proposal is parsed so parse_new_proposals only
+    sees the rows a case adds.
+    """
+    vendors = Vendor.objects.filter(email__startswith='bench-').count()
+    rfps = RFP.objects.count()
+    if vendors < size or rfps < size:
+        synthetic_data.generate(vendors=max(size - vendors, 0), rfps=max(size - rfps, 0), invites_per_rfp=2,
+                                parsed_rate=1.0, seed=size, prefix='bench')
+
+
+def measure(func, repeat, setup=None):
+    """
+    Median seconds of `func(setup())` over `repeat` runs. Each run is rolled
+    back, so cases that write leave the database as they found it.
+    """
+    timings = []
+    for _ in range(repeat):
+        with transaction.atomic():
+            state = setup() if setup else None
+            started = time.perf_counter()
+            func(state)
+            timings.append(time.perf_counter() - started)
+            transaction.set_rollback(True)
+    return statistics.median(timings)
+
+
+def _get(client, path):
+    response = client.get(path)
+    assert response.status_code == 200, response.status_code
+    return response
+
+
+class FakeIMAP:
+    """Stand-in for imaplib.IMAP4_SSL serving a fixed set of unread messages"""
+    messages = []
+
+    def __init__(self, host, port):
+        pass
+
+    def login(self, user, password):
+        return 'OK', [b'Logged in']
+
+    def select(self, mailbox):
+        return 'OK', [str(len(self.messages)).encode()]
+
+    def search(self, charset, criterion):
+        return 'OK', [b' '.join(str(i + 1).encode() for i in range(len(self.messages)))]
+
+    def fetch(self, email_id, parts):
+        return 'OK', [(email_id + b' (RFC822)', self.messages[int(email_id) - 1])]
+
+    def store(self, email_id, command, flags):
+        return 'OK', []
+
+    def close(self):
+        pass
+
+    def logout(self):
+        pass
+
+
+def vendor_reply(name, address, subject):
+    """A multipart reply as a mail client would send it: text, HTML and a PDF quote"""
+    message = MIMEMultipart('mixed')
+    message['From'] = f'{name} <{address}>'
+    message['To'] = 'procurement@example.com'
+    message['Subject'] = subject
+    alternative = MIMEMultipart('alternative')
+    alternative.attach(MIMEText(PROPOSAL_TEXT * 5, 'plain', 'utf-8'))
+    alternative.attach(MIMEText(f'<p>{PROPOSAL_TEXT * 5}</p>', 'html', 'utf-8'))
+    message.attach(alternative)
+    quote = MIMEApplication(b'%PDF-1.4 ' + b'0' * 20000, 'pdf')
+    quote.add_header('Content-Disposition', 'attachment', filename='quote.pdf')
+    message.attach(quote)
+    return message.as_bytes()
+
+
+def _completion(**kwargs):
+    message = SimpleNamespace(content=json.dumps(PARSED_PROPOSAL))
+    usage = SimpleNamespace(total_tokens=600, prompt_tokens=450, completion_tokens=150)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+def list_endpoints(size, repeat):
+    client = Client()
+    populate(size)
+    for name, path, model in [('vendors', '/api/vendors/', Vendor), ('rfps', '/api/rfps/', RFP),
+                              ('proposals', '/api/proposals/', Proposal)]:
+        yield f'list_{name}[{size}]', measure(lambda state: _get(client, path), repeat), model.objects.count()
+
+
+def serializers_throughput(repeat):
+    populate(SERIALIZER_ROWS)
+    rfps = list(RFP.objects.all()[:SERIALIZER_ROWS])
+    proposals = list(
+        Proposal.objects.select_related('rfp', 'vendor', 'email_body_blob', 'raw_response_blob')[:SERIALIZER_ROWS]
+    )
+    yield (f'serialize_rfps[{len(rfps)}]',
+           measure(lambda state: RFPSerializer(rfps, many=True).data, repeat), len(rfps))
+    yield (f'serialize_proposals[{len(proposals)}]',
+           measure(lambda state: ProposalSerializer(proposals, many=True).data, repeat), len(proposals))
+
+
+def list_serializers(repeat):
+    """
+    The list endpoints' serialization, queries included: ModelSerializer
+    against the .values() fast path that replaced it
+    """
+    populate(SERIALIZER_ROWS)
+    cases = [
+        ('vendors', Vendor.objects.all(), lambda rows: VendorSerializer(rows, many=True), VendorListSerializer),
+        ('rfps', RFP.objects.order_by('-created_at'), lambda rows: RFPSerializer(rows, many=True), RFPListSerializer),
+        ('proposals', Proposal.objects.select_related('rfp', 'vendor'),
+         lambda rows: ProposalSummarySerializer(rows, many=True), ProposalListSerializer),
+    ]
+    for name, queryset, model_serializer, fast_serializer in cases:
+        queryset = queryset[:SERIALIZER_ROWS]
+        rows = queryset.count()
+        yield f'list_serializer_{name}[drf]', measure(lambda state: model_serializer(queryset).data, repeat), rows
+        yield f'list_serializer_{name}[values]', measure(lambda state: fast_serializer(queryset).data, repeat), rows
+
+
+def inbox_ingest(repeat):
+    # Vendors with no other open RFP, so every reply matches the case's RFP
+    synthetic_data.generate(vendors=INBOX_MESSAGES, rfps=0, prefix='inbox')
+    vendors = list(Vendor.objects.filter(email__startswith='inbox-').order_by('email'))
+
+    def setup():
+        # A fresh RFP each run, so the replies become new proposals
+        rfp = RFP.objects.create(title='Bench inbox RFP', description='d', deadline=timezone.now(), status='sent')
+        RFPSendLog.objects.bulk_create([RFPSendLog(rfp=rfp, vendor=vendor, email_subject='RFP') for vendor in vendors])
+        FakeIMAP.messages = [vendor_reply(vendor.name, vendor.email, f'Re: {rfp.title} - proposal') for vendor in vendors]
+
+    def check(state):
+        created = EmailService.check_incoming_emails_real()
+        assert len(created) == len(vendors), len(created)
+
+    with override_settings(EMAIL_RECEIVING_ENABLED=True), \
+            mock.patch('imaplib.IMAP4_SSL', FakeIMAP):
+        yield f'check_incoming_emails_real[{len(vendors)}]', measure(check, repeat, setup), len(vendors)
+
+
+def send_fan_out(repeat):
+    populate(FAN_OUT_VENDORS)
+    vendor_ids = list(Vendor.objects.filter(email__startswith='bench-').values_list('id', flat=True)[:FAN_OUT_VENDORS])
+
+    def setup():
+        mail.outbox = []
+        return RFP.objects.create(title='Bench fan-out RFP', description='d', deadline=timezone.now(),
+                                  requirements=['16GB RAM', '3 year warranty'])
+
+    def send(rfp):
+        results = EmailService.send_rfp_to_vendors(rfp, vendor_ids)
+        assert all(result['status'] == 'sent' for result in results)
+
+    with override_settings(EMAIL_SENDING_ENABLED=True, DEMO_MODE=False,
+                           EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+        yield f'send_rfp_to_vendors[{len(vendor_ids)}]', measure(send, repeat, setup), len(vendor_ids)
+
+
+def parse_proposals(repeat):
+    populate(PARSE_PROPOSALS)
+    vendors = list(Vendor.objects.filter(email__startswith='bench-').order_by('email')[:PARSE_PROPOSALS])
+    body = Blob.for_text(PROPOSAL_TEXT)
+
+    def setup():
+        rfp = RFP.objects.create(title='Bench parse RFP', description='d', deadline=timezone.now(),
+                                 requirements=['16GB RAM'], status='sent')
+        Blob.save_pending(body)
+        Proposal.objects.bulk_create([
+            Proposal(rfp=rfp, vendor=vendor, email_subject='Re: RFP', email_body_blob=body, raw_response_blob=body)
+            for vendor in vendors
+        ])
+
+    def parse(state):
+        assert EmailService.parse_new_proposals() == len(vendors)
+
+    with mock.patch.object(AIService, 'DEMO_MODE', False), \
+            mock.patch('openai.ChatCompletion.create', side_effect=_completion):
+        yield f'parse_new_proposals[{len(vendors)}]', measure(parse, repeat, setup), len(vendors)
+
+
+def request_logging(repeat):
+    """
+    POST /api/rfps/ with a large payload while the app logs to a real file,
+    once writing synchronously and once through rfp.logs.QueueHandler
+    """
+    client = Client()
+    body = json.dumps(LARGE_RFP)
+    loggers = [logging.getLogger(name) for name in ('rfp', 'django')]
+
+    def post(state):
+        for _ in range(LOGGED_REQUESTS):
+            response = client.post('/api/rfps/', body, content_type='application/json')
+            assert response.status_code == 201, response.status_code
+
+    with tempfile.TemporaryDirectory() as directory:
+        def file_handler():
+            handler = logging.FileHandler(os.path.join(directory, 'debug.log'))
+            handler.setLevel(logging.DEBUG)
+            return handler
+
+        def queued_handler():
+            handler = logs.QueueHandler([file_handler()])
+            handler.addFilter(logs.RateLimitFilter())
+            return handler
+
+        saved = [(logger, logger.handlers, logger.level, logger.propagate) for logger in loggers]
+        disabled = logging.root.manager.disable
+        logging.disable(logging.NOTSET)
+        try:
+            for name, make_handler in [('sync', file_handler), ('queued', queued_handler)]:
+                handler = make_handler()
+                for logger in loggers:
+                    logger.handlers, logger.propagate = [handler], False
+                    logger.setLevel(logging.DEBUG if logger.name == 'rfp' else logging.INFO)
+                try:
+                    yield f'create_rfp_logged[{name}]', measure(post, repeat), LOGGED_REQUESTS
+                finally:
+                    handler.close()
+        finally:
+            for logger, handlers, level, propagate in saved:
+                logger.handlers, logger.propagate = handlers, propagate
+                logger.setLevel(level)
+            logging.disable(disabled)
+
+
+def json_payloads(repeat):
+    """
+    Full proposals, email bodies included, rendered to and parsed from JSON
+    by DRF's stock classes and by rfp.json_codec
+    """
+    populate(JSON_ROWS)
+    proposals = Proposal.objects.select_related('rfp', 'vendor', 'email_body_blob', 'raw_response_blob')
+    data = ProposalSerializer(proposals[:JSON_ROWS], many=True).data
+    body = json_codec.ORJSONRenderer().render(data)
+    for name, renderer, parser in [('drf', JSONRenderer(), JSONParser()),
+                                   ('orjson', json_codec.ORJSONRenderer(), json_codec.ORJSONParser())]:
+        yield f'render_json[{name}]', measure(lambda state: renderer.render(data), repeat), len(data)
+        yield f'parse_json[{name}]', measure(lambda state: parser.parse(io.BytesIO(body)), repeat), len(data)
+
+
+def run(sizes=DEFAULT_SIZES, repeat=3, report=None):
+    """
+    Run every case and return {name: {'seconds': median, 'rows': rows}}.
+    Must be called on an empty, disposable database.
+    """
+    # json_payloads tops the dataset up to JSON_ROWS, so smaller list_endpoints
+    # sizes run first or they would measure JSON_ROWS rows
+    cases = [list_endpoints(size, repeat) for size in sorted(sizes) if size < JSON_ROWS]
+    cases += [serializers_throughput(repeat), list_serializers(repeat), inbox_ingest(repeat), send_fan_out(repeat),
+              parse_proposals(repeat), request_logging(repeat), json_payloads(repeat)]
+    cases += [list_endpoints(size, repeat) for size in sorted(sizes) if size >= JSON_ROWS]
+    results = {}
+    for case in cases:
+        for name, seconds, rows in case:
+            results[name] = {'seconds': seconds, 'rows': rows}
+            if report:
+                report(name, results[name])
+    return results
+
+
+def baseline_document(results):
+    return {
+        'created_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+
+def regressions(results, baseline, threshold):
+    """
+    Cases that got slower than the baseline by more than `threshold` (0.2 =
+    20%), as (name, baseline seconds, current seconds)
+    """
+    slower = []
+    for name, result in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if previous and result['seconds'] > previous['seconds'] * (1 + threshold):
+            slower.append((name, previous['seconds'], result['seconds']))
+    return slower
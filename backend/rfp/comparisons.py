@@ -0,0 +1,102 @@
+"""
+Comparison steps shared by the sync and async compare endpoints
+"""
+from .models import Proposal, Comparison
+from .serializers import ComparisonSerializer
+from . import events, profiling
+
+
+def comparison_inputs(rfp):
+    """
+    Collect the parsed proposals and the RFP fields the AI comparison needs
+    """
+    all_proposals = Proposal.objects.filter(rfp=rfp)
+    parsed_proposals = list(all_proposals.filter(is_parsed=True).select_related('vendor'))
+    
+    # Prepare data for AI
+    proposals_data = [{
+        'vendor_name': p.vendor.name,
+        'vendor_id': p.vendor.id,
+        'total_price': float(p.total_price) if p.total_price else 0,
+        'proposed_delivery_days': p.proposed_delivery_days,
+        'compliance_score': p.compliance_score,
+        'warranty_offered': p.warranty_offered,
+        'proposed_terms': p.proposed_terms
+    } for p in parsed_proposals]
+    
+    rfp_data = {
+        'title': rfp.title,
+        'total_budget': float(rfp.total_budget),
+        'delivery_days': rfp.delivery_days,
+        'requirements': rfp.requirements
+    }
+    
+    return {
+        'available_proposals': all_proposals.count(),
+        'parsed_proposals': parsed_proposals,
+        'proposals_data': proposals_data,
+        'rfp_data': rfp_data,
+    }
+
+
+def missing_proposals_error(inputs):
+    """
+    Response body for an RFP without any parsed proposal to compare
+    """
+    available = inputs['available_proposals']
+    
+    # Provide helpful message based on whether there are any proposals
+    if available == 0:
+        message = "❌ No proposals found for this RFP. Please send the RFP to vendors first."
+    else:
+        message = f"⚠️ Found {available} proposals but none are parsed yet. Please click 'Check Emails' to parse them."
+    
+    return {
+        'error': 'Need at least 1 parsed proposal for comparison',
+        'available_proposals': available,
+        'parsed_proposals': len(inputs['parsed_proposals']),
+        'message': message
+    }
+
+
+def save_comparison(rfp, ai_result, inputs):
+    """
+    Store the AI result, flag the recommended proposal and build the response body
+    """
+    parsed_proposals = inputs['parsed_proposals']
+    
+    # Create or update comparison record
+    comparison, created = Comparison.objects.get_or_create(
+        rfp=rfp,
+        defaults={
+            'ai_recommendation': ai_result,
+            'summary': ai_result.get('summary', 'AI Comparison Generated')
+        }
+    )
+    
+    if not created:
+        comparison.ai_recommendation = ai_result
+        comparison.summary = ai_result.get('summary', 'AI Comparison Updated')
+        comparison.save()
+    
+    comparison.proposals.set(parsed_proposals)
+    
+    # Mark recommended proposal as preferred
+    recommended_vendor_id = ai_result.get('recommendation', {}).get('vendor_id')
+    if recommended_vendor_id:
+        Proposal.objects.filter(rfp=rfp).update(is_preferred=False)
+        Proposal.objects.filter(rfp=rfp, vendor_id=recommended_vendor_id).update(is_preferred=True)
+    
+    events.publish('comparison.ready', rfp_id=rfp.id, comparison_id=comparison.id,
+                   recommended_vendor_id=recommended_vendor_id)
+    
+    serializer = ComparisonSerializer(comparison)
+    response_data = profiling.serialized(serializer)
+    response_data['proposal_details'] = inputs['proposals_data']
+    response_data['rfp_details'] = inputs['rfp_data']
+    
+    # Add success message
+    recommendation = ai_result.get('recommendation', {})
+    response_data['message'] = f'✅ AI comparison generated successfully.\n\n📊 Compared {len(parsed_proposals)} proposals.\n🏆 Recommended vendor: {recommendation.get("vendor_name", "N/A")}\n🎯 Confidence: {recommendation.get("confidence_score", 0)}%'
+    
+    return response_data
@@ -0,0 +1,44 @@
+"""
+Database routing and connection setup for the production SQLite profile
+"""
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Set by ReadDatabaseMiddleware while a read-only view is running
+use_read_database = ContextVar('use_read_database', default=False)
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """connection_created handler that applies settings.SQLITE_PRAGMAS"""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+class ReadWriteRouter:
+    """
+    Sends reads made by read-only views to the ``read`` connection so they never
+    queue behind writers; everything else goes to ``default``
+    """
+    read_alias = 'read'
+
+    def db_for_read(self, model, **hints):
+        if use_read_database.get() and self.read_alias in settings.DATABASES:
+            return self.read_alias
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases point at the same SQLite file
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
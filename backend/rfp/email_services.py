@@ -1,21 +1,36 @@
 import os
-import smtplib
-import imaplib
-import email
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import ssl
-from email.header import decode_header
 import time
 import random
+import asyncio
+import functools
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.core.mail import send_mail, EmailMessage
-from django.core.mail.backends.smtp import EmailBackend
-from .models import Vendor, RFP, Proposal, RFPSendLog
+from django.db import connections, transaction
+from django.core.mail import send_mail, get_connection, EmailMessage
+from .models import Blob, Vendor, RFP, Proposal, RFPSendLog
+from . import events, line_items, metrics, profiling, requirement_library
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Publish a send progress event every this many vendors
+SEND_PROGRESS_EVERY = 500
+BULK_BATCH_SIZE = 1000
+
+
+def _closing_connections(func):
+    """
+    Close the database connections a one-off worker thread opened once it is done
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            connections.close_all()
+    return wrapper
+
+
 class EmailService:
     """
     Email service for sending RFPs and receiving vendor responses
@@ -26,7 +41,8 @@ class EmailService:
         """Test email configuration"""
         try:
             if settings.EMAIL_SENDING_ENABLED:
-                with smtplib.SMTP(settings.EMAIL_HOST, settings.EMAIL_PORT) as server:
+                import smtplib
+                with profiling.timed('smtp'), smtplib.SMTP(settings.EMAIL_HOST, settings.EMAIL_PORT) as server:
                     server.starttls()
                     server.login(settings.EMAIL_HOST_USER, settings.EMAIL_HOST_PASSWORD)
                     return True, "Email connection successful"
@@ -36,22 +52,13 @@ class EmailService:
             return False, f"Email connection failed: {str(e)}"
     
     @staticmethod
-    def send_rfp_to_vendors(rfp, vendor_ids):
+    def _rfp_email(rfp, vendor, requirements):
         """
-        Send RFP to selected vendors via email
-        Returns: List of results with status for each vendor
+        Subject and body of the RFP email for one vendor
         """
-        logger.info(f"Sending RFP '{rfp.title}' to {len(vendor_ids)} vendors")
-        
-        vendors = Vendor.objects.filter(id__in=vendor_ids)
-        results = []
+        subject = f"Request for Proposal: {rfp.title}"
         
-        for vendor in vendors:
-            try:
-                # Create email content
-                subject = f"Request for Proposal: {rfp.title}"
-                
-                body = f"""Dear {vendor.contact_person or vendor.name},
+        body = f"""Dear {vendor.contact_person or vendor.name},
 
 You are invited to submit a proposal for the following requirement:
 
@@ -65,7 +72,7 @@ You are invited to submit a proposal for the following requirement:
 - Warranty: {rfp.warranty}
 
 **Detailed Requirements:**
-{chr(10).join([f"• {req}" for req in rfp.requirements])}
+{requirements}
 
 **Please provide in your response:**
 1. Total quoted price
@@ -84,65 +91,124 @@ Best regards,
 Procurement Team
 AI-Powered RFP Management System
                 """
+        return subject, body
+    
+    @staticmethod
+    def send_rfp_to_vendors(rfp, vendor_ids):
+        """
+        Send RFP to selected vendors via email
+        Returns: List of results with status for each vendor
+        
+        All database writes happen in one transaction after the emails go out,
+        as a handful of bulk statements however many vendors there are.
+        Resending to a vendor refreshes its existing send log.
+        """
+        logger.info(f"Sending RFP '{rfp.title}' to {len(vendor_ids)} vendors")
+        
+        vendors = list(Vendor.objects.filter(id__in=vendor_ids))
+        # One membership query tells resends apart from first sends
+        already_sent = set(
+            RFPSendLog.objects.filter(rfp=rfp, vendor_id__in=vendor_ids).values_list('vendor_id', flat=True)
+        )
+        requirements = chr(10).join([f"• {req}" for req in rfp.requirements])
+        send_real = settings.EMAIL_SENDING_ENABLED and not settings.DEMO_MODE
+        
+        results = []
+        send_logs = []
+        connection = EmailService._open_smtp_connection() if send_real else None
+        try:
+            for vendor in vendors:
+                try:
+                    # Create email content
+                    subject, body = EmailService._rfp_email(rfp, vendor, requirements)
+                    
+                    # Check if we should send real email or just simulate
+                    if send_real:
+                        # Send actual email over the shared SMTP session
+                        with profiling.timed('smtp'), metrics.SMTP_SEND_SECONDS.time():
+                            EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [vendor.email],
+                                         connection=connection).send(fail_silently=False)
+                        status = 'sent'
+                        logger.debug("Email sent to %s", vendor.email)
+                    else:
+                        # Demo mode - just log
+                        status = 'demo_sent'
+                        logger.debug("DEMO: Would send email to %s (%d characters)", vendor.email, len(body))
+                    
+                    metrics.SMTP_SENDS.inc(outcome=status)
+                    send_logs.append(RFPSendLog(
+                        rfp=rfp,
+                        vendor=vendor,
+                        email_subject=subject,
+                        email_body=body,
+                        is_sent=(status == 'sent')
+                    ))
+                    
+                    results.append({
+                        'vendor_id': vendor.id,
+                        'vendor_name': vendor.name,
+                        'vendor_email': vendor.email,
+                        'status': status,
+                        'resent': vendor.id in already_sent,
+                        'error': None
+                    })
+                    
+                except Exception as e:
+                    logger.error(f"Failed to send email to {vendor.email}: {str(e)}")
+                    metrics.SMTP_SENDS.inc(outcome='failed')
+                    results.append({
+                        'vendor_id': vendor.id,
+                        'vendor_name': vendor.name,
+                        'vendor_email': vendor.email,
+                        'status': 'failed',
+                        'resent': vendor.id in already_sent,
+                        'error': str(e)
+                    })
                 
-                # Check if we should send real email or just simulate
-                if settings.EMAIL_SENDING_ENABLED and not settings.DEMO_MODE:
-                    # Send actual email
-                    send_mail(
-                        subject=subject,
-                        message=body,
-                        from_email=settings.DEFAULT_FROM_EMAIL,
-                        recipient_list=[vendor.email],
-                        fail_silently=False,
-                    )
-                    status = 'sent'
-                    logger.info(f"Email sent to {vendor.email}")
-                else:
-                    # Demo mode - just log
-                    status = 'demo_sent'
-                    logger.info(f"DEMO: Would send email to {vendor.email}")
-                    logger.info(f"  Subject: {subject}")
-                    logger.info(f"  Body length: {len(body)} characters")
-                
-                # Create send log
-                RFPSendLog.objects.create(
-                    rfp=rfp,
-                    vendor=vendor,
-                    email_subject=subject,
-                    email_body=body,
-                    is_sent=(status == 'sent')
-                )
-                
-                # Add vendor to RFP if not already added
-                if vendor not in rfp.vendors.all():
-                    rfp.vendors.add(vendor)
-                
-                results.append({
-                    'vendor_id': vendor.id,
-                    'vendor_name': vendor.name,
-                    'vendor_email': vendor.email,
-                    'status': status,
-                    'error': None
-                })
-                
-            except Exception as e:
-                logger.error(f"Failed to send email to {vendor.email}: {str(e)}")
-                results.append({
-                    'vendor_id': vendor.id,
-                    'vendor_name': vendor.name,
-                    'vendor_email': vendor.email,
-                    'status': 'failed',
-                    'error': str(e)
-                })
+                if len(results) % SEND_PROGRESS_EVERY == 0 and len(results) < len(vendors):
+                    events.publish('rfp.send_progress', rfp_id=rfp.id, done=len(results), total=len(vendors))
+        finally:
+            if connection is not None:
+                with profiling.timed('smtp'):
+                    connection.close()
         
-        # Update RFP status
-        if results and any(r['status'] in ['sent', 'demo_sent'] for r in results):
-            rfp.status = 'sent'
-            rfp.save()
-            logger.info(f"Updated RFP {rfp.id} status to 'sent'")
+        with transaction.atomic():
+            # Send logs double as the RFP <-> vendor membership rows; a resend
+            # updates the existing row instead of tripping unique_together
+            Blob.save_pending(*(log.email_body_blob for log in send_logs))
+            RFPSendLog.objects.bulk_create(
+                send_logs,
+                batch_size=BULK_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['rfp', 'vendor'],
+                update_fields=['sent_at', 'email_subject', 'email_body_blob', 'is_sent', 'sent_error'],
+            )
+            
+            # Update RFP status
+            if send_logs:
+                rfp.status = 'sent'
+                rfp.save()
+                logger.info(f"Updated RFP {rfp.id} status to 'sent'")
+            
+            events.publish('rfp.send_progress', rfp_id=rfp.id, done=len(results), total=len(vendors),
+                           sent=len(send_logs), failed=len(results) - len(send_logs))
         
         return results
     
+    @staticmethod
+    def _open_smtp_connection():
+        """
+        One SMTP session for a whole fan-out. If it cannot be opened here, each
+        message retries on its own and reports the error per vendor.
+        """
+        connection = get_connection()
+        try:
+            with profiling.timed('smtp'):
+                connection.open()
+        except Exception as e:
+            logger.error(f"Could not open SMTP connection: {str(e)}")
+        return connection
+    
     @staticmethod
     def create_demo_proposal_for_vendor(rfp, vendor):
         """Create a realistic demo proposal for testing"""
@@ -179,7 +245,7 @@ Best regards,
         """
         
         # Use AI service to parse (in demo mode, it will return demo data)
-        parsed_data = AIService.parse_vendor_response(email_body, rfp.requirements)
+        parsed_data = AIService.parse_vendor_response(email_body, rfp.requirements, line_items.requested_items(rfp))
         
         # Create proposal
         proposal = Proposal.objects.create(
@@ -197,6 +263,8 @@ Best regards,
             parsed_data=parsed_data,
             notes=f"Demo proposal from {vendor.name}"
         )
+        line_items.save_line_items(proposal, parsed_data.get('items'))
+        requirement_library.save_compliance(proposal, parsed_data.get('compliance_analysis'))
         
         logger.info(f"Created demo proposal {proposal.id} from {vendor.name} for RFP {rfp.id}")
         return proposal
@@ -211,19 +279,26 @@ Best regards,
             logger.warning("Email receiving is disabled in settings")
             return []
         
+        # Imported here rather than at startup: only the inbox check needs them
+        import email.utils
+        import imaplib
+        from email.header import decode_header
+        
         try:
             logger.info("Checking real emails via IMAP...")
             
             # Connect to IMAP server
-            mail = imaplib.IMAP4_SSL(settings.EMAIL_IMAP_HOST, settings.EMAIL_IMAP_PORT)
-            mail.login(settings.EMAIL_HOST_USER, settings.EMAIL_HOST_PASSWORD)
-            mail.select('inbox')
-            
-            # Search for unread emails
-            status, messages = mail.search(None, 'UNSEEN')
+            with profiling.timed('imap'):
+                mail = imaplib.IMAP4_SSL(settings.EMAIL_IMAP_HOST, settings.EMAIL_IMAP_PORT)
+                mail.login(settings.EMAIL_HOST_USER, settings.EMAIL_HOST_PASSWORD)
+                mail.select('inbox')
+                
+                # Search for unread emails
+                status, messages = mail.search(None, 'UNSEEN')
             
             if status != 'OK':
                 logger.error("Failed to search emails")
+                metrics.IMAP_POLLS.inc(outcome='failed')
                 return []
             
             email_ids = messages[0].split()
@@ -234,10 +309,13 @@ Best regards,
             for email_id in email_ids:
                 try:
                     # Fetch the email
-                    status, msg_data = mail.fetch(email_id, '(RFC822)')
+                    with profiling.timed('imap'), metrics.IMAP_FETCH_SECONDS.time():
+                        status, msg_data = mail.fetch(email_id, '(RFC822)')
                     
                     if status != 'OK':
+                        metrics.IMAP_FETCHES.inc(outcome='failed')
                         continue
+                    metrics.IMAP_FETCHES.inc(outcome='ok')
                     
                     # Parse email
                     raw_email = msg_data[0][1]
@@ -273,12 +351,12 @@ Best regards,
                         except:
                             body = msg.get_payload(decode=True).decode('latin-1')
                     
-                    logger.info(f"Processing email from {sender_email}: {subject[:50]}...")
+                    logger.debug("Processing email from %s: %.50s...", sender_email, subject)
                     
                     # Find vendor by email
                     vendor = Vendor.objects.filter(email=sender_email).first()
                     if not vendor:
-                        logger.info(f"No vendor found with email: {sender_email}")
+                        logger.debug("No vendor found with email: %s", sender_email)
                         continue
                     
                     # Try to find matching RFP by subject
@@ -309,21 +387,25 @@ Best regards,
                         mail.store(email_id, '+FLAGS', '\\Seen')
                         
                         new_proposals.append(proposal.id)
-                        logger.info(f"Created proposal {proposal.id} from email")
+                        logger.debug("Created proposal %s from email", proposal.id)
                     
                 except Exception as e:
                     logger.error(f"Error processing email {email_id}: {str(e)}")
                     continue
             
             # Close connection
-            mail.close()
-            mail.logout()
+            with profiling.timed('imap'):
+                mail.close()
+                mail.logout()
             
             logger.info(f"Found {len(new_proposals)} new proposals")
+            metrics.IMAP_POLLS.inc(outcome='ok')
+            metrics.PROPOSALS_INGESTED.inc(len(new_proposals), source='imap')
             return new_proposals
             
         except Exception as e:
             logger.error(f"IMAP error: {str(e)}")
+            metrics.IMAP_POLLS.inc(outcome='failed')
             return []
     
     @staticmethod
@@ -347,11 +429,12 @@ Best regards,
                 try:
                     proposal = EmailService.create_demo_proposal_for_vendor(rfp, vendor)
                     new_proposals.append(proposal.id)
-                    logger.info(f"Created demo proposal for vendor {vendor.name}")
+                    logger.debug("Created demo proposal for vendor %s", vendor.name)
                 except Exception as e:
                     logger.error(f"Failed to create demo proposal: {str(e)}")
         
         logger.info(f"Created {len(new_proposals)} demo proposals")
+        metrics.PROPOSALS_INGESTED.inc(len(new_proposals), source='demo')
         return new_proposals
     
     @staticmethod
@@ -366,43 +449,127 @@ Best regards,
             return EmailService.check_incoming_emails_demo()
     
     @staticmethod
-    def parse_new_proposals():
+    def parse_new_proposals(progress=None):
         """
-        Parse any unparsed proposals using AI
+        Parse any unparsed proposals using AI. `progress`, when given, is called
+        as progress(done, total) after each proposal.
         """
         from .ai_services import AIService
         
-        unparsed_proposals = Proposal.objects.filter(is_parsed=False)
+        unparsed_proposals = list(Proposal.objects.filter(is_parsed=False).select_related('rfp', 'vendor', 'raw_response_blob').prefetch_related('rfp__items'))
         parsed_count = 0
         
-        logger.info(f"Found {unparsed_proposals.count()} unparsed proposals")
+        logger.info(f"Found {len(unparsed_proposals)} unparsed proposals")
         
-        for proposal in unparsed_proposals:
+        for done, proposal in enumerate(unparsed_proposals, 1):
             try:
                 # Parse the proposal using AI
                 parsed_data = AIService.parse_vendor_response(
                     proposal.raw_response,
-                    proposal.rfp.requirements
+                    proposal.rfp.requirements,
+                    line_items.requested_items(proposal.rfp)
                 )
                 
-                # Update proposal with parsed data
-                proposal.total_price = parsed_data.get('total_price')
-                proposal.proposed_delivery_days = parsed_data.get('delivery_days')
-                proposal.proposed_terms = parsed_data.get('payment_terms')
-                proposal.warranty_offered = parsed_data.get('warranty')
-                proposal.compliance_score = parsed_data.get('compliance_score', 0)
-                proposal.parsed_data = parsed_data
-                proposal.is_parsed = True
-                proposal.save()
+                EmailService._apply_parsed_data(proposal, parsed_data)
                 
                 parsed_count += 1
-                logger.info(f"Parsed proposal {proposal.id} from {proposal.vendor.name}")
+                logger.debug("Parsed proposal %s from %s", proposal.id, proposal.vendor.name)
                 
             except Exception as e:
                 logger.error(f"Failed to parse proposal {proposal.id}: {str(e)}")
+                metrics.PROPOSALS_PARSED.inc(outcome='failed')
+            
+            if progress:
+                progress(done, len(unparsed_proposals))
         
         return parsed_count
     
+    @staticmethod
+    def inbox_summary(new_proposal_ids, parsed_count):
+        """
+        Response body shared by the check-emails endpoints and background job
+        """
+        total_proposals = Proposal.objects.count()
+        parsed_total = Proposal.objects.filter(is_parsed=True).count()
+        
+        if settings.DEMO_MODE:
+            message = f'📧 DEMO MODE: Checked emails and created {len(new_proposal_ids)} new demo proposal(s).'
+        else:
+            message = f'📧 Found {len(new_proposal_ids)} new email(s), parsed {parsed_count} proposal(s).'
+        
+        return {
+            'success': True,
+            'new_emails': len(new_proposal_ids),
+            'parsed_proposals': parsed_count,
+            'total_proposals': total_proposals,
+            'total_parsed': parsed_total,
+            'demo_mode': settings.DEMO_MODE,
+            'message': message
+        }
+    
+    @staticmethod
+    def _apply_parsed_data(proposal, parsed_data):
+        """
+        Update proposal with parsed data
+        """
+        proposal.total_price = parsed_data.get('total_price')
+        proposal.proposed_delivery_days = parsed_data.get('delivery_days')
+        proposal.proposed_terms = parsed_data.get('payment_terms')
+        proposal.warranty_offered = parsed_data.get('warranty')
+        proposal.compliance_score = parsed_data.get('compliance_score', 0)
+        proposal.parsed_data = parsed_data
+        proposal.is_parsed = True
+        with transaction.atomic():
+            proposal.save()
+            line_items.save_line_items(proposal, parsed_data.get('items'))
+        # Outside the transaction: matching a new wording may call the embeddings API
+        requirement_library.save_compliance(proposal, parsed_data.get('compliance_analysis'))
+        metrics.PROPOSALS_PARSED.inc(outcome='parsed')
+        events.publish_proposal('proposal.parsed', proposal)
+    
+    @staticmethod
+    async def acheck_incoming_emails():
+        """
+        Async twin of check_incoming_emails. The blocking IMAP session runs on a
+        worker thread so the event loop keeps serving other requests meanwhile.
+        """
+        return await sync_to_async(_closing_connections(EmailService.check_incoming_emails), thread_sensitive=False)()
+    
+    @staticmethod
+    async def aparse_new_proposals(concurrency=5):
+        """
+        Async twin of parse_new_proposals that keeps up to `concurrency` AI calls
+        in flight at once instead of parsing proposals one after the other
+        """
+        from .ai_services import AIService
+        
+        unparsed_proposals = await sync_to_async(list)(
+            Proposal.objects.filter(is_parsed=False).select_related('rfp', 'vendor', 'raw_response_blob').prefetch_related('rfp__items')
+        )
+        logger.info(f"Found {len(unparsed_proposals)} unparsed proposals")
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        save = sync_to_async(EmailService._apply_parsed_data)
+        
+        async def parse(proposal):
+            try:
+                async with semaphore:
+                    parsed_data = await AIService.aparse_vendor_response(
+                        proposal.raw_response,
+                        proposal.rfp.requirements,
+                        line_items.requested_items(proposal.rfp)
+                    )
+                await save(proposal, parsed_data)
+                logger.debug("Parsed proposal %s from %s", proposal.id, proposal.vendor.name)
+                return True
+            except Exception as e:
+                logger.error(f"Failed to parse proposal {proposal.id}: {str(e)}")
+                metrics.PROPOSALS_PARSED.inc(outcome='failed')
+                return False
+        
+        results = await asyncio.gather(*(parse(proposal) for proposal in unparsed_proposals))
+        return sum(results)
+    
     @staticmethod
     def send_test_email(to_email, subject, body):
         """
@@ -411,13 +578,15 @@ Best regards,
         try:
             if settings.EMAIL_SENDING_ENABLED and not settings.DEMO_MODE:
                 # Send real test email
-                send_mail(
-                    subject=subject,
-                    message=body,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[to_email],
-                    fail_silently=False,
-                )
+                with profiling.timed('smtp'), metrics.SMTP_SEND_SECONDS.time():
+                    send_mail(
+                        subject=subject,
+                        message=body,
+                        from_email=settings.DEFAULT_FROM_EMAIL,
+                        recipient_list=[to_email],
+                        fail_silently=False,
+                    )
+                metrics.SMTP_SENDS.inc(outcome='sent')
                 return True, f"Test email sent to {to_email}"
             else:
                 # Demo mode
@@ -428,4 +597,5 @@ Best regards,
                 
         except Exception as e:
             logger.error(f"Failed to send test email: {str(e)}")
+            metrics.SMTP_SENDS.inc(outcome='failed')
             return False, str(e)
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""
+Server-sent events for the frontend.
+
+Services call publish() when something the UI shows changes; /api/events/
+streams the Event rows after the client's Last-Event-ID. SQLite has a
+single writer, so ids are handed out in commit order and a client that
+resumes from the last id it saw never skips an event.
+"""
+import asyncio
+import time
+
+import orjson
+from asgiref.sync import sync_to_async
+
+from . import json_codec
+from .fast_serializers import ProposalListSerializer
+from .models import Event, Proposal
+
+# How often an open stream looks for new rows, in seconds
+POLL_INTERVAL = 1.0
+# Comment line sent on quiet streams so proxies keep the connection open
+HEARTBEAT_INTERVAL = 15
+# Streams end after this long; EventSource reconnects with Last-Event-ID
+STREAM_LIFETIME = 300
+# A WSGI stream holds a worker thread, so it sends what is there and ends;
+# the browser then polls by reconnecting every RETRY_MS
+WSGI_STREAM_LIFETIME = 0
+# Reconnect delay suggested to the browser, in milliseconds
+RETRY_MS = 3000
+
+BATCH_SIZE = 100
+KEEP_EVENTS = 10000
+PRUNE_EVERY = 500
+# What the proposal cards show, sent with proposal events so the page has nothing to fetch
+PROPOSAL_FIELDS = ('id', 'rfp', 'rfp_title', 'vendor_name', 'vendor_email', 'email_subject', 'received_at',
+                   'total_price', 'proposed_delivery_days', 'compliance_score', 'is_parsed', 'is_preferred')
+
+
+def publish(type, **data):
+    # Stored as the API would send it, so datetimes and decimals in events look like they do in responses
+    event = Event.objects.create(type=type, data=orjson.loads(json_codec.dumps(data)))
+    if event.pk % PRUNE_EVERY == 0:
+        Event.objects.filter(pk__lte=event.pk - KEEP_EVENTS).delete()
+    return event
+
+
+def latest_id():
+    return Event.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+
+def parse_last_event_id(value):
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def format_event(event):
+    return f"id: {event.pk}\nevent: {event.type}\ndata: {json_codec.dumps(event.data).decode()}\n\n"
+
+
+def _opening(last_id):
+    """
+    Resolve where the stream starts and the lines to send first. A client
+    whose last id has already been pruned gets a `reset` event telling it
+    to reload everything.
+    """
+    lines = [f"retry: {RETRY_MS}\n\n"]
+    if last_id is None:
+        return latest_id(), lines
+
+    oldest = Event.objects.order_by('pk').values_list('pk', flat=True).first()
+    if oldest is not None and oldest > last_id + 1:
+        lines.append(f"event: reset\ndata: {json_codec.dumps({'oldest_id': oldest}).decode()}\n\n")
+    return last_id, lines
+
+
+def _batch(last_id):
+    return list(Event.objects.filter(pk__gt=last_id).order_by('pk')[:BATCH_SIZE])
+
+
+def stream(last_id, lifetime=None):
+    """Event stream for WSGI workers"""
+    lifetime = STREAM_LIFETIME if lifetime is None else lifetime
+    deadline = time.monotonic() + lifetime
+    last_id, lines = _opening(last_id)
+    yield from lines
+
+    last_sent = time.monotonic()
+    while True:
+        batch = _batch(last_id)
+        for event in batch:
+            last_id = event.pk
+            yield format_event(event)
+        if batch:
+            last_sent = time.monotonic()
+            if len(batch) == BATCH_SIZE:
+                continue
+        if time.monotonic() >= deadline:
+            return
+        if time.monotonic() - last_sent >= HEARTBEAT_INTERVAL:
+            last_sent = time.monotonic()
+            yield ": keepalive\n\n"
+        time.sleep(POLL_INTERVAL)
+
+
+async def astream(last_id, lifetime=None):
+    """Event stream for ASGI, which waits without holding a thread"""
+    lifetime = STREAM_LIFETIME if lifetime is None else lifetime
+    deadline = time.monotonic() + lifetime
+    last_id, lines = await sync_to_async(_opening)(last_id)
+    for line in lines:
+        yield line
+
+    last_sent = time.monotonic()
+    while True:
+        batch = await sync_to_async(_batch)(last_id)
+        for event in batch:
+            last_id = event.pk
+            yield format_event(event)
+        if batch:
+            last_sent = time.monotonic()
+            if len(batch) == BATCH_SIZE:
+                continue
+        if time.monotonic() >= deadline:
+            return
+        if time.monotonic() - last_sent >= HEARTBEAT_INTERVAL:
+            last_sent = time.monotonic()
+            yield ": keepalive\n\n"
+        await asyncio.sleep(POLL_INTERVAL)
+
+
+def publish_proposal(type, proposal):
+    summary = ProposalListSerializer(Proposal.objects.filter(pk=proposal.pk), fields=PROPOSAL_FIELDS).data
+    return publish(type, id=proposal.pk, rfp_id=proposal.rfp_id, vendor_id=proposal.vendor_id,
+                   proposal=summary[0] if summary else None)
+
+
+def proposal_saved(sender, instance, created, **kwargs):
+    if created:
+        publish_proposal('proposal.created', instance)
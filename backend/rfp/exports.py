@@ -0,0 +1,138 @@
+"""
+Streaming CSV/JSONL exports of proposals and comparisons
+"""
+import csv
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count
+
+from .models import Proposal, Comparison, RFP
+
+FILE_TYPES = ('csv', 'jsonl')
+CONTENT_TYPES = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+CHUNK_SIZE = 2000
+# Accepted values of the `status` filter
+PROPOSAL_STATUSES = ('parsed', 'unparsed', 'preferred')
+COMPARISON_STATUSES = tuple(value for value, _ in RFP.STATUS_CHOICES)
+
+PROPOSAL_COLUMNS = {
+    'id': 'id',
+    'rfp_id': 'rfp_id',
+    'rfp_title': 'rfp__title',
+    'vendor_id': 'vendor_id',
+    'vendor_name': 'vendor__name',
+    'vendor_email': 'vendor__email',
+    'email_subject': 'email_subject',
+    'received_at': 'received_at',
+    'total_price': 'total_price',
+    'proposed_delivery_days': 'proposed_delivery_days',
+    'proposed_terms': 'proposed_terms',
+    'warranty_offered': 'warranty_offered',
+    'compliance_score': 'compliance_score',
+    'is_parsed': 'is_parsed',
+    'is_preferred': 'is_preferred',
+}
+
+COMPARISON_COLUMNS = [
+    'id', 'rfp_id', 'rfp_title', 'rfp_status', 'created_at', 'proposal_count',
+    'recommended_vendor_id', 'recommended_vendor_name', 'confidence_score', 'summary',
+]
+
+
+class _Echo:
+    """Pseudo-buffer whose write() hands the CSV line straight back"""
+    def write(self, value):
+        return value
+
+
+def _clean(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def proposal_rows(queryset):
+    columns = list(PROPOSAL_COLUMNS.items())
+    values = queryset.order_by('id').values_list(*PROPOSAL_COLUMNS.values())
+    for record in values.iterator(chunk_size=CHUNK_SIZE):
+        yield {name: _clean(value) for (name, _), value in zip(columns, record)}
+
+
+def comparison_rows(queryset):
+    values = queryset.order_by('id').annotate(proposal_count=Count('proposals')).values(
+        'id', 'rfp_id', 'rfp__title', 'rfp__status', 'created_at', 'proposal_count',
+        'ai_recommendation', 'summary',
+    )
+    for record in values.iterator(chunk_size=CHUNK_SIZE):
+        recommendation = (record['ai_recommendation'] or {}).get('recommendation') or {}
+        yield {
+            'id': record['id'],
+            'rfp_id': record['rfp_id'],
+            'rfp_title': record['rfp__title'],
+            'rfp_status': record['rfp__status'],
+            'created_at': _clean(record['created_at']),
+            'proposal_count': record['proposal_count'],
+            'recommended_vendor_id': recommendation.get('vendor_id'),
+            'recommended_vendor_name': recommendation.get('vendor_name'),
+            'confidence_score': recommendation.get('confidence_score'),
+            'summary': record['summary'],
+        }
+
+
+def stream(rows, columns, file_type):
+    """Encode rows one at a time as CSV (with a header line) or JSONL"""
+    if file_type == 'csv':
+        writer = csv.DictWriter(_Echo(), fieldnames=columns)
+        yield writer.writeheader()
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        for row in rows:
+            yield json.dumps(row) + '\n'
+
+
+async def astream(rows, columns, file_type):
+    """stream() for ASGI: each trip to the database thread encodes one chunk of lines"""
+    lines = stream(rows, columns, file_type)
+    next_chunk = sync_to_async(lambda: ''.join(islice(lines, CHUNK_SIZE)))
+    while True:
+        chunk = await next_chunk()
+        if not chunk:
+            return
+        yield chunk
+
+
+def filter_proposals(rfp_id=None, status=None, date_from=None, date_to=None):
+    proposals = Proposal.objects.all()
+    if rfp_id:
+        proposals = proposals.filter(rfp_id=rfp_id)
+    if status == 'parsed':
+        proposals = proposals.filter(is_parsed=True)
+    elif status == 'unparsed':
+        proposals = proposals.filter(is_parsed=False)
+    elif status == 'preferred':
+        proposals = proposals.filter(is_preferred=True)
+    if date_from:
+        proposals = proposals.filter(received_at__date__gte=date_from)
+    if date_to:
+        proposals = proposals.filter(received_at__date__lte=date_to)
+    return proposals
+
+
+def filter_comparisons(rfp_id=None, status=None, date_from=None, date_to=None):
+    comparisons = Comparison.objects.all()
+    if rfp_id:
+        comparisons = comparisons.filter(rfp_id=rfp_id)
+    if status:
+        comparisons = comparisons.filter(rfp__status=status)
+    if date_from:
+        comparisons = comparisons.filter(created_at__date__gte=date_from)
+    if date_to:
+        comparisons = comparisons.filter(created_at__date__lte=date_to)
+    return comparisons
@@ -0,0 +1,111 @@
+"""
+Read-only serializers for the GET list endpoints, built straight from
+`.values_list()` rows.
+
+Each one produces the same JSON as the ModelSerializer it stands in for
+(tests.FastSerializerParityTests compares them), without building model
+instances or running a serializer field per value. Writes and detail
+views keep using the ModelSerializers in serializers.py.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from .models import RFP, RFPSendLog
+
+# RFP.total_budget has decimal_places=2
+CENTS = Decimal('0.01')
+STATUS_DISPLAY = dict(RFP.STATUS_CHOICES)
+
+
+class ValuesSerializer:
+    """
+    `columns` are (output key, lookup) pairs in output order; `data` is a
+    list of dicts, like `ModelSerializer(queryset, many=True).data`.
+    Datetimes are passed through as they are, as DRF does with
+    DATETIME_FORMAT = None, and the renderer formats them.
+    """
+    columns = ()
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    def rows(self):
+        keys = [key for key, _ in self.columns]
+        for row in self.queryset.values_list(*[lookup for _, lookup in self.columns]):
+            yield dict(zip(keys, row))
+
+    @property
+    def data(self):
+        return list(self.rows())
+
+
+def _model_columns(*names):
+    return tuple((name, name) for name in names)
+
+
+class VendorListSerializer(ValuesSerializer):
+    """VendorSerializer(many=True)"""
+    columns = _model_columns('id', 'name', 'email', 'contact_person', 'phone', 'category', 'rating', 'is_active',
+                             'created_at', 'updated_at')
+
+
+class RFPListSerializer(ValuesSerializer):
+    """
+    RFPSerializer(many=True). The invited vendors of every RFP come from one
+    query over the send log rather than two queries per RFP.
+    """
+    columns = _model_columns('id', 'title', 'description', 'natural_language_input', 'structured_data', 'status',
+                             'created_at', 'updated_at', 'deadline', 'total_budget', 'delivery_days',
+                             'payment_terms', 'warranty', 'requirements')
+
+    def rows(self):
+        # Ordered like rfp.vendors.all(), by vendor name
+        vendors = defaultdict(list)
+        sent = RFPSendLog.objects.filter(rfp__in=self.queryset.values('pk')).order_by('vendor__name')
+        for rfp_id, vendor_id in sent.values_list('rfp_id', 'vendor_id'):
+            vendors[rfp_id].append(vendor_id)
+
+        for row in super().rows():
+            vendor_ids = vendors.get(row['id'], [])
+            budget = row['total_budget']
+            yield {
+                'id': row['id'],
+                'vendor_count': len(vendor_ids),
+                'status_display': STATUS_DISPLAY.get(row['status'], row['status']),
+                **row,
+                'total_budget': None if budget is None else f'{budget.quantize(CENTS):f}',
+                'requirements': row['requirements'] if isinstance(row['requirements'], list) else [],
+                'vendors': vendor_ids,
+            }
+
+
+class ProposalListSerializer(ValuesSerializer):
+    """ProposalSummarySerializer(many=True), including its `fields` selection"""
+    columns = (
+        ('id', 'id'),
+        ('vendor_name', 'vendor__name'),
+        ('vendor_email', 'vendor__email'),
+        ('rfp_title', 'rfp__title'),
+        *_model_columns('email_subject', 'attachments', 'received_at', 'total_price', 'proposed_delivery_days',
+                        'proposed_terms', 'warranty_offered', 'compliance_score', 'is_parsed', 'notes',
+                        'is_preferred'),
+        ('rfp', 'rfp_id'),
+        ('vendor', 'vendor_id'),
+    )
+
+    def __init__(self, queryset, fields=None):
+        super().__init__(queryset)
+        if fields is not None:
+            self.columns = tuple(column for column in self.columns if column[0] in fields)
+
+    def rows(self):
+        if not self.columns:
+            # values_list() with no lookups would fetch every column
+            yield from ({} for _ in range(self.queryset.count()))
+            return
+        with_price = any(key == 'total_price' for key, _ in self.columns)
+        for row in super().rows():
+            # Rendered as a number
+            if with_price and row['total_price'] is not None:
+                row['total_price'] = float(row['total_price'])
+            yield row
@@ -0,0 +1,110 @@
+"""
+Scheduling for the inbox ingestion daemon (`manage.py run_inbox_daemon`).
+
+The poll interval follows demand. It is short while a sent RFP's deadline
+is close, when replies arrive, and relaxes as the deadline moves away.
+Polls that find nothing back off further, and with no open RFPs the daemon
+checks only occasionally. Every interval is jittered so several installs
+do not hit the mail server in lockstep.
+"""
+import os
+import random
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import RFP
+
+MIN_INTERVAL = 60
+MAX_INTERVAL = 30 * 60
+IDLE_INTERVAL = 60 * 60
+# Interval as a fraction of the time to the nearest deadline: 1 day away ~ 15 min
+DEADLINE_RATIO = 1 / 100
+# Replies still trickle in for a while after the deadline
+LATE_REPLY_GRACE = timedelta(days=2)
+# Empty polls multiply the interval by up to this much
+MAX_BACKOFF = 8
+JITTER = 0.2
+
+
+class InboxSchedule:
+    def __init__(self, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL, idle_interval=IDLE_INTERVAL,
+                 jitter=JITTER, rng=None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.idle_interval = idle_interval
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self.empty_polls = 0
+
+    def nearest_deadline(self, now):
+        """Deadline of the open RFP closest to now, or None when none is open"""
+        open_rfps = RFP.objects.filter(status='sent')
+        upcoming = open_rfps.filter(deadline__gte=now).order_by('deadline').values_list('deadline', flat=True).first()
+        recent = open_rfps.filter(
+            deadline__lt=now, deadline__gte=now - LATE_REPLY_GRACE
+        ).order_by('-deadline').values_list('deadline', flat=True).first()
+        candidates = [deadline for deadline in (upcoming, recent) if deadline is not None]
+        return min(candidates, key=lambda deadline: abs(deadline - now)) if candidates else None
+
+    def base_interval(self, now):
+        deadline = self.nearest_deadline(now)
+        if deadline is None:
+            return self.idle_interval
+        seconds_away = abs((deadline - now).total_seconds())
+        return min(max(seconds_away * DEADLINE_RATIO, self.min_interval), self.max_interval)
+
+    def record_poll(self, new_emails):
+        """Reset the back-off when mail arrived, grow it when the poll was empty"""
+        self.empty_polls = 0 if new_emails else self.empty_polls + 1
+
+    def next_interval(self, now=None):
+        now = now or timezone.now()
+        base = self.base_interval(now)
+        backoff = min(2 ** self.empty_polls, MAX_BACKOFF)
+        interval = min(base * backoff, max(base, self.max_interval))
+        return interval * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class AlreadyRunning(Exception):
+    pass
+
+
+class InstanceLock:
+    """
+    Exclusive lock on a file, held for the daemon's lifetime. The OS drops it
+    when the process exits, so a crashed daemon never leaves a stale lock.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def acquire(self):
+        self.file = open(self.path, 'a+')
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self.file.close()
+            self.file = None
+            raise AlreadyRunning(f"Another inbox daemon holds {self.path}")
+        self.file.seek(0)
+        self.file.truncate()
+        self.file.write(str(os.getpid()))
+        self.file.flush()
+
+    def release(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
@@ -0,0 +1,218 @@
+"""
+Database-backed background jobs.
+
+Views enqueue a Job row and answer 202 straight away; `manage.py run_jobs`
+claims queued rows one at a time and runs the handler registered for the
+job's kind. There is no broker: the jobs table is the queue, so everything
+runs on a single box next to the SQLite database.
+"""
+import logging
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job, RFP, Worker
+from .ai_services import AIService
+from .email_services import EmailService
+from . import comparisons, events, metrics
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+# Seconds to wait before the first retry; doubles with every further attempt
+RETRY_DELAY = 30
+
+# Seconds between a worker's heartbeats; it counts as gone after missing three
+HEARTBEAT_INTERVAL = 30
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler once a cancel has been requested"""
+
+
+class JobFailed(Exception):
+    """A failure that retrying will not fix; `result` is kept as the job's result"""
+
+    def __init__(self, message, result=None):
+        super().__init__(message)
+        self.result = result
+
+
+def handler(kind):
+    """Register a function as the handler for jobs of `kind`"""
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def worker_alive():
+    """True when some run_jobs process has sent a heartbeat recently"""
+    cutoff = timezone.now() - timedelta(seconds=3 * HEARTBEAT_INTERVAL)
+    return Worker.objects.filter(heartbeat_at__gte=cutoff).exists()
+
+
+def prefers_async(request):
+    """
+    True when the client asked for a 202 + job instead of waiting (RFC 7240)
+    and a worker is running to pick the job up; otherwise the view does the
+    work in the request
+    """
+    return 'respond-async' in request.headers.get('Prefer', '') and worker_alive()
+
+
+def enqueue(kind, **params):
+    """
+    Queue a job, or return the matching one that is already queued or running
+    so repeated clicks do not pile up duplicate work
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    for job in Job.objects.filter(kind=kind, status__in=['queued', 'running'], cancel_requested=False):
+        if job.params == params:
+            return job
+
+    return Job.objects.create(kind=kind, params=params, run_after=timezone.now())
+
+
+def cancel(job):
+    """
+    Cancel a queued job outright, or ask a running one to stop at its next
+    progress report. Returns False when the job has already finished.
+    """
+    now = timezone.now()
+    if Job.objects.filter(pk=job.pk, status='queued').update(status='cancelled', cancel_requested=True, finished_at=now):
+        events.publish('job.updated', id=job.pk, kind=job.kind, status='cancelled', params=job.params)
+        return True
+    return bool(Job.objects.filter(pk=job.pk, status='running').update(cancel_requested=True))
+
+
+def claim(worker):
+    """Atomically take the oldest runnable job, or return None"""
+    now = timezone.now()
+    candidates = Job.objects.filter(status='queued', run_after__lte=now).order_by('run_after').values_list('pk', flat=True)[:5]
+    for pk in candidates:
+        # Only one worker's UPDATE can move the row out of 'queued'
+        claimed = Job.objects.filter(pk=pk, status='queued').update(
+            status='running', worker=worker, started_at=now, heartbeat_at=now, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def report_progress(job, progress, message=''):
+    """
+    Record progress from inside a handler. This also acts as the heartbeat and
+    the cancellation point, so handlers should call it between steps.
+    """
+    progress = min(max(int(progress), 0), 100)
+    Job.objects.filter(pk=job.pk).update(progress=progress, progress_message=message[:200], heartbeat_at=timezone.now())
+    events.publish('job.progress', id=job.pk, kind=job.kind, progress=progress, message=message[:200])
+    if Job.objects.filter(pk=job.pk, cancel_requested=True).exists():
+        raise JobCancelled()
+
+
+def _finish(job, **fields):
+    fields.setdefault('finished_at', timezone.now())
+    # Scoped to this worker so a job re-queued as stale is not overwritten
+    if Job.objects.filter(pk=job.pk, status='running', worker=job.worker).update(**fields):
+        metrics.JOBS_FINISHED.inc(kind=job.kind, status=fields['status'])
+        events.publish('job.updated', id=job.pk, kind=job.kind, status=fields['status'], params=job.params)
+
+
+def run(job):
+    """Run a claimed job and record its outcome"""
+    func = HANDLERS.get(job.kind)
+    try:
+        if func is None:
+            raise JobFailed(f"No handler for job kind '{job.kind}'")
+        result = func(job, **job.params)
+    except JobCancelled:
+        logger.info(f"Job {job.pk} ({job.kind}) cancelled")
+        _finish(job, status='cancelled')
+    except JobFailed as e:
+        logger.warning(f"Job {job.pk} ({job.kind}) failed: {str(e)}")
+        _finish(job, status='failed', error=str(e), result=e.result)
+    except Exception as e:
+        logger.error(f"Job {job.pk} ({job.kind}) attempt {job.attempts} failed: {str(e)}", exc_info=True)
+        if job.attempts < job.max_attempts:
+            delay = RETRY_DELAY * 2 ** (job.attempts - 1)
+            _finish(job, status='queued', error=str(e), finished_at=None,
+                    run_after=timezone.now() + timedelta(seconds=delay))
+        else:
+            _finish(job, status='failed', error=str(e))
+    else:
+        _finish(job, status='succeeded', progress=100, result=result, error='')
+    job.refresh_from_db()
+    return job
+
+
+def heartbeat(worker):
+    """
+    Mark the worker and the job it is running as alive. run_jobs calls this
+    from a thread of its own, so a handler stuck in one long LLM or IMAP call
+    is not mistaken for a dead worker.
+    """
+    now = timezone.now()
+    Worker.objects.update_or_create(name=worker, defaults={'heartbeat_at': now})
+    Job.objects.filter(status='running', worker=worker).update(heartbeat_at=now)
+
+
+def requeue_stale(stale_after):
+    """
+    Put running jobs whose worker stopped sending heartbeats back in the
+    queue, or fail them once they have used up their attempts
+    """
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    stale = Job.objects.filter(status='running', heartbeat_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', error='Worker stopped responding', finished_at=timezone.now(),
+    )
+    requeued = stale.update(status='queued', run_after=timezone.now())
+    return requeued, failed
+
+
+def run_pending(worker, limit=None):
+    """Run queued jobs until the queue is empty or `limit` jobs have run"""
+    count = 0
+    while limit is None or count < limit:
+        job = claim(worker)
+        if job is None:
+            break
+        run(job)
+        count += 1
+    return count
+
+
+@handler('check_emails')
+def check_emails(job):
+    report_progress(job, 5, 'Checking inbox')
+    new_proposal_ids = EmailService.check_incoming_emails()
+
+    report_progress(job, 30, f'Found {len(new_proposal_ids)} new email(s), parsing proposals')
+    parsed_count = EmailService.parse_new_proposals(
+        progress=lambda done, total: report_progress(job, 30 + 65 * done // total, f'Parsed {done} of {total} proposal(s)')
+    )
+    return EmailService.inbox_summary(new_proposal_ids, parsed_count)
+
+
+@handler('compare_proposals')
+def compare_proposals(job, rfp_id):
+    rfp = RFP.objects.filter(pk=rfp_id).first()
+    if rfp is None:
+        raise JobFailed(f'RFP {rfp_id} no longer exists')
+
+    inputs = comparisons.comparison_inputs(rfp)
+    if not inputs['parsed_proposals']:
+        body = comparisons.missing_proposals_error(inputs)
+        raise JobFailed(body['message'], result=body)
+
+    report_progress(job, 20, f"Comparing {len(inputs['parsed_proposals'])} proposal(s)")
+    ai_result = AIService.compare_proposals_and_recommend(inputs['proposals_data'], inputs['rfp_data'])
+
+    report_progress(job, 90, 'Saving comparison')
+    return comparisons.save_comparison(rfp, ai_result, inputs)
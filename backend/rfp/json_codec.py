@@ -0,0 +1,60 @@
+"""
+orjson-backed JSON for the REST API, configured in settings.REST_FRAMEWORK.
+
+Serializers hand datetimes over as they are (DATETIME_FORMAT = None) and
+orjson writes them natively in ISO 8601, UTC as "Z" like DRF's own format.
+Anything orjson has no native encoding for (Decimal, lazy translations,
+querysets...) goes through DRF's own encoder, so responses carry the same
+values as with the stock JSONRenderer.
+"""
+import io
+
+import orjson
+from django.http import HttpResponse
+from rest_framework import renderers
+from rest_framework.parsers import JSONParser
+from rest_framework.utils import encoders
+
+_fallback = encoders.JSONEncoder()
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Pretty printing (the browsable API asks for an indent) stays with json
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            return orjson.dumps(data, default=_fallback.default, option=OPTIONS)
+        except TypeError:
+            # Integers beyond 64 bits and other values only json can encode
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+def dumps(data):
+    """
+    Encode like the API responses, for JSON sent outside DRF (async views,
+    server-sent events), so every datetime reaches the client in one format
+    """
+    return ORJSONRenderer().render(data)
+
+
+class JsonResponse(HttpResponse):
+    """django.http.JsonResponse, encoded with dumps()"""
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(dumps(data), **kwargs)
+
+
+class ORJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # Let json have a go: it takes non-UTF-8 charsets and big integers,
+            # and its error message is the one clients already get
+            return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,170 @@
+"""
+RFP items and the prices vendors quote for them, as rows.
+
+The natural-language parser returns an RFP's `items` and the vendor
+response parser returns the vendor's priced `items`. Both are kept as
+RFPItem and ProposalLineItem rows, each quoted line matched to the RFP item
+it prices, so comparing prices per item across vendors is one indexed
+query (item_prices) instead of a pass over every proposal's parsed JSON.
+"""
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min, OuterRef, Q, Subquery
+
+from .models import ProposalLineItem, RFPItem
+
+CENTS = Decimal('0.01')
+# The quantity and price columns have max_digits=12, decimal_places=2
+MAX_AMOUNT = Decimal('9999999999.99')
+_NUMBER = re.compile(r'\d[\d,]*(?:\.\d+)?|\.\d+')
+
+
+def amount(value):
+    """
+    A non-negative Decimal rounded to cents from whatever the model put in a
+    numeric field (20, 1150.5, "$1,150.00", "20 units"), or None
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float, Decimal)):
+        number = str(value)
+    else:
+        match = _NUMBER.search(str(value))
+        if not match:
+            return None
+        number = match.group().replace(',', '')
+    try:
+        result = Decimal(number).quantize(CENTS)
+    except InvalidOperation:
+        return None
+    if not result.is_finite() or result < 0 or result > MAX_AMOUNT:
+        return None
+    return result
+
+
+def normalize(name):
+    """Lowercase words without punctuation or a plural "s", for matching "Laptops" to "laptop" """
+    words = re.findall(r'[a-z0-9]+', str(name).casefold())
+    return ' '.join(word[:-1] if len(word) > 3 and word.endswith('s') and not word.endswith('ss') else word
+                    for word in words)
+
+
+def parsed_items(items):
+    """The entries of a parsed `items` list that are dicts with a name"""
+    if not isinstance(items, list):
+        return []
+    return [item for item in items if isinstance(item, dict) and str(item.get('name') or '').strip()]
+
+
+def requested_items(rfp):
+    """
+    Name and quantity of each item the RFP asks for, to tell the vendor
+    response parser what to price. Uses prefetched `items` when there are any.
+    """
+    return [
+        {'name': item.name, 'quantity': None if item.quantity is None else float(item.quantity)}
+        for item in rfp.items.all()
+    ]
+
+
+def rfp_item_rows(rfp, items):
+    """Unsaved RFPItems for a parsed `items` list"""
+    return [
+        RFPItem(
+            rfp=rfp,
+            position=position,
+            name=str(item['name']).strip()[:200],
+            quantity=amount(item.get('quantity')),
+            specifications=str(item.get('specifications') or ''),
+        )
+        for position, item in enumerate(parsed_items(items))
+    ]
+
+
+def match(name, rfp_items):
+    """The RFP item a quoted line prices: same normalized name, else the longest one contained in it or containing it"""
+    key = normalize(name)
+    if not key:
+        return None
+    candidates = []
+    for rfp_item in rfp_items:
+        item_key = normalize(rfp_item.name)
+        if item_key == key:
+            return rfp_item
+        if item_key and (f' {item_key} ' in f' {key} ' or f' {key} ' in f' {item_key} '):
+            candidates.append((len(item_key), -rfp_item.position, rfp_item))
+    return max(candidates, key=lambda candidate: candidate[:2])[2] if candidates else None
+
+
+def line_item_rows(proposal, items, rfp_items):
+    """
+    Unsaved ProposalLineItems for a parsed `items` list. A missing unit or
+    line total is worked out from the other one and the quantity.
+    """
+    rows = []
+    for position, item in enumerate(parsed_items(items)):
+        name = str(item['name']).strip()[:200]
+        quantity = amount(item.get('quantity'))
+        unit_price = amount(item.get('unit_price'))
+        total_price = amount(item.get('total_price'))
+        if unit_price is None and total_price is not None and quantity:
+            unit_price = amount(total_price / quantity)
+        if total_price is None and unit_price is not None and quantity is not None:
+            total_price = amount(unit_price * quantity)
+        rows.append(ProposalLineItem(
+            proposal=proposal,
+            rfp_item=match(name, rfp_items),
+            position=position,
+            name=name,
+            quantity=quantity,
+            unit_price=unit_price,
+            total_price=total_price,
+        ))
+    return rows
+
+
+def save_rfp_items(rfp, items):
+    """Replace the RFP's items with a parsed `items` list"""
+    rows = rfp_item_rows(rfp, items)
+    with transaction.atomic():
+        RFPItem.objects.filter(rfp=rfp).delete()
+        RFPItem.objects.bulk_create(rows)
+    return rows
+
+
+def save_line_items(proposal, items):
+    """Replace the proposal's priced lines with a parsed `items` list"""
+    rows = line_item_rows(proposal, items, list(RFPItem.objects.filter(rfp_id=proposal.rfp_id)))
+    with transaction.atomic():
+        ProposalLineItem.objects.filter(proposal=proposal).delete()
+        ProposalLineItem.objects.bulk_create(rows)
+    return rows
+
+
+def item_prices(rfp):
+    """
+    Every item of the RFP with the number of vendors who priced it, the
+    lowest, average and highest unit price, and the cheapest vendor.
+    One query, answered from line_item_price_idx.
+    """
+    cheapest = ProposalLineItem.objects.filter(
+        rfp_item=OuterRef('pk'), unit_price__isnull=False,
+    ).order_by('unit_price', 'proposal_id')
+    rows = list(RFPItem.objects.filter(rfp=rfp).annotate(
+        # One proposal per vendor and RFP, so proposals stand in for vendors
+        vendor_count=Count('quotes__proposal', distinct=True, filter=Q(quotes__unit_price__isnull=False)),
+        lowest_unit_price=Min('quotes__unit_price'),
+        average_unit_price=Avg('quotes__unit_price'),
+        highest_unit_price=Max('quotes__unit_price'),
+        cheapest_vendor_id=Subquery(cheapest.values('proposal__vendor_id')[:1]),
+        cheapest_vendor_name=Subquery(cheapest.values('proposal__vendor__name')[:1]),
+    ).order_by('position').values(
+        'id', 'name', 'quantity', 'vendor_count', 'lowest_unit_price', 'average_unit_price',
+        'highest_unit_price', 'cheapest_vendor_id', 'cheapest_vendor_name',
+    ))
+    for row in rows:
+        if row['average_unit_price'] is not None:
+            row['average_unit_price'] = row['average_unit_price'].quantize(CENTS)
+    return rows
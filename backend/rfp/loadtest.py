@@ -0,0 +1,395 @@
+"""
+End-to-end load test, run with `manage.py load_test`.
+
+The whole RFP cycle runs in one process against the real HTTP API:
+
+    driver --HTTP--> Django --SMTP--> SMTPSink --> VendorFleet --> Mailbox
+       ^                                                              |
+       +------ check-emails / proposals / compare <------ IMAP -------+
+
+SMTPSink is a real SMTP server on localhost, so outbound RFPs go through
+Django's SMTP backend unchanged. The fleet answers each captured RFP after
+a think time by dropping a reply in Mailbox, which stands in for the IMAP
+server behind imaplib.IMAP4_SSL. Each driver thread pushes RFP cycles
+through the API one after another and times every stage.
+"""
+import heapq
+import itertools
+import json
+import random
+import socketserver
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from email import message_from_bytes
+from email.utils import parseaddr
+from unittest import mock
+
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.test import override_settings
+
+from . import synthetic_data
+from .ai_services import AIService
+from .benchmarks import vendor_reply
+from .models import Vendor
+
+STAGES = ['create', 'send', 'replies', 'ingest', 'compare', 'cycle']
+POLL_INTERVAL = 0.05
+STAGE_TIMEOUT = 60
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough of RFC 5321 for smtplib: no auth, no TLS, every message accepted"""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.reply('220 rfp-loadtest ESMTP')
+        recipients = []
+        for line in self.rfile:
+            verb = line[:4].decode('ascii', 'replace').upper()
+            if verb == 'EHLO':
+                self.reply('250-rfp-loadtest')
+                self.reply('250 8BITMIME')
+            elif verb == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(parseaddr(line.decode().split(':', 1)[1])[1])
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                self.server.deliver(recipients, self.read_data())
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            elif verb in ('HELO', 'RSET', 'NOOP'):
+                self.reply('250 OK')
+            else:
+                self.reply('502 Command not implemented')
+
+    def read_data(self):
+        lines = []
+        for line in self.rfile:
+            if line.rstrip(b'\r\n') == b'.':
+                break
+            # Undo dot-stuffing
+            lines.append(line[1:] if line.startswith(b'..') else line)
+        return b''.join(lines)
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """SMTP server on localhost that hands every message to `on_message(recipients, raw)`"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, on_message):
+        super().__init__(('127.0.0.1', 0), _SMTPHandler)
+        self.on_message = on_message
+        self.received = 0
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def deliver(self, recipients, raw):
+        with self.lock:
+            self.received += 1
+        self.on_message(recipients, raw)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name='smtp-sink', daemon=True).start()
+        return self
+
+
+class Mailbox:
+    """
+    The shared inbox. imap_class() returns a stand-in for imaplib.IMAP4_SSL
+    whose sessions read it; UNSEEN and \\Seen work as on a real server.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.messages = []
+        self.seen = set()
+
+    def append(self, raw):
+        with self.lock:
+            self.messages.append(raw)
+
+    def count(self, text):
+        with self.lock:
+            return sum(1 for raw in self.messages if text in raw)
+
+    def imap_class(self):
+        mailbox = self
+
+        class IMAPSession:
+            def __init__(self, host, port):
+                pass
+
+            def login(self, user, password):
+                return 'OK', [b'Logged in']
+
+            def select(self, name='INBOX'):
+                with mailbox.lock:
+                    return 'OK', [str(len(mailbox.messages)).encode()]
+
+            def search(self, charset, criterion):
+                with mailbox.lock:
+                    unseen = [i for i in range(1, len(mailbox.messages) + 1) if i not in mailbox.seen]
+                return 'OK', [b' '.join(str(i).encode() for i in unseen)]
+
+            def fetch(self, message_id, parts):
+                with mailbox.lock:
+                    raw = mailbox.messages[int(message_id) - 1]
+                return 'OK', [(message_id + b' (RFC822)', raw), b')']
+
+            def store(self, message_id, command, flags):
+                if '\\Seen' in flags:
+                    with mailbox.lock:
+                        mailbox.seen.add(int(message_id))
+                return 'OK', []
+
+            def close(self):
+                return 'OK', []
+
+            def logout(self):
+                return 'BYE', []
+
+        return IMAPSession
+
+
+class VendorFleet:
+    """Replies to every RFP the sink captures after `reply_delay` seconds (±50%)"""
+
+    def __init__(self, mailbox, reply_delay, seed=0):
+        self.mailbox = mailbox
+        self.reply_delay = reply_delay
+        self.rng = random.Random(seed)
+        self.pending = []
+        self.order = itertools.count()
+        self.condition = threading.Condition()
+        self.replied = 0
+
+    def on_message(self, recipients, raw):
+        subject = message_from_bytes(raw)['Subject']
+        with self.condition:
+            for address in recipients:
+                due = time.monotonic() + self.reply_delay * self.rng.uniform(0.5, 1.5)
+                heapq.heappush(self.pending, (due, next(self.order), address, subject))
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending or self.pending[0][0] > time.monotonic():
+                    self.condition.wait(self.pending[0][0] - time.monotonic() if self.pending else None)
+                _, _, address, subject = heapq.heappop(self.pending)
+            self.mailbox.append(vendor_reply(address.split('@')[0], address, f'Re: {subject}'))
+            self.replied += 1
+
+    def start(self):
+        threading.Thread(target=self.run, name='vendor-fleet', daemon=True).start()
+        return self
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server():
+    server = ThreadedWSGIServer(('127.0.0.1', 0), _QuietHandler, allow_reuse_address=True)
+    server.set_app(get_wsgi_application())
+    threading.Thread(target=server.serve_forever, name='http-server', daemon=True).start()
+    return server
+
+
+class StageFailed(Exception):
+    pass
+
+
+class Driver:
+    """Runs RFP cycles through the HTTP API and records how long each stage takes"""
+
+    def __init__(self, base_url, mailbox):
+        self.base_url = base_url
+        self.mailbox = mailbox
+        self.timings = {stage: [] for stage in STAGES}
+        self.errors = {stage: [] for stage in STAGES}
+        self.lock = threading.Lock()
+        self.cycle_numbers = itertools.count(1)
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(f'{self.base_url}{path}', data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=STAGE_TIMEOUT) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise StageFailed(f'{method} {path} returned {e.code}: {e.read()[:200]!r}')
+
+    def wait_for(self, check, what):
+        deadline = time.monotonic() + STAGE_TIMEOUT
+        while not check():
+            if time.monotonic() > deadline:
+                raise StageFailed(f'Timed out waiting for {what}')
+            time.sleep(POLL_INTERVAL)
+
+    def cycle(self, vendor_ids):
+        number = next(self.cycle_numbers)
+        # Zero-padded so no title is a substring of another one
+        title = f'Load test RFP {number:06d}'
+        stages = {}
+
+        def stage(name, func):
+            started = time.perf_counter()
+            try:
+                result = func()
+            except Exception as e:
+                with self.lock:
+                    self.errors[name].append(str(e))
+                raise StageFailed(name)
+            stages[name] = time.perf_counter() - started
+            return result
+
+        cycle_started = time.perf_counter()
+        try:
+            rfp = stage('create', lambda: self.request('POST', '/api/rfps/', {
+                'title': title,
+                'description': 'Laptops and monitors for the load test',
+                'total_budget': 50000,
+                'requirements': ['16GB RAM', '3 year warranty'],
+            }))
+            stage('send', lambda: self.request('POST', f"/api/rfps/{rfp['id']}/send/", {'vendor_ids': vendor_ids}))
+            stage('replies', lambda: self.wait_for(
+                lambda: self.mailbox.count(title.encode()) >= len(vendor_ids), 'vendor replies'))
+
+            def ingest():
+                self.request('POST', '/api/check-emails/', {})
+                # Another driver's inbox check may have picked our replies up already
+                self.wait_for(lambda: sum(
+                    proposal['is_parsed']
+                    for proposal in self.request('GET', f"/api/proposals/?rfp_id={rfp['id']}&fields=id,is_parsed")
+                ) >= len(vendor_ids), 'parsed proposals')
+
+            stage('ingest', ingest)
+            stage('compare', lambda: self.request('GET', f"/api/rfps/{rfp['id']}/compare/"))
+        except StageFailed:
+            return False
+
+        stages['cycle'] = time.perf_counter() - cycle_started
+        with self.lock:
+            for name, seconds in stages.items():
+                self.timings[name].append(seconds)
+        return True
+
+    def run(self, cycles, vendor_groups):
+        """Each vendor group is one driver thread; a group's cycles run back to back"""
+        remaining = itertools.count(cycles, -1)
+        lock = threading.Lock()
+
+        def worker(vendor_ids):
+            while True:
+                with lock:
+                    if next(remaining) <= 0:
+                        return
+                self.cycle(vendor_ids)
+
+        threads = [threading.Thread(target=worker, args=(group,)) for group in vendor_groups]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+def _percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def summarize(driver, elapsed):
+    completed = len(driver.timings['cycle'])
+    stages = {}
+    for stage in STAGES:
+        values = driver.timings[stage]
+        stages[stage] = {
+            'count': len(values),
+            'p50': statistics.median(values) if values else None,
+            'p95': _percentile(values, 0.95) if values else None,
+            'max': max(values) if values else None,
+            'errors': len(driver.errors[stage]),
+            'first_error': driver.errors[stage][0] if driver.errors[stage] else None,
+        }
+    return {
+        'completed_cycles': completed,
+        'failed_cycles': sum(len(errors) for errors in driver.errors.values()),
+        'elapsed': elapsed,
+        'cycles_per_second': completed / elapsed if elapsed else 0,
+        'stages': stages,
+    }
+
+
+def run(cycles, concurrency, vendors_per_rfp, reply_delay, llm_latency=0, seed=0):
+    """
+    Push `cycles` RFP cycles through the API from `concurrency` drivers, each
+    with its own `vendors_per_rfp` vendors, and return the summary. Needs a
+    disposable database that other threads can open (not in-memory SQLite).
+    """
+    mailbox = Mailbox()
+    fleet = VendorFleet(mailbox, reply_delay, seed).start()
+    sink = SMTPSink(fleet.on_message).start()
+    http = start_http_server()
+
+    synthetic_data.generate(vendors=concurrency * vendors_per_rfp, rfps=0, seed=seed, prefix='load')
+    vendor_ids = list(Vendor.objects.filter(email__startswith='load-').order_by('email').values_list('id', flat=True))
+    # Disjoint vendors per driver, so a reply can only belong to that driver's open RFP
+    groups = [vendor_ids[i * vendors_per_rfp:(i + 1) * vendors_per_rfp] for i in range(concurrency)]
+
+    driver = Driver(f'http://127.0.0.1:{http.server_port}', mailbox)
+    with override_settings(
+        EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend', EMAIL_HOST='127.0.0.1', EMAIL_PORT=sink.port,
+        EMAIL_USE_TLS=False, EMAIL_USE_SSL=False, EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+        DEFAULT_FROM_EMAIL='procurement@example.com', EMAIL_SENDING_ENABLED=True, EMAIL_RECEIVING_ENABLED=True,
+        DEMO_MODE=False, ALLOWED_HOSTS=['127.0.0.1'],
+    ), mock.patch('imaplib.IMAP4_SSL', mailbox.imap_class()), _slow_llm(llm_latency):
+        started = time.perf_counter()
+        try:
+            driver.run(cycles, groups)
+        finally:
+            http.shutdown()
+            sink.shutdown()
+        elapsed = time.perf_counter() - started
+
+    summary = summarize(driver, elapsed)
+    summary['emails_sent'] = sink.received
+    summary['replies'] = fleet.replied
+    return summary
+
+
+@contextmanager
+def _slow_llm(latency):
+    """AIService stays in demo mode; this adds the round trip a real model would take"""
+    if not latency:
+        yield
+        return
+
+    def delayed(func):
+        def wrapper(*args, **kwargs):
+            time.sleep(latency)
+            return func(*args, **kwargs)
+        return staticmethod(wrapper)
+
+    with mock.patch.object(AIService, 'parse_vendor_response', delayed(AIService.parse_vendor_response)), \
+            mock.patch.object(AIService, 'compare_proposals_and_recommend',
+                              delayed(AIService.compare_proposals_and_recommend)):
+        yield
@@ -0,0 +1,132 @@
+"""
+Logging plumbing that keeps log I/O and formatting off the request path.
+
+- QueueHandler puts records on a bounded in-memory queue; one listener
+  thread formats them and writes them to the real handlers. When the queue
+  is full the record is dropped and counted, instead of blocking the caller.
+- RateLimitFilter samples chatty DEBUG call sites (per email, per vendor).
+- Payload wraps request data for logging. It is only rendered, truncated
+  and redacted if a handler actually formats the record, so pass it as a
+  %s argument rather than in an f-string.
+"""
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+
+from django.conf import settings
+
+# Matched against lowercased keys anywhere in a payload
+SENSITIVE_KEYS = ('password', 'secret', 'token', 'api_key', 'apikey', 'authorization', 'cookie')
+REDACTED = '[redacted]'
+PAYLOAD_STRING_CHARS = 200
+PAYLOAD_LIST_ITEMS = 20
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """
+    Configured from LOGGING with the handlers it feeds, e.g.
+    'handlers': ['cfg://handlers.console', 'cfg://handlers.file'].
+    """
+
+    def __init__(self, handlers, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+        # Index access so dictConfig resolves the cfg:// references
+        targets = [handlers[i] for i in range(len(handlers))]
+        self.listener = logging.handlers.QueueListener(self.queue, *targets, respect_handler_level=True)
+        self.listener.start()
+
+    def prepare(self, record):
+        # The stock handler formats here, on the caller's thread, so the record
+        # can be pickled. It never leaves this process, so leave that to the listener.
+        return record
+
+    def close(self):
+        # logging.shutdown() closes handlers newest first, so this drains the
+        # queue before the handlers it feeds are closed
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        super().close()
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            from . import metrics
+            metrics.LOG_RECORDS_DROPPED.inc()
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most `per_second` records through per call site, in bursts of up
+    to `burst`, for records at `level` or below; higher levels always pass.
+    The next record that gets through notes how many were dropped before it.
+    """
+
+    def __init__(self, per_second=10, burst=None, level='DEBUG'):
+        super().__init__()
+        self.per_second = float(per_second)
+        self.burst = burst or max(1, int(self.per_second))
+        self.level = level if isinstance(level, int) else logging.getLevelName(level)
+        self.lock = threading.Lock()
+        # (logger, file, line) -> [tokens, last refill, suppressed]
+        self.sites = {}
+
+    def filter(self, record):
+        if record.levelno > self.level:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self.lock:
+            site = self.sites.get(key)
+            if site is None:
+                site = self.sites[key] = [self.burst, now, 0]
+            site[0] = min(self.burst, site[0] + (now - site[1]) * self.per_second)
+            site[1] = now
+            if site[0] < 1:
+                site[2] += 1
+                return False
+            site[0] -= 1
+            suppressed, site[2] = site[2], 0
+        if suppressed:
+            record.msg = f'{record.msg} [{suppressed} similar suppressed]'
+        return True
+
+
+def _trim(value):
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if any(word in str(key).lower() for word in SENSITIVE_KEYS) else _trim(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        items = [_trim(item) for item in value[:PAYLOAD_LIST_ITEMS]]
+        if len(value) > PAYLOAD_LIST_ITEMS:
+            items.append(f'... {len(value) - PAYLOAD_LIST_ITEMS} more')
+        return items
+    if isinstance(value, str) and len(value) > PAYLOAD_STRING_CHARS:
+        return f'{value[:PAYLOAD_STRING_CHARS]}... ({len(value)} chars)'
+    return value
+
+
+class Payload:
+    """Request data as it should appear in a log line: redacted and size-capped"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __str__(self):
+        try:
+            data = self.data.dict() if hasattr(self.data, 'dict') else self.data
+            text = json.dumps(_trim(data), default=str, ensure_ascii=False)
+        except Exception as e:
+            return f'<unloggable payload: {type(e).__name__}>'
+        limit = getattr(settings, 'LOG_PAYLOAD_MAX_CHARS', 2000)
+        if len(text) > limit:
+            text = f'{text[:limit]}... ({len(text)} chars)'
+        return text
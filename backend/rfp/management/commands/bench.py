@@ -0,0 +1,66 @@
+import json
+import logging
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from rfp import benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Run the performance benchmarks on a throwaway database and compare them with the stored baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default=','.join(str(size) for size in benchmarks.DEFAULT_SIZES),
+                            help='Comma-separated row counts for the list endpoint cases')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per case; the median is reported')
+        parser.add_argument('--baseline', default=str(Path(settings.BASE_DIR) / '.benchmarks' / 'baseline.json'))
+        parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Flag cases this much slower than the baseline (0.25 = 25%%)')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        baseline_path = Path(options['baseline'])
+        baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else None
+
+        # Benchmarks measure the code, not console logging of every email
+        logging.disable(logging.INFO)
+        setup_test_environment()
+        databases = setup_databases(verbosity=0, interactive=False)
+        try:
+            results = benchmarks.run(sizes, options['repeat'], report=lambda name, result: self.report(name, result, baseline))
+        finally:
+            teardown_databases(databases, verbosity=0)
+            teardown_test_environment()
+            logging.disable(logging.NOTSET)
+
+        if options['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(benchmarks.baseline_document(results), indent=2))
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {baseline_path}"))
+            return
+
+        if baseline is None:
+            self.stdout.write(f"No baseline at {baseline_path}; run with --save-baseline to store one")
+            return
+
+        slower = benchmarks.regressions(results, baseline, options['threshold'])
+        if slower:
+            for name, previous, current in slower:
+                self.stdout.write(self.style.ERROR(
+                    f"REGRESSION {name}: {previous * 1000:.1f} ms -> {current * 1000:.1f} ms "
+                    f"({current / previous - 1:+.0%})"
+                ))
+            raise CommandError(f"{len(slower)} benchmark(s) regressed by more than {options['threshold']:.0%}")
+        self.stdout.write(self.style.SUCCESS(f"No regressions beyond {options['threshold']:.0%}"))
+
+    def report(self, name, result, baseline):
+        line = (f"{name:<36} {result['seconds'] * 1000:>10.1f} ms "
+                f"{result['rows'] / result['seconds']:>12,.0f} rows/s")
+        previous = (baseline or {}).get('results', {}).get(name)
+        if previous:
+            line += f"  ({result['seconds'] / previous['seconds'] - 1:+.0%} vs baseline)"
+        self.stdout.write(line)
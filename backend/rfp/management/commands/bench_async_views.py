@@ -0,0 +1,101 @@
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+
+import openai
+from django.core.management.base import BaseCommand
+from django.test import AsyncRequestFactory, RequestFactory
+
+from rfp import async_views, views
+from rfp.ai_services import AIService
+
+PROMPT = 'Need 20 laptops with 16GB RAM and 15 monitors, budget $50,000, delivery in 30 days'
+RFP_JSON = json.dumps({
+    'title': 'Laptops and monitors',
+    'description': PROMPT,
+    'total_budget': 50000,
+    'delivery_days': 30,
+    'requirements': ['16GB RAM'],
+    'items': [],
+})
+
+
+def _completion():
+    message = SimpleNamespace(content=RFP_JSON)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class Command(BaseCommand):
+    help = 'Compare sync worker threads with the async views while OpenAI calls are slow'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--workers', type=int, default=8,
+                            help='Sync worker threads, like gunicorn --threads')
+        parser.add_argument('--latency', type=float, default=0.5,
+                            help='Simulated OpenAI latency in seconds')
+
+    def handle(self, *args, **options):
+        latency = options['latency']
+
+        def create(**kwargs):
+            time.sleep(latency)
+            return _completion()
+
+        async def acreate(**kwargs):
+            await asyncio.sleep(latency)
+            return _completion()
+
+        body = json.dumps({'text': PROMPT})
+        with mock.patch.object(AIService, 'DEMO_MODE', False), \
+                mock.patch.object(openai.ChatCompletion, 'create', side_effect=create), \
+                mock.patch.object(openai.ChatCompletion, 'acreate', side_effect=acreate):
+            self.report('sync', *self.run_sync(body, options['requests'], options['workers']))
+            self.report('async', *self.run_async(body, options['requests']))
+
+    def run_sync(self, body, total, workers):
+        view = views.ParseNaturalLanguageView.as_view()
+        factory = RequestFactory()
+
+        # Latency counts from the moment every request was submitted, so time
+        # spent queued behind busy workers shows up in p50/p95
+        def call(_):
+            request = factory.post('/api/parse-natural-language/', body, content_type='application/json')
+            response = view(request)
+            response.render()
+            assert response.status_code == 200, response.content
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            latencies = list(pool.map(call, range(total)))
+        return latencies, time.perf_counter() - started
+
+    def run_async(self, body, total):
+        factory = AsyncRequestFactory()
+
+        async def call():
+            request = factory.post('/api/parse-natural-language/', body, content_type='application/json')
+            response = await async_views.parse_natural_language(request)
+            assert response.status_code == 200, response.content
+            return time.perf_counter() - started
+
+        async def run():
+            return await asyncio.gather(*(call() for _ in range(total)))
+
+        started = time.perf_counter()
+        latencies = asyncio.run(run())
+        return latencies, time.perf_counter() - started
+
+    def report(self, label, latencies, elapsed):
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(
+            f"{label:>5}: {len(latencies)} requests in {elapsed:.2f}s "
+            f"({len(latencies) / elapsed:.1f} req/s), "
+            f"p50 {statistics.median(latencies) * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms"
+        )
@@ -0,0 +1,83 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+from django.test import Client
+
+from rfp.models import Vendor
+
+LIST_URLS = ['/api/vendors/', '/api/rfps/', '/api/proposals/', '/api/debug/status/']
+BENCH_DOMAIN = 'bench.invalid'
+
+
+class Command(BaseCommand):
+    help = 'Measure write throughput while the list endpoints are being hammered'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        lock = threading.Lock()
+        counts = {'reads': 0, 'read_errors': 0, 'writes': 0, 'locked': 0}
+        run_id = uuid.uuid4().hex[:8]
+
+        def bump(key):
+            with lock:
+                counts[key] += 1
+
+        def reader():
+            client = Client(SERVER_NAME='localhost')
+            try:
+                while not stop.is_set():
+                    for url in LIST_URLS:
+                        response = client.get(url)
+                        bump('reads' if response.status_code == 200 else 'read_errors')
+            finally:
+                connections.close_all()
+
+        def writer(number):
+            sequence = 0
+            try:
+                while not stop.is_set():
+                    sequence += 1
+                    try:
+                        Vendor.objects.create(
+                            name=f"Bench vendor {number}-{sequence}",
+                            email=f"{run_id}-{number}-{sequence}@{BENCH_DOMAIN}",
+                        )
+                        bump('writes')
+                    except OperationalError as e:
+                        if 'locked' not in str(e):
+                            raise
+                        bump('locked')
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=reader) for _ in range(options['readers'])]
+        threads += [threading.Thread(target=writer, args=(n,)) for n in range(options['writers'])]
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        Vendor.objects.filter(email__startswith=f"{run_id}-", email__endswith=f"@{BENCH_DOMAIN}").delete()
+
+        self.stdout.write(f"profile={settings.DB_PROFILE} journal_mode={journal_mode} "
+                          f"readers={options['readers']} writers={options['writers']} seconds={elapsed:.1f}")
+        self.stdout.write(f"  reads/s:  {counts['reads'] / elapsed:8.1f}  (errors: {counts['read_errors']})")
+        self.stdout.write(f"  writes/s: {counts['writes'] / elapsed:8.1f}  (database is locked: {counts['locked']})")
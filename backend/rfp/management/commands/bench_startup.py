@@ -0,0 +1,103 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What each kind of process imports before doing any work
+SCENARIOS = {
+    'web': "from django.core.wsgi import get_wsgi_application; get_wsgi_application(); "
+           "import importlib; from django.conf import settings; importlib.import_module(settings.ROOT_URLCONF)",
+    'command': "import django; django.setup(); "
+               "from django.core.management import load_command_class; load_command_class('rfp', 'run_jobs')",
+    'worker': "import django; django.setup(); import rfp.jobs, rfp.inbox_daemon",
+    'test': "import django; django.setup(); import rfp.tests",
+}
+
+# Import time budgets in milliseconds, with headroom for a noisy machine
+BUDGETS_MS = {
+    'web': 600,
+    'command': 550,
+    'worker': 550,
+    'test': 600,
+}
+
+# Timings vary from run to run; the number of modules imported does not, so
+# a new eager dependency shows up here even when the clock can't tell
+MODULE_BUDGETS = {
+    'web': 850,
+    'command': 800,
+    'worker': 800,
+    'test': 850,
+}
+
+# Loaded on first use; importing any of these at startup is a regression
+LAZY_MODULES = ['openai', 'aiohttp', 'smtplib', 'imaplib']
+
+
+def import_times(code):
+    """
+    Run `code` in a fresh interpreter with -X importtime and return
+    {module: (self µs, cumulative µs)} for every module it imported
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise CommandError(f"Startup scenario failed:\n{result.stderr[-2000:]}")
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        # "import time:       500 |      63040 |           requests"
+        head, cumulative_us, name = line.split('|')
+        times[name.strip()] = (int(head.split(':')[1]), int(cumulative_us))
+    return times
+
+
+def total_ms(times):
+    return sum(self_us for self_us, _ in times.values()) / 1000
+
+
+class Command(BaseCommand):
+    help = 'Measure cold-start import time with -X importtime and fail when a process goes over its budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Runs per scenario; the fastest is reported')
+        parser.add_argument('--top', type=int, default=8, help='Show the packages that took longest to import')
+        parser.add_argument('--budget-scale', type=float, default=1.0,
+                            help='Multiply every budget, e.g. 2 on a slow CI machine')
+
+    def handle(self, *args, **options):
+        failures = []
+        for scenario, code in SCENARIOS.items():
+            # The fastest run is the one least disturbed by the rest of the machine
+            times = min((import_times(code) for _ in range(options['runs'])), key=total_ms)
+            elapsed = total_ms(times)
+            budget = BUDGETS_MS[scenario] * options['budget_scale']
+
+            line = (f"{scenario:<8} {elapsed:>7.1f} ms (budget {budget:.0f})  "
+                    f"{len(times):>5} modules (budget {MODULE_BUDGETS[scenario]})")
+            within = elapsed <= budget and len(times) <= MODULE_BUDGETS[scenario]
+            self.stdout.write(self.style.SUCCESS(line) if within else self.style.ERROR(line))
+            if elapsed > budget:
+                failures.append(f"{scenario} took {elapsed:.0f} ms, over its {budget:.0f} ms budget")
+            if len(times) > MODULE_BUDGETS[scenario]:
+                failures.append(f"{scenario} imported {len(times)} modules, over its budget of {MODULE_BUDGETS[scenario]}")
+
+            by_package = defaultdict(int)
+            for name, (self_us, _) in times.items():
+                by_package[name.split('.')[0]] += self_us
+            for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:options['top']]:
+                self.stdout.write(f"    {package:<24} {self_us / 1000:>7.1f} ms")
+
+            eager = [name for name in LAZY_MODULES if name in times]
+            if eager:
+                failures.append(f"{scenario} imports {', '.join(eager)} at startup")
+
+        if failures:
+            raise CommandError('; '.join(failures))
+        self.stdout.write(self.style.SUCCESS('All startup scenarios are within budget'))
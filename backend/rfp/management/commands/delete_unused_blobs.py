@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from rfp.models import Blob
+
+
+class Command(BaseCommand):
+    help = 'Delete stored email texts that no proposal or send log refers to any more'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=float, default=60,
+                            help='Keep blobs younger than this many minutes, which a save may be about to use')
+
+    def handle(self, *args, **options):
+        deleted = Blob.delete_unreferenced(timezone.now() - timedelta(minutes=options['min_age']))
+        self.stdout.write(f"Deleted {deleted} unused blob(s)")
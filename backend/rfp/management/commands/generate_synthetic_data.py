@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rfp import search, synthetic_data
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create reproducible synthetic vendors, RFPs and proposals for benchmarks and profiling'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendors', type=int, default=10000)
+        parser.add_argument('--rfps', type=int, default=10000)
+        parser.add_argument('--invites-per-rfp', type=int, default=8,
+                            help='Average number of vendors each sent RFP goes to')
+        parser.add_argument('--reply-rate', type=float, default=0.6,
+                            help='Share of invited vendors that send a proposal')
+        parser.add_argument('--parsed-rate', type=float, default=0.9,
+                            help='Share of proposals already parsed; the rest are left for parse_new_proposals')
+        parser.add_argument('--seed', type=int, default=0, help='Same seed and sizes, same rows')
+        parser.add_argument('--prefix', default='synthetic',
+                            help='Vendor email prefix; runs with the same prefix add to earlier ones')
+        parser.add_argument('--index', action='store_true',
+                            help='Rebuild the full-text search index afterwards (bulk inserts skip it)')
+
+    def handle(self, *args, **options):
+        for option in ('reply_rate', 'parsed_rate'):
+            if not 0 <= options[option] <= 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be between 0 and 1")
+
+        started = time.perf_counter()
+
+        def progress(done, counts):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"{done:,}/{options['rfps']:,} RFPs - {synthetic_data.describe(counts, elapsed)}")
+
+        counts = synthetic_data.generate(
+            vendors=options['vendors'],
+            rfps=options['rfps'],
+            invites_per_rfp=options['invites_per_rfp'],
+            reply_rate=options['reply_rate'],
+            parsed_rate=options['parsed_rate'],
+            seed=options['seed'],
+            prefix=options['prefix'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {synthetic_data.describe(counts, time.perf_counter() - started)}"
+        ))
+
+        if options['index']:
+            if not search.enabled():
+                raise CommandError('Full-text search requires SQLite with FTS5')
+            self.stdout.write(f"Indexed {search.rebuild()} documents")
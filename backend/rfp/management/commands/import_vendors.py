@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rfp.vendor_import import FILE_TYPES, file_type_for, import_vendors
+
+
+class Command(BaseCommand):
+    help = 'Stream a CSV or JSONL file of vendors into the database, upserting on email'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--file-type', choices=FILE_TYPES, help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--errors', help='Write the per-row error report to this JSON file')
+
+    def handle(self, *args, **options):
+        file_type = options['file_type'] or file_type_for(options['path'])
+        if not file_type:
+            raise CommandError('Cannot tell the file type from the extension; pass --file-type')
+
+        try:
+            with open(options['path'], 'rb') as f:
+                report = import_vendors(f, file_type, chunk_size=options['chunk_size'])
+        except OSError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"Rows: {report['rows']}  imported: {report['imported']}  failed: {report['failed']}")
+        if options['errors'] and report['errors']:
+            with open(options['errors'], 'w') as f:
+                json.dump(report['errors'], f, indent=2)
+            self.stdout.write(f"Error report written to {options['errors']}")
+        elif report['errors']:
+            for error in report['errors'][:20]:
+                self.stdout.write(self.style.WARNING(f"line {error['line']}: {json.dumps(error['errors'])}"))
@@ -0,0 +1,62 @@
+import logging
+import tempfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from rfp import loadtest
+
+
+class Command(BaseCommand):
+    help = ('Run concurrent RFP cycles through the HTTP API against a local SMTP sink and IMAP stand-in, '
+            'on a throwaway database, and report throughput and per-stage latency')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cycles', type=int, default=20, help='RFP cycles to run in total')
+        parser.add_argument('--concurrency', type=int, default=4, help='Cycles in flight at once')
+        parser.add_argument('--vendors-per-rfp', type=int, default=5)
+        parser.add_argument('--reply-delay', type=float, default=0.2,
+                            help='Mean seconds a vendor takes to answer an RFP')
+        parser.add_argument('--llm-latency', type=float, default=0,
+                            help='Seconds added to every parse and comparison call')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        # Server threads need their own connections, which in-memory SQLite can't share
+        workdir = tempfile.TemporaryDirectory()
+        for alias in connections:
+            connections[alias].settings_dict.setdefault('TEST', {})['NAME'] = str(Path(workdir.name) / f'{alias}.sqlite3')
+
+        logging.disable(logging.INFO)
+        setup_test_environment()
+        databases = setup_databases(verbosity=0, interactive=False)
+        try:
+            summary = loadtest.run(options['cycles'], options['concurrency'], options['vendors_per_rfp'],
+                                   options['reply_delay'], options['llm_latency'], options['seed'])
+        finally:
+            connections.close_all()
+            teardown_databases(databases, verbosity=0)
+            teardown_test_environment()
+            logging.disable(logging.NOTSET)
+            workdir.cleanup()
+
+        self.stdout.write(
+            f"{summary['completed_cycles']} cycles in {summary['elapsed']:.1f}s "
+            f"({summary['cycles_per_second']:.2f} cycles/s, "
+            f"{summary['completed_cycles'] * options['vendors_per_rfp'] / summary['elapsed']:.1f} proposals/s); "
+            f"{summary['emails_sent']} RFP emails, {summary['replies']} replies"
+        )
+        self.stdout.write(f"{'stage':<10} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10} {'errors':>8}")
+        for stage, result in summary['stages'].items():
+            if result['count']:
+                self.stdout.write(f"{stage:<10} {result['p50'] * 1000:>10.1f} {result['p95'] * 1000:>10.1f} "
+                                  f"{result['max'] * 1000:>10.1f} {result['errors']:>8}")
+            else:
+                self.stdout.write(f"{stage:<10} {'-':>10} {'-':>10} {'-':>10} {result['errors']:>8}")
+            if result['first_error']:
+                self.stdout.write(self.style.ERROR(f"  first {stage} error: {result['first_error']}"))
+
+        if summary['failed_cycles']:
+            raise CommandError(f"{summary['failed_cycles']} of {options['cycles']} cycles failed")
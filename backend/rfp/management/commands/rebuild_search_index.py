@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from rfp import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index from every RFP and proposal'
+
+    def handle(self, *args, **options):
+        if not search.enabled():
+            raise CommandError('Full-text search requires SQLite with FTS5')
+        count = search.rebuild()
+        self.stdout.write(f"Indexed {count} documents")
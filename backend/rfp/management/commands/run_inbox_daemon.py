@@ -0,0 +1,77 @@
+import logging
+import signal
+import tempfile
+import threading
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from rfp import metrics
+from rfp.email_services import EmailService
+from rfp.inbox_daemon import AlreadyRunning, InboxSchedule, InstanceLock, MAX_INTERVAL, MIN_INTERVAL, IDLE_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Check the inbox and parse new proposals on a schedule that follows open RFP deadlines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run a single check and exit')
+        parser.add_argument('--min-interval', type=float, default=MIN_INTERVAL)
+        parser.add_argument('--max-interval', type=float, default=MAX_INTERVAL)
+        parser.add_argument('--idle-interval', type=float, default=IDLE_INTERVAL,
+                            help='Interval while no RFP is waiting for replies')
+        parser.add_argument('--lock-file', default=str(Path(tempfile.gettempdir()) / 'rfp-inbox-daemon.lock'))
+        parser.add_argument('--metrics-port', type=int, help='Serve Prometheus metrics for this process on this port')
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+
+        def request_stop(signum, frame):
+            # Finish the current check, then exit
+            self.stdout.write(f"Received signal {signum}, stopping")
+            stop.set()
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+
+        schedule = InboxSchedule(
+            min_interval=options['min_interval'],
+            max_interval=options['max_interval'],
+            idle_interval=options['idle_interval'],
+        )
+
+        try:
+            with InstanceLock(options['lock_file']):
+                self.stdout.write(f"Inbox daemon started (lock {options['lock_file']})")
+                if options['metrics_port']:
+                    metrics.serve(options['metrics_port'])
+                while not stop.is_set():
+                    new_emails = self.check_inbox()
+                    schedule.record_poll(new_emails)
+                    if options['once']:
+                        break
+
+                    interval = schedule.next_interval()
+                    self.stdout.write(f"Next check in {interval:.0f}s")
+                    stop.wait(interval)
+        except AlreadyRunning as e:
+            raise CommandError(str(e))
+
+        self.stdout.write("Inbox daemon stopped")
+
+    def check_inbox(self):
+        close_old_connections()
+        try:
+            new_proposal_ids = EmailService.check_incoming_emails()
+            parsed_count = EmailService.parse_new_proposals()
+        except Exception as e:
+            # Keep the daemon alive; an error counts as an empty poll and backs off
+            logger.error(f"Inbox check failed: {str(e)}", exc_info=True)
+            self.stdout.write(self.style.ERROR(f"Inbox check failed: {str(e)}"))
+            return 0
+
+        self.stdout.write(f"Found {len(new_proposal_ids)} new email(s), parsed {parsed_count} proposal(s)")
+        return len(new_proposal_ids)
@@ -0,0 +1,77 @@
+import os
+import signal
+import socket
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from rfp import jobs, metrics
+from rfp.models import Worker
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (check emails, compare proposals) until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--stale-after', type=float, default=300,
+                            help='Re-queue running jobs without a heartbeat for this many seconds')
+        parser.add_argument('--metrics-port', type=int, help='Serve Prometheus metrics for this process on this port')
+
+    def handle(self, *args, **options):
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        stop = threading.Event()
+
+        def request_stop(signum, frame):
+            # Let the current job finish, then exit
+            self.stdout.write(f"Received signal {signum}, stopping after the current job")
+            stop.set()
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+
+        if options['metrics_port']:
+            metrics.serve(options['metrics_port'])
+
+        exited = threading.Event()
+
+        def send_heartbeats():
+            # Runs beside the job loop, so heartbeats continue while a handler blocks
+            while True:
+                try:
+                    jobs.heartbeat(worker)
+                except Exception as e:
+                    self.stderr.write(f"Heartbeat failed: {e}")
+                if exited.wait(jobs.HEARTBEAT_INTERVAL):
+                    break
+            connection.close()
+
+        heartbeats = threading.Thread(target=send_heartbeats, name='heartbeat', daemon=True)
+        heartbeats.start()
+        self.stdout.write(f"Worker {worker} started")
+        processed = 0
+        while not stop.is_set():
+            close_old_connections()
+            requeued, failed = jobs.requeue_stale(options['stale_after'])
+            if requeued or failed:
+                self.stdout.write(self.style.WARNING(f"Re-queued {requeued} and failed {failed} stale job(s)"))
+
+            job = jobs.claim(worker)
+            if job is None:
+                if options['burst']:
+                    break
+                stop.wait(options['poll_interval'])
+                continue
+
+            self.stdout.write(f"Running {job.kind} #{job.pk} (attempt {job.attempts}/{job.max_attempts})")
+            job = jobs.run(job)
+            processed += 1
+            self.stdout.write(f"{job.kind} #{job.pk} {job.status}")
+
+        exited.set()
+        heartbeats.join()
+        Worker.objects.filter(name=worker).delete()
+        self.stdout.write(f"Worker {worker} stopped after {processed} job(s)")
@@ -0,0 +1,283 @@
+"""
+In-process metrics exposed in the Prometheus text format at /metrics.
+
+Counters and histograms aggregate in memory, each behind its own lock, so
+recording a sample costs a dict lookup and a few additions and needs no
+collector or network. Gauges for queue depths are read from the database
+when /metrics is scraped. Every process keeps its own numbers: the web
+server serves them at /metrics, and `run_jobs` / `run_inbox_daemon` serve
+theirs with --metrics-port.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.models import Count
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+REGISTRY = []
+
+# Seconds; sized for a local view, a remote mail server and an LLM round trip
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+MAIL_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        try:
+            return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError as e:
+            raise ValueError(f"{self.name} needs label {e}")
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self.samples())
+        return lines
+
+    def samples(self):
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self.values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self.lock:
+            values = sorted(self.values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}' for key, value in values]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=HTTP_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last), sum, count]
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels):
+        state = self.values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def samples(self):
+        with self.lock:
+            values = sorted((key, (list(state[0]), state[1], state[2])) for key, state in self.values.items())
+        lines = []
+        for key, (bucket_counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), bucket_counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Gauge(Metric):
+    """
+    A gauge computed at scrape time. `collect` returns {label values tuple:
+    value}; if it raises, the gauge is left out of that scrape.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), collect=None):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def samples(self):
+        try:
+            values = self.collect()
+        except Exception as e:
+            logger.warning(f"Could not collect {self.name}: {str(e)}")
+            return []
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                for key, value in sorted(values.items())]
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def _job_depths():
+    from .models import Job
+    depths = {('queued',): 0, ('running',): 0}
+    rows = Job.objects.filter(status__in=['queued', 'running']).values('status').annotate(count=Count('id'))
+    for row in rows:
+        depths[(row['status'],)] = row['count']
+    return depths
+
+
+def _unparsed_proposals():
+    from .models import Proposal
+    return {(): Proposal.objects.filter(is_parsed=False).count()}
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'rfp_http_request_duration_seconds', 'Time to produce a response, by view',
+    ['view', 'method', 'status'], buckets=HTTP_BUCKETS,
+)
+LLM_REQUEST_SECONDS = Histogram(
+    'rfp_llm_request_duration_seconds', 'OpenAI chat completion latency by AIService method',
+    ['method'], buckets=LLM_BUCKETS,
+)
+LLM_TOKENS = Counter('rfp_llm_tokens_total', 'Tokens used by AIService method', ['method', 'type'])
+LLM_ERRORS = Counter('rfp_llm_errors_total', 'Failed or unparseable LLM calls by AIService method', ['method'])
+SMTP_SEND_SECONDS = Histogram(
+    'rfp_smtp_send_duration_seconds', 'Time to hand one message to the SMTP server', buckets=MAIL_BUCKETS,
+)
+SMTP_SENDS = Counter('rfp_smtp_sends_total', 'Outgoing emails by outcome (sent, demo_sent, failed)', ['outcome'])
+IMAP_FETCH_SECONDS = Histogram(
+    'rfp_imap_fetch_duration_seconds', 'Time to fetch one message over IMAP', buckets=MAIL_BUCKETS,
+)
+IMAP_FETCHES = Counter('rfp_imap_fetches_total', 'IMAP message fetches by outcome (ok, failed)', ['outcome'])
+IMAP_POLLS = Counter('rfp_imap_polls_total', 'Inbox checks by outcome (ok, failed)', ['outcome'])
+PROPOSALS_INGESTED = Counter('rfp_proposals_ingested_total', 'Proposals created from vendor replies', ['source'])
+PROPOSALS_PARSED = Counter('rfp_proposals_parsed_total', 'Proposal parsing attempts by outcome', ['outcome'])
+JOBS_FINISHED = Counter('rfp_jobs_finished_total', 'Background job attempts by kind and resulting status', ['kind', 'status'])
+LOG_RECORDS_DROPPED = Counter('rfp_log_records_dropped_total', 'Log records dropped because the log queue was full')
+JOB_QUEUE_DEPTH = Gauge('rfp_job_queue_depth', 'Background jobs waiting or running', ['status'], collect=_job_depths)
+UNPARSED_PROPOSALS = Gauge('rfp_unparsed_proposals', 'Proposals waiting to be parsed', collect=_unparsed_proposals)
+
+
+@contextmanager
+def llm_call(method):
+    """Times an LLM call and counts it as an error if the block raises"""
+    try:
+        with LLM_REQUEST_SECONDS.time(method=method):
+            yield
+    except Exception:
+        LLM_ERRORS.inc(method=method)
+        raise
+
+
+class MetricsMiddleware:
+    """Records the latency of every request, labelled by URL name rather than path"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, started)
+        return response
+
+    def record(self, request, response, started):
+        # Streaming responses (the SSE feed, exports) are timed to their first byte
+        match = getattr(request, 'resolver_match', None)
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            view=(match.view_name if match else 'unmatched') or 'unnamed',
+            method=request.method,
+            status=response.status_code,
+        )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        try:
+            body = render().encode()
+        finally:
+            connections.close_all()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port, addr=''):
+    """Serve /metrics for a management command from a daemon thread"""
+    server = ThreadingHTTPServer((addr, port), _Handler)
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    logger.info(f"Serving metrics on {addr or '0.0.0.0'}:{server.server_port}")
+    return server
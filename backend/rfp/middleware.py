@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.http import FileResponse
+from django.middleware import gzip
+
+from .db_routers import use_read_database
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReadDatabaseMiddleware:
+    """
+    Routes the queries of views marked ``read_database = True`` to the read
+    connection for safe HTTP methods
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            use_read_database.set(False)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'view_class', view_func)
+        if request.method in SAFE_METHODS and getattr(view, 'read_database', False):
+            use_read_database.set(True)
+        return None
+
+
+class GZipMiddleware(gzip.GZipMiddleware):
+    """
+    Django's GZipMiddleware for API responses of at least GZIP_MIN_LENGTH
+    bytes. Server-sent events are left alone, since compression would hold
+    events back in the buffer, and so are files, which collectstatic has
+    already compressed.
+    """
+    def process_response(self, request, response):
+        if response.get('Content-Type', '').startswith('text/event-stream') or isinstance(response, FileResponse):
+            return response
+        if not response.streaming and len(response.content) < settings.GZIP_MIN_LENGTH:
+            return response
+        return super().process_response(request, response)
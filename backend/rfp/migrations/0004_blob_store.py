@@ -0,0 +1,131 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:04
+
+import hashlib
+import zlib
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BATCH_SIZE = 500
+
+
+def _batches(queryset):
+    """The rows in id order, one list of BATCH_SIZE at a time, so no table is loaded whole"""
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_id).order_by('pk')[:BATCH_SIZE])
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1].pk
+
+
+def _blob_for(Blob, blobs, text):
+    raw = (text or '').encode('utf-8')
+    digest = hashlib.sha256(raw).hexdigest()
+    if digest not in blobs:
+        blobs[digest] = Blob(digest=digest, data=zlib.compress(raw, 6), size=len(raw))
+    return blobs[digest]
+
+
+def move_texts_to_blobs(apps, schema_editor):
+    Blob = apps.get_model('rfp', 'Blob')
+    Proposal = apps.get_model('rfp', 'Proposal')
+    RFPSendLog = apps.get_model('rfp', 'RFPSendLog')
+
+    for proposals in _batches(Proposal.objects.only('id', 'email_body', 'raw_response')):
+        blobs = {}
+        for proposal in proposals:
+            proposal.email_body_blob = _blob_for(Blob, blobs, proposal.email_body)
+            proposal.raw_response_blob = _blob_for(Blob, blobs, proposal.raw_response)
+        Blob.objects.bulk_create(blobs.values(), ignore_conflicts=True)
+        Proposal.objects.bulk_update(proposals, ['email_body_blob', 'raw_response_blob'])
+
+    for send_logs in _batches(RFPSendLog.objects.only('id', 'email_body')):
+        blobs = {}
+        for send_log in send_logs:
+            send_log.email_body_blob = _blob_for(Blob, blobs, send_log.email_body)
+        Blob.objects.bulk_create(blobs.values(), ignore_conflicts=True)
+        RFPSendLog.objects.bulk_update(send_logs, ['email_body_blob'])
+
+
+def move_blobs_to_texts(apps, schema_editor):
+    Proposal = apps.get_model('rfp', 'Proposal')
+    RFPSendLog = apps.get_model('rfp', 'RFPSendLog')
+
+    def text(blob):
+        return zlib.decompress(bytes(blob.data)).decode('utf-8') if blob else ''
+
+    for proposals in _batches(Proposal.objects.select_related('email_body_blob', 'raw_response_blob')):
+        for proposal in proposals:
+            proposal.email_body = text(proposal.email_body_blob)
+            proposal.raw_response = text(proposal.raw_response_blob)
+        Proposal.objects.bulk_update(proposals, ['email_body', 'raw_response'])
+
+    for send_logs in _batches(RFPSendLog.objects.select_related('email_body_blob')):
+        for send_log in send_logs:
+            send_log.email_body = text(send_log.email_body_blob)
+        RFPSendLog.objects.bulk_update(send_logs, ['email_body'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfp', '0003_alter_comparison_rfp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='proposal',
+            name='email_body_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='rfp.blob'),
+        ),
+        migrations.AddField(
+            model_name='proposal',
+            name='raw_response_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='rfp.blob'),
+        ),
+        migrations.AddField(
+            model_name='rfpsendlog',
+            name='email_body_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='rfp.blob'),
+        ),
+        migrations.AlterField(
+            model_name='proposal',
+            name='email_body',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='proposal',
+            name='raw_response',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='rfpsendlog',
+            name='email_body',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RunPython(move_texts_to_blobs, move_blobs_to_texts),
+        migrations.RemoveField(
+            model_name='proposal',
+            name='email_body',
+        ),
+        migrations.RemoveField(
+            model_name='proposal',
+            name='raw_response',
+        ),
+        migrations.RemoveField(
+            model_name='rfpsendlog',
+            name='email_body',
+        ),
+    ]
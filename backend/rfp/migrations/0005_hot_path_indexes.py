@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfp', '0004_blob_store'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='proposal',
+            index=models.Index(fields=['-compliance_score', 'total_price'], name='proposal_ranking_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proposal',
+            index=models.Index(fields=['rfp', 'is_parsed'], name='proposal_rfp_parsed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proposal',
+            index=models.Index(condition=models.Q(('is_parsed', False)), fields=['-compliance_score', 'total_price'], name='proposal_unparsed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rfp',
+            index=models.Index(fields=['-created_at'], name='rfp_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rfp',
+            index=models.Index(fields=['status', '-created_at'], name='rfp_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rfpsendlog',
+            index=models.Index(fields=['vendor', 'rfp'], name='sendlog_vendor_rfp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['name'], name='vendor_name_idx'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+import zlib
+
+from django.db import migrations
+
+CREATE_INDEX = """
+CREATE VIRTUAL TABLE IF NOT EXISTS rfp_search USING fts5(
+    kind UNINDEXED,
+    object_id UNINDEXED,
+    rfp_id UNINDEXED,
+    title,
+    body,
+    tokenize = 'porter unicode61'
+)
+"""
+# ORDER BY rank uses bm25 weighted per column: kind, object_id, rfp_id, title, body
+CONFIGURE_RANK = "INSERT INTO rfp_search (rfp_search, rank) VALUES ('rank', 'bm25(0.0, 0.0, 0.0, 5.0, 1.0)')"
+INSERT = 'INSERT INTO rfp_search (rowid, kind, object_id, rfp_id, title, body) VALUES (%s, %s, %s, %s, %s, %s)'
+
+
+BATCH_SIZE = 500
+
+
+def _batches(queryset):
+    """The rows in id order, one list of BATCH_SIZE at a time, so no table is loaded whole"""
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_id).order_by('pk')[:BATCH_SIZE])
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1].pk
+
+
+def _rfp_row(rfp):
+    requirements = rfp.requirements if isinstance(rfp.requirements, list) else []
+    body = '\n'.join([rfp.description or ''] + [str(req) for req in requirements])
+    return rfp.id * 2, 'rfp', rfp.id, rfp.id, rfp.title, body
+
+
+def _proposal_row(proposal):
+    blob = proposal.raw_response_blob
+    body = zlib.decompress(bytes(blob.data)).decode('utf-8') if blob else ''
+    title = f"{proposal.email_subject} {proposal.vendor.name}"
+    return proposal.id * 2 + 1, 'proposal', proposal.id, proposal.rfp_id, title, body
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    RFP = apps.get_model('rfp', 'RFP')
+    Proposal = apps.get_model('rfp', 'Proposal')
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(CREATE_INDEX)
+        cursor.execute(CONFIGURE_RANK)
+        for rfps in _batches(RFP.objects.all()):
+            cursor.executemany(INSERT, [_rfp_row(rfp) for rfp in rfps])
+        for proposals in _batches(Proposal.objects.select_related('vendor', 'raw_response_blob')):
+            cursor.executemany(INSERT, [_proposal_row(proposal) for proposal in proposals])
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS rfp_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfp', '0005_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
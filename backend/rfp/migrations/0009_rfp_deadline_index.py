@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfp', '0008_event_log'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rfp',
+            index=models.Index(fields=['status', 'deadline'], name='rfp_status_deadline_idx'),
+        ),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+from decimal import Decimal, InvalidOperation
+
+
+def _amount(value):
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        result = Decimal(str(value).replace(',', '').lstrip('$').strip()).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return None
+    return result if result.is_finite() and 0 <= result < Decimal('1e10') else None
+
+
+def _items(data):
+    items = data.get('items') if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return []
+    return [item for item in items if isinstance(item, dict) and str(item.get('name') or '').strip()]
+
+
+def copy_items_to_rows(apps, schema_editor):
+    """
+    Items already parsed into RFP.structured_data and Proposal.parsed_data.
+    Quoted lines are matched to RFP items by exact name only; new parses
+    use rfp.line_items, which also matches plurals and partial names.
+    """
+    RFP = apps.get_model('rfp', 'RFP')
+    RFPItem = apps.get_model('rfp', 'RFPItem')
+    Proposal = apps.get_model('rfp', 'Proposal')
+    ProposalLineItem = apps.get_model('rfp', 'ProposalLineItem')
+
+    rows = []
+    for rfp_id, structured_data in RFP.objects.values_list('id', 'structured_data').iterator(chunk_size=2000):
+        for position, item in enumerate(_items(structured_data)):
+            rows.append(RFPItem(
+                rfp_id=rfp_id, position=position, name=str(item['name']).strip()[:200],
+                quantity=_amount(item.get('quantity')), specifications=str(item.get('specifications') or ''),
+            ))
+    RFPItem.objects.bulk_create(rows, batch_size=2000)
+
+    rfp_items = {}
+    for pk, rfp_id, name in RFPItem.objects.values_list('id', 'rfp_id', 'name').order_by('-position'):
+        rfp_items[rfp_id, name.casefold()] = pk
+    rows = []
+    parsed = Proposal.objects.filter(is_parsed=True).values_list('id', 'rfp_id', 'parsed_data')
+    for proposal_id, rfp_id, parsed_data in parsed.iterator(chunk_size=2000):
+        for position, item in enumerate(_items(parsed_data)):
+            name = str(item['name']).strip()[:200]
+            quantity, unit_price = _amount(item.get('quantity')), _amount(item.get('unit_price'))
+            total_price = _amount(item.get('total_price'))
+            if total_price is None and unit_price is not None and quantity is not None:
+                total_price = _amount(unit_price * quantity)
+            rows.append(ProposalLineItem(
+                proposal_id=proposal_id, rfp_item_id=rfp_items.get((rfp_id, name.casefold())),
+                position=position, name=name, quantity=quantity, unit_price=unit_price, total_price=total_price,
+            ))
+        if len(rows) >= 2000:
+            ProposalLineItem.objects.bulk_create(rows)
+            rows = []
+    ProposalLineItem.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfp', '0009_rfp_deadline_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RFPItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField(default=0)),
+                ('name', models.CharField(max_length=200)),
+                ('quantity', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('specifications', models.TextField(blank=True)),
+                ('rfp', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='items', to='rfp.rfp')),
+            ],
+            options={
+                'ordering': ['position'],
+                'unique_together': {('rfp', 'position')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ProposalLineItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField(default=0)),
+                ('name', models.CharField(max_length=200)),
+                ('quantity', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('unit_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('total_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('proposal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='line_items', to='rfp.proposal')),
+                ('rfp_item', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='quotes', to='rfp.rfpitem')),
+            ],
+            options={
+                'ordering': ['position'],
+                'indexes': [models.Index(fields=['rfp_item', 'unit_price', 'proposal'], name='line_item_price_idx')],
+            },
+        ),
+        migrations.RunPython(copy_items_to_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,134 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+import re
+
+# As rfp.requirement_library.normalize when this migration was written
+FILLER_WORDS = {
+    'a', 'an', 'and', 'are', 'be', 'by', 'for', 'from', 'in', 'include', 'including', 'is', 'must', 'of', 'on',
+    'or', 'our', 'provide', 'required', 'require', 'shall', 'should', 'the', 'to', 'we', 'will', 'with',
+}
+
+
+def _key(text):
+    words = {word[:-1] if len(word) > 3 and word.endswith('s') and not word.endswith('ss') else word
+             for word in re.findall(r'[a-z0-9]+', text.casefold())}
+    return (' '.join(sorted(words - FILLER_WORDS)) or ' '.join(sorted(words)))[:300]
+
+
+def _texts(requirements):
+    if not isinstance(requirements, list):
+        return []
+    return [text.strip() for text in requirements if isinstance(text, str) and _key(text)]
+
+
+def build_library(apps, schema_editor):
+    """
+    Requirements of existing RFPs, merged by normalized wording (no
+    embeddings here), and the compliance_analysis of parsed proposals.
+    Entries that match none of their RFP's requirements are left out.
+    """
+    RFP = apps.get_model('rfp', 'RFP')
+    Proposal = apps.get_model('rfp', 'Proposal')
+    Requirement = apps.get_model('rfp', 'Requirement')
+    RequirementAlias = apps.get_model('rfp', 'RequirementAlias')
+    RFPRequirement = apps.get_model('rfp', 'RFPRequirement')
+    RequirementCompliance = apps.get_model('rfp', 'RequirementCompliance')
+
+    library = {}
+    links = {}
+    for rfp_id, requirements in RFP.objects.values_list('id', 'requirements').iterator(chunk_size=2000):
+        links[rfp_id] = []
+        for text in _texts(requirements):
+            key = _key(text)
+            if key not in library:
+                library[key] = Requirement.objects.create(text=text).pk
+            links[rfp_id].append(library[key])
+    RequirementAlias.objects.bulk_create(
+        [RequirementAlias(key=key, requirement_id=pk) for key, pk in library.items()], batch_size=2000,
+    )
+    RFPRequirement.objects.bulk_create([
+        RFPRequirement(rfp_id=rfp_id, requirement_id=pk, position=position)
+        for rfp_id, pks in links.items() for position, pk in enumerate(pks)
+    ], batch_size=2000)
+
+    rows = []
+    parsed = Proposal.objects.filter(is_parsed=True).values_list('id', 'rfp_id', 'parsed_data')
+    for proposal_id, rfp_id, parsed_data in parsed.iterator(chunk_size=2000):
+        analysis = parsed_data.get('compliance_analysis') if isinstance(parsed_data, dict) else None
+        entries = [entry for entry in analysis if isinstance(entry, dict) and isinstance(entry.get('requirement'), str)
+                   and _key(entry['requirement'])] if isinstance(analysis, list) else []
+        rfp_links = links.get(rfp_id, [])
+        seen = set()
+        for position, entry in enumerate(entries):
+            pk = library.get(_key(entry['requirement']))
+            if pk not in rfp_links:
+                pk = rfp_links[position] if len(entries) == len(rfp_links) else None
+            if pk is None or pk in seen:
+                continue
+            seen.add(pk)
+            status = str(entry.get('status') or '').strip().lower()
+            rows.append(RequirementCompliance(
+                proposal_id=proposal_id, requirement_id=pk,
+                status=status if status in ('yes', 'partial', 'no') else 'no', notes=str(entry.get('notes') or ''),
+            ))
+        if len(rows) >= 2000:
+            RequirementCompliance.objects.bulk_create(rows)
+            rows = []
+    RequirementCompliance.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfp', '0010_line_items'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Requirement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField()),
+                ('embedding', models.BinaryField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RequirementAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=300, unique=True)),
+                ('requirement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='rfp.requirement')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RFPRequirement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField(default=0)),
+                ('requirement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rfp_links', to='rfp.requirement')),
+                ('rfp', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='requirement_links', to='rfp.rfp')),
+            ],
+            options={
+                'ordering': ['position'],
+                'unique_together': {('rfp', 'position')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RequirementCompliance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('yes', 'Yes'), ('partial', 'Partial'), ('no', 'No')], max_length=10)),
+                ('notes', models.TextField(blank=True)),
+                ('proposal', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='compliance', to='rfp.proposal')),
+                ('requirement', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='compliance', to='rfp.requirement')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['requirement', 'status'], name='compliance_requirement_idx')],
+                'unique_together': {('proposal', 'requirement')},
+            },
+        ),
+        migrations.RunPython(build_library, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,106 @@
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+import copy
+import hashlib
 import json
+import zlib
 
-class Vendor(models.Model):
+
+class Blob(models.Model):
+    """
+    Content-addressed, zlib-compressed storage for large email texts
+    """
+    digest = models.CharField(max_length=64, primary_key=True)
+    data = models.BinaryField()
+    size = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    _text = None
+
+    def __str__(self):
+        return f"{self.digest[:12]} ({self.size} bytes)"
+
+    @classmethod
+    def for_text(cls, text):
+        """Build an unsaved blob for ``text``; identical texts share a digest"""
+        text = text or ''
+        raw = text.encode('utf-8')
+        blob = cls(digest=hashlib.sha256(raw).hexdigest(), data=zlib.compress(raw, 6), size=len(raw))
+        blob._text = text
+        return blob
+
+    @classmethod
+    def save_pending(cls, *blobs):
+        """Insert any unsaved blobs, skipping digests that are already stored"""
+        pending = {blob.digest: blob for blob in blobs if blob is not None and blob._state.adding}
+        if pending:
+            cls.objects.bulk_create(pending.values(), ignore_conflicts=True)
+
+    @classmethod
+    def delete_unreferenced(cls, created_before, batch_size=500):
+        """
+        Delete blobs created before `created_before` that no row points at,
+        `batch_size` at a time. Returns how many were deleted.
+        """
+        unreferenced = cls.objects.filter(created_at__lt=created_before)
+        # Every foreign key to Blob, related_name='+' ones included
+        for relation in cls._meta.get_fields(include_hidden=True):
+            if relation.one_to_many and relation.auto_created:
+                column = relation.field.name
+                referenced = relation.related_model._base_manager.filter(**{f'{column}__isnull': False})
+                unreferenced = unreferenced.exclude(digest__in=referenced.values(column))
+
+        deleted = 0
+        while True:
+            with transaction.atomic():
+                digests = list(unreferenced.values_list('digest', flat=True)[:batch_size])
+                if not digests:
+                    return deleted
+                # Filtered again, so a blob that gained a reference meanwhile is kept
+                deleted += unreferenced.filter(digest__in=digests).delete()[0]
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = zlib.decompress(bytes(self.data)).decode('utf-8')
+        return self._text
+
+
+def blob_text_property(field_name):
+    """Expose a Blob foreign key as a plain text attribute, loaded on first access"""
+    def getter(self):
+        blob = getattr(self, field_name)
+        return blob.text if blob is not None else ''
+
+    def setter(self, value):
+        setattr(self, field_name, Blob.for_text(value))
+
+    return property(getter, setter)
+
+
+def loaded_copy(value):
+    """
+    A copy of a column value to compare against later. JSON lists and dicts
+    are copied deeply, so editing the instance's value in place shows up as
+    a change.
+    """
+    return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+
+class TracksLoadedValues:
+    """
+    Keeps the column values an instance was loaded with in `_loaded_values`
+    (by attname), so signal receivers can tell which columns a save changed
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {name: loaded_copy(value) for name, value in zip(field_names, values)}
+        return instance
+
+
+class Vendor(TracksLoadedValues, models.Model):
     name = models.CharField(max_length=200)
     email = models.EmailField(unique=True)
     contact_person = models.CharField(max_length=100, blank=True)
@@ -14,11 +113,14 @@ class Vendor(models.Model):
 
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name'], name='vendor_name_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.email})"
 
-class RFP(models.Model):
+class RFP(TracksLoadedValues, models.Model):
     STATUS_CHOICES = [
         ('draft', 'Draft'),
         ('sent', 'Sent to Vendors'),
@@ -47,6 +149,12 @@ class RFP(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='rfp_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='rfp_status_created_idx'),
+            # Nearest deadline among open RFPs, used by the inbox daemon's schedule
+            models.Index(fields=['status', 'deadline'], name='rfp_status_deadline_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.get_status_display()}"
@@ -80,20 +188,32 @@ class RFPSendLog(models.Model):
     vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE)
     sent_at = models.DateTimeField(auto_now_add=True)
     email_subject = models.CharField(max_length=300)
-    email_body = models.TextField()
+    email_body_blob = models.ForeignKey(Blob, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
     is_sent = models.BooleanField(default=False)
     sent_error = models.TextField(blank=True)
 
+    email_body = blob_text_property('email_body_blob')
+
     class Meta:
         unique_together = ['rfp', 'vendor']
+        indexes = [
+            # RFPs sent to a vendor, used when matching inbound email
+            models.Index(fields=['vendor', 'rfp'], name='sendlog_vendor_rfp_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # One transaction, so Blob.delete_unreferenced cannot remove the blob in between
+        with transaction.atomic():
+            Blob.save_pending(self.email_body_blob)
+            super().save(*args, **kwargs)
 
-class Proposal(models.Model):
+class Proposal(TracksLoadedValues, models.Model):
     rfp = models.ForeignKey(RFP, on_delete=models.CASCADE, related_name='proposals')
     vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE)
     
     email_subject = models.CharField(max_length=300)
-    email_body = models.TextField()
-    raw_response = models.TextField()
+    email_body_blob = models.ForeignKey(Blob, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
+    raw_response_blob = models.ForeignKey(Blob, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
     attachments = models.JSONField(default=list)
     received_at = models.DateTimeField(auto_now_add=True)
     
@@ -108,13 +228,122 @@ class Proposal(models.Model):
     notes = models.TextField(blank=True)
     is_preferred = models.BooleanField(default=False)
 
+    email_body = blob_text_property('email_body_blob')
+    raw_response = blob_text_property('raw_response_blob')
+
     class Meta:
         ordering = ['-compliance_score', 'total_price']
         unique_together = ['rfp', 'vendor']
+        indexes = [
+            models.Index(fields=['-compliance_score', 'total_price'], name='proposal_ranking_idx'),
+            models.Index(fields=['rfp', 'is_parsed'], name='proposal_rfp_parsed_idx'),
+            # Small partial index over the parse backlog only
+            models.Index(
+                fields=['-compliance_score', 'total_price'],
+                condition=models.Q(is_parsed=False),
+                name='proposal_unparsed_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.vendor.name} - {self.rfp.title}"
 
+    def save(self, *args, **kwargs):
+        # One transaction, so Blob.delete_unreferenced cannot remove the blob in between
+        with transaction.atomic():
+            Blob.save_pending(self.email_body_blob, self.raw_response_blob)
+            super().save(*args, **kwargs)
+
+class RFPItem(models.Model):
+    """One line of the RFP's `items`, as the natural-language parser returned it"""
+    # Indexed by the unique (rfp, position) index, which also gives the order
+    rfp = models.ForeignKey(RFP, on_delete=models.CASCADE, related_name='items', db_index=False)
+    position = models.PositiveIntegerField(default=0)
+    name = models.CharField(max_length=200)
+    quantity = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    specifications = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['position']
+        unique_together = ['rfp', 'position']
+
+    def __str__(self):
+        return self.name
+
+class ProposalLineItem(models.Model):
+    """A priced line of a vendor's proposal, matched to the RFP item it quotes where possible"""
+    proposal = models.ForeignKey(Proposal, on_delete=models.CASCADE, related_name='line_items')
+    # Indexed by line_item_price_idx, which leads with it
+    rfp_item = models.ForeignKey(RFPItem, on_delete=models.SET_NULL, null=True, blank=True, related_name='quotes',
+                                 db_index=False)
+    position = models.PositiveIntegerField(default=0)
+    name = models.CharField(max_length=200)
+    quantity = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    unit_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    total_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        ordering = ['position']
+        indexes = [
+            # Price range, quoting vendors and cheapest quote per RFP item, without reading the table
+            models.Index(fields=['rfp_item', 'unit_price', 'proposal'], name='line_item_price_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.unit_price})"
+
+class Requirement(models.Model):
+    """A requirement as RFPs word it, shared by every RFP that asks for it"""
+    text = models.TextField()
+    # float32 vector from AIService.embed; empty when embeddings were not available
+    embedding = models.BinaryField(null=True, blank=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.text
+
+class RequirementAlias(models.Model):
+    """A normalized wording of a requirement, so the same wording never needs matching twice"""
+    key = models.CharField(max_length=300, unique=True)
+    requirement = models.ForeignKey(Requirement, on_delete=models.CASCADE, related_name='aliases')
+
+    def __str__(self):
+        return self.key
+
+class RFPRequirement(models.Model):
+    """One of the RFP's `requirements`, as its canonical Requirement"""
+    # Indexed by the unique (rfp, position) index, which also gives the order
+    rfp = models.ForeignKey(RFP, on_delete=models.CASCADE, related_name='requirement_links', db_index=False)
+    requirement = models.ForeignKey(Requirement, on_delete=models.CASCADE, related_name='rfp_links')
+    position = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['position']
+        unique_together = ['rfp', 'position']
+
+class RequirementCompliance(models.Model):
+    """Whether a proposal meets a requirement, as the vendor response parser judged it"""
+    STATUS_CHOICES = [
+        ('yes', 'Yes'),
+        ('partial', 'Partial'),
+        ('no', 'No'),
+    ]
+
+    # Indexed by the unique (proposal, requirement) index
+    proposal = models.ForeignKey(Proposal, on_delete=models.CASCADE, related_name='compliance', db_index=False)
+    # Indexed by compliance_requirement_idx, which leads with it
+    requirement = models.ForeignKey(Requirement, on_delete=models.CASCADE, related_name='compliance',
+                                    db_index=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    notes = models.TextField(blank=True)
+
+    class Meta:
+        unique_together = ['proposal', 'requirement']
+        indexes = [
+            # Proposals that meet (or miss) a requirement, across RFPs
+            models.Index(fields=['requirement', 'status'], name='compliance_requirement_idx'),
+        ]
+
 class Comparison(models.Model):
     rfp = models.OneToOneField(RFP, on_delete=models.CASCADE, related_name='comparison')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -127,4 +356,78 @@ class Comparison(models.Model):
         ordering = ['-created_at']
 
     def __str__(self):
-        return f"Comparison for {self.rfp.title}"
\ No newline at end of file
+        return f"Comparison for {self.rfp.title}"
+
+class Job(models.Model):
+    """
+    A unit of background work, run by the run_jobs management command
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    ]
+    FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    progress = models.PositiveSmallIntegerField(default=0)
+    progress_message = models.CharField(max_length=200, blank=True)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    cancel_requested = models.BooleanField(default=False)
+    run_after = models.DateTimeField()
+    worker = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Next runnable job, used by the worker's claim query
+            models.Index(fields=['run_after'], condition=models.Q(status='queued'), name='job_queued_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in self.FINISHED_STATUSES
+
+
+class Worker(models.Model):
+    """
+    A running run_jobs process, so views only queue jobs when one is alive
+    """
+    name = models.CharField(max_length=100, unique=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    heartbeat_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.name
+
+
+class Event(models.Model):
+    """
+    Append-only log of changes pushed to browsers over /api/events/. The id
+    doubles as the SSE event id, so clients resume with Last-Event-ID.
+    """
+    type = models.CharField(max_length=50)
+    data = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"#{self.pk} {self.type}"
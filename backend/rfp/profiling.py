@@ -0,0 +1,168 @@
+"""
+Opt-in per-request profiling (settings.PROFILING_ENABLED).
+
+ProfilingMiddleware starts a RequestProfile for each request. Code on the
+hot paths reports into it through timed() and add_tokens(); with profiling
+off there is no profile, so each call is a single ContextVar lookup. The
+totals go out as a Server-Timing header, and a sampled share of requests
+also gets a JSON log line. Phases can overlap: serialization includes the
+SQL of querysets it evaluates lazily.
+"""
+import contextvars
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager, nullcontext
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('rfp_request_profile', default=None)
+
+# Server-Timing metric name and description for each measured phase
+PHASES = {
+    'sql': 'SQL',
+    'ai': 'AI',
+    'imap': 'IMAP',
+    'smtp': 'SMTP',
+    'serialize': 'Serialization',
+}
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = dict.fromkeys(PHASES, 0.0)
+        self.counts = dict.fromkeys(PHASES, 0)
+        self.ai_tokens = 0
+        self.render_started = None
+
+    def add(self, phase, seconds):
+        self.durations[phase] += seconds
+        self.counts[phase] += 1
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        entries = []
+        for phase, description in PHASES.items():
+            if not self.counts[phase]:
+                continue
+            if phase == 'sql':
+                description = f"{self.counts[phase]} queries"
+            elif phase == 'ai':
+                description = f"{self.counts[phase]} calls, {self.ai_tokens} tokens"
+            entries.append(f'{phase};dur={self.durations[phase] * 1000:.1f};desc="{description}"')
+        entries.append(f'total;dur={self.total() * 1000:.1f}')
+        return ', '.join(entries)
+
+    def as_dict(self):
+        data = {'total_ms': round(self.total() * 1000, 1), 'ai_tokens': self.ai_tokens}
+        for phase in PHASES:
+            data[f'{phase}_ms'] = round(self.durations[phase] * 1000, 1)
+            data[f'{phase}_count'] = self.counts[phase]
+        return data
+
+
+@contextmanager
+def _timed(profile, phase):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(phase, time.perf_counter() - started)
+
+
+def timed(phase):
+    """Context manager adding the block's wall time to `phase` of the current request"""
+    profile = _current.get()
+    if profile is None:
+        return nullcontext()
+    return _timed(profile, phase)
+
+
+def add_tokens(count):
+    profile = _current.get()
+    if profile is not None and count:
+        profile.ai_tokens += count
+
+
+def serialized(serializer):
+    """`serializer.data`, timed as serialization"""
+    with timed('serialize'):
+        return serializer.data
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """Database execute wrapper installed on every connection while profiling is on"""
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    with _timed(profile, 'sql'):
+        return execute(sql, params, many, context)
+
+
+def install_sql_wrapper(sender, connection, **kwargs):
+    if sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_wrapper)
+
+
+class ProfilingMiddleware:
+    """
+    Adds a Server-Timing header with SQL, AI, IMAP, SMTP and serialization
+    time, and logs a sampled JSON summary of the request
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PROFILING_LOG_SAMPLE_RATE', 0.0)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profile = RequestProfile()
+        token = _current.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        profile = RequestProfile()
+        token = _current.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns; time that as
+        # serialization too
+        profile = _current.get()
+        if profile is not None:
+            profile.render_started = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: profile.add('serialize', time.perf_counter() - profile.render_started)
+            )
+        return response
+
+    def finish(self, request, response, profile):
+        response['Server-Timing'] = profile.server_timing()
+        if self.sample_rate and random.random() < self.sample_rate:
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                **profile.as_dict(),
+            }))
+        return response
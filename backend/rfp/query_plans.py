@@ -0,0 +1,40 @@
+"""
+EXPLAIN QUERY PLAN helpers for catching ORM queries that fall back to full table scans
+"""
+import re
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+EXPLAINABLE_STATEMENTS = ('SELECT', 'UPDATE', 'DELETE')
+
+# "SCAN rfp_vendor" (or "SCAN TABLE rfp_vendor" on older SQLite) with no index after it
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\S+)$')
+
+
+def explain(sql, using=connection):
+    """Return the detail column of SQLite's EXPLAIN QUERY PLAN for ``sql``"""
+    with using.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def full_scans(plan):
+    """Plan lines that read a whole table without an index"""
+    return [line for line in plan if FULL_SCAN.match(line.strip())]
+
+
+@contextmanager
+def capture_query_plans(using=connection):
+    """
+    Record every query issued inside the block together with its plan.
+    Yields a list that is filled with ``(sql, plan)`` pairs on exit.
+    """
+    plans = []
+    with CaptureQueriesContext(using) as context:
+        yield plans
+    for query in context.captured_queries:
+        sql = query['sql']
+        if sql.lstrip().upper().startswith(EXPLAINABLE_STATEMENTS):
+            plans.append((sql, explain(sql, using)))
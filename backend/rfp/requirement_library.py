@@ -0,0 +1,194 @@
+"""
+A library of canonical requirements shared across RFPs, and compliance
+with them stored per (proposal, requirement).
+
+Every wording of a requirement is normalized (case, punctuation, plurals,
+filler words, word order) into a RequirementAlias key. A wording the
+library has not seen is embedded and matched to the nearest existing
+Requirement; the match is saved as a new alias, so "On-site warranty
+support required" and "Onsite warranty support" share one Requirement and
+the second wording never needs an embedding again. Without embeddings
+(demo mode, no API key) only identical normalized wordings are merged.
+
+The parser's compliance_analysis is stored as RequirementCompliance rows,
+so compliance per requirement or vendor is an indexed join rather than a
+pass over every proposal's parsed JSON.
+"""
+import math
+import operator
+from array import array
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from . import line_items
+from .ai_services import AIService
+from .models import Requirement, RequirementAlias, RequirementCompliance, RFPRequirement
+
+# text-embedding-ada-002 puts unrelated requirements at about 0.75-0.85
+MATCH_THRESHOLD = 0.92
+STATUSES = {status for status, _ in RequirementCompliance.STATUS_CHOICES}
+FILLER_WORDS = {
+    'a', 'an', 'and', 'are', 'be', 'by', 'for', 'from', 'in', 'include', 'including', 'is', 'must', 'of', 'on',
+    'or', 'our', 'provide', 'required', 'require', 'shall', 'should', 'the', 'to', 'we', 'will', 'with',
+}
+MAX_KEY_LENGTH = 300
+
+
+def normalize(text):
+    """The alias key of a wording: its significant words, singular, sorted"""
+    words = set(line_items.normalize(text).split())
+    key = ' '.join(sorted(words - FILLER_WORDS)) or ' '.join(sorted(words))
+    return key[:MAX_KEY_LENGTH]
+
+
+def requirement_texts(requirements):
+    """The non-empty strings of an RFP's `requirements` JSON"""
+    if not isinstance(requirements, list):
+        return []
+    return [text.strip() for text in requirements if isinstance(text, str) and normalize(text)]
+
+
+def _pack(vector):
+    return array('f', vector).tobytes()
+
+
+def _unit(vector):
+    norm = math.sqrt(sum(map(operator.mul, vector, vector))) or 1.0
+    return [value / norm for value in vector]
+
+
+def _library():
+    """(requirement id, unit vector) for every Requirement with an embedding"""
+    vectors = []
+    for pk, embedding in Requirement.objects.filter(embedding__isnull=False).values_list('pk', 'embedding'):
+        vector = array('f')
+        vector.frombytes(bytes(embedding))
+        vectors.append((pk, _unit(vector)))
+    return vectors
+
+
+def _nearest(vector, library):
+    best_pk, best = None, MATCH_THRESHOLD
+    for pk, other in library:
+        similarity = sum(map(operator.mul, vector, other))
+        if similarity >= best:
+            best_pk, best = pk, similarity
+    return best_pk
+
+
+def _learn(wordings):
+    """
+    Requirement ids for new {key: wording} pairs: the nearest existing
+    Requirement by embedding, or a new one
+    """
+    vectors = AIService.embed(list(wordings.values()))
+    library = _library() if vectors else []
+    learned = {}
+    with transaction.atomic():
+        for (key, text), vector in zip(wordings.items(), vectors or [None] * len(wordings)):
+            unit = _unit(vector) if vector else None
+            pk = _nearest(unit, library) if unit else None
+            if pk is None:
+                pk = Requirement.objects.create(text=text, embedding=_pack(vector) if vector else None).pk
+                if unit:
+                    library.append((pk, unit))
+            learned[key] = pk
+        RequirementAlias.objects.bulk_create(
+            [RequirementAlias(key=key, requirement_id=pk) for key, pk in learned.items()], ignore_conflicts=True,
+        )
+    # Another process may have added one of these keys first; its alias wins
+    return dict(RequirementAlias.objects.filter(key__in=learned).values_list('key', 'requirement_id'))
+
+
+def canonical(texts):
+    """The Requirement for each wording, adding to the library the ones it has no match for"""
+    keys = [normalize(text) for text in texts]
+    known = dict(RequirementAlias.objects.filter(key__in=set(keys)).values_list('key', 'requirement_id'))
+    wordings = {}
+    for key, text in zip(keys, texts):
+        if key not in known:
+            wordings.setdefault(key, text.strip())
+    if wordings:
+        known.update(_learn(wordings))
+    requirements = Requirement.objects.in_bulk(set(known.values()))
+    return [requirements[known[key]] for key in keys]
+
+
+def link_rfp(rfp, requirements):
+    """Point the RFP at the canonical Requirement of each of its `requirements`, in order"""
+    rows = [
+        RFPRequirement(rfp=rfp, requirement=requirement, position=position)
+        for position, requirement in enumerate(canonical(requirement_texts(requirements)))
+    ]
+    with transaction.atomic():
+        RFPRequirement.objects.filter(rfp=rfp).delete()
+        RFPRequirement.objects.bulk_create(rows)
+    return rows
+
+
+def save_compliance(proposal, analysis):
+    """
+    Store the parser's compliance_analysis as one row per requirement. Each
+    entry is matched to one of the RFP's requirements by wording, or by
+    position when the parser answered every requirement in the order the
+    prompt listed them; anything else goes through the library.
+    """
+    entries = [
+        entry for entry in analysis
+        if isinstance(entry, dict) and isinstance(entry.get('requirement'), str) and normalize(entry['requirement'])
+    ] if isinstance(analysis, list) else []
+    links = list(RFPRequirement.objects.filter(rfp_id=proposal.rfp_id).values_list('requirement_id', flat=True))
+    keys = dict(RequirementAlias.objects.filter(requirement__in=set(links)).values_list('key', 'requirement_id'))
+
+    matched, unmatched = [], []
+    for position, entry in enumerate(entries):
+        requirement_id = keys.get(normalize(entry['requirement']))
+        if requirement_id is None and len(entries) == len(links):
+            requirement_id = links[position]
+        if requirement_id is None:
+            unmatched.append(entry)
+        else:
+            matched.append((requirement_id, entry))
+    if unmatched:
+        requirements = canonical([entry['requirement'] for entry in unmatched])
+        matched += [(requirement.pk, entry) for requirement, entry in zip(requirements, unmatched)]
+
+    rows = {}
+    for requirement_id, entry in matched:
+        status = str(entry.get('status') or '').strip().lower()
+        rows.setdefault(requirement_id, RequirementCompliance(
+            proposal=proposal,
+            requirement_id=requirement_id,
+            # The compliance score counts anything but yes and partial as a no
+            status=status if status in STATUSES else 'no',
+            notes=str(entry.get('notes') or ''),
+        ))
+    with transaction.atomic():
+        RequirementCompliance.objects.filter(proposal=proposal).delete()
+        RequirementCompliance.objects.bulk_create(rows.values())
+    return list(rows.values())
+
+
+def _status_counts():
+    return {status: Count('pk', filter=Q(status=status)) for status in ('yes', 'partial', 'no')}
+
+
+def compliance_summary(rfp):
+    """
+    For the RFP's proposals: how many meet, partly meet and miss each
+    requirement, and each proposal's score from the same rows. Two queries.
+    """
+    rows = RequirementCompliance.objects.filter(proposal__rfp=rfp)
+    requirements = list(
+        rows.values('requirement_id', text=F('requirement__text'))
+        .annotate(**_status_counts()).order_by('requirement_id')
+    )
+    proposals = list(
+        rows.values('proposal_id', vendor_id=F('proposal__vendor_id'), vendor_name=F('proposal__vendor__name'))
+        .annotate(**_status_counts()).order_by('proposal_id')
+    )
+    for proposal in proposals:
+        answered = proposal['yes'] + proposal['partial'] + proposal['no']
+        proposal['compliance_score'] = round((proposal['yes'] + proposal['partial'] * 0.5) / answered * 100, 2)
+    return {'requirements': requirements, 'proposals': proposals}
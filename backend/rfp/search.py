@@ -0,0 +1,202 @@
+"""
+SQLite FTS5 full-text index over RFPs and proposals.
+
+Each document's rowid encodes its type and primary key, so keeping the index in
+sync on save is a rowid lookup rather than a scan of the virtual table.
+"""
+import html
+import re
+from itertools import islice
+
+from django.db import connection
+
+TABLE = 'rfp_search'
+KINDS = ('rfp', 'proposal')
+_KIND_OFFSET = {'rfp': 0, 'proposal': 1}
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def enabled(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def _rowid(kind, object_id):
+    return object_id * 2 + _KIND_OFFSET[kind]
+
+
+def rfp_document(rfp):
+    requirements = rfp.requirements if isinstance(rfp.requirements, list) else []
+    body = '\n'.join([rfp.description or ''] + [str(req) for req in requirements])
+    return rfp.id, rfp.title, body
+
+
+def proposal_document(proposal):
+    title = f"{proposal.email_subject} {proposal.vendor.name}"
+    return proposal.rfp_id, title, proposal.raw_response
+
+
+# The columns each document is built from (by attname); a save that changes
+# none of them leaves the index as it is
+INDEXED_COLUMNS = {
+    'rfp': ('title', 'description', 'requirements'),
+    'proposal': ('rfp_id', 'email_subject', 'vendor_id', 'raw_response_blob_id'),
+}
+
+
+def _needs_index(kind, instance, created, update_fields):
+    columns = INDEXED_COLUMNS[kind]
+    if created:
+        return True
+    # update_fields holds field names, so match the columns without their _id suffix
+    if update_fields is not None and not any(column.removesuffix('_id') in update_fields for column in columns):
+        return False
+    loaded = getattr(instance, '_loaded_values', None)
+    # Without loaded values (or with indexed columns deferred) there is nothing to compare against
+    return loaded is None or any(column not in loaded or loaded[column] != getattr(instance, column)
+                                 for column in columns)
+
+
+def _remember_indexed(kind, instance):
+    from .models import loaded_copy
+    loaded = instance.__dict__.setdefault('_loaded_values', {})
+    loaded.update((column, loaded_copy(getattr(instance, column))) for column in INDEXED_COLUMNS[kind])
+
+
+def index_document(kind, object_id, rfp_id, title, body, using=connection):
+    rowid = _rowid(kind, object_id)
+    with using.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [rowid])
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, kind, object_id, rfp_id, title, body) VALUES (%s, %s, %s, %s, %s, %s)',
+            [rowid, kind, object_id, rfp_id, title or '', body or ''],
+        )
+
+
+def _proposal_documents(proposals, batch_size):
+    proposals = proposals.select_related('vendor', 'raw_response_blob').only(
+        'id', 'rfp_id', 'email_subject', 'vendor__name', 'raw_response_blob',
+    )
+    for proposal in proposals.iterator(chunk_size=batch_size):
+        yield (_rowid('proposal', proposal.id), 'proposal', proposal.id, *proposal_document(proposal))
+
+
+def index_proposals(proposals, using=connection, batch_size=1000):
+    """Re-index the proposals of a queryset, such as every proposal of a renamed vendor"""
+    insert = f'INSERT INTO {TABLE} (rowid, kind, object_id, rfp_id, title, body) VALUES (%s, %s, %s, %s, %s, %s)'
+    documents = _proposal_documents(proposals, batch_size)
+    count = 0
+    with using.cursor() as cursor:
+        while True:
+            batch = list(islice(documents, batch_size))
+            if not batch:
+                return count
+            cursor.executemany(f'DELETE FROM {TABLE} WHERE rowid = %s', [(document[0],) for document in batch])
+            cursor.executemany(insert, batch)
+            count += len(batch)
+
+
+def remove_document(kind, object_id, using=connection):
+    with using.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [_rowid(kind, object_id)])
+
+
+def match_expression(text):
+    """Turn free text into an FTS5 query that ANDs every word, so punctuation can't break the syntax"""
+    return ' '.join(f'"{token}"' for token in _TOKEN.findall(text))
+
+
+def _highlight(snippet):
+    # Document text is vendor-supplied, so escape it before adding the markup
+    return html.escape(snippet).replace('\x02', '<mark>').replace('\x03', '</mark>')
+
+
+def search(text, kind=None, limit=20, using=connection):
+    """
+    Ranked matches as dicts with kind, object_id, rfp_id, rank and a snippet
+    where matched terms are wrapped in <mark> tags
+    """
+    expression = match_expression(text)
+    if not expression:
+        return []
+    # rank is bm25 weighted towards titles, configured when the table is created
+    sql = (
+        f"SELECT kind, object_id, rfp_id, rank, snippet({TABLE}, -1, char(2), char(3), '…', 16) "
+        f"FROM {TABLE} WHERE {TABLE} MATCH %s"
+    )
+    params = [expression]
+    if kind:
+        sql += ' AND kind = %s'
+        params.append(kind)
+    sql += ' ORDER BY rank LIMIT %s'
+    params.append(limit)
+
+    with using.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [
+            {'kind': row[0], 'object_id': row[1], 'rfp_id': row[2], 'rank': row[3], 'snippet': _highlight(row[4])}
+            for row in cursor.fetchall()
+        ]
+
+
+def rebuild(using=connection, batch_size=1000):
+    """Re-index every RFP and proposal; for rows written with bulk_create"""
+    from .models import RFP, Proposal
+
+    def documents():
+        rfps = RFP.objects.only('id', 'title', 'description', 'requirements')
+        for rfp in rfps.iterator(chunk_size=batch_size):
+            yield (_rowid('rfp', rfp.id), 'rfp', rfp.id, *rfp_document(rfp))
+        yield from _proposal_documents(Proposal.objects.all(), batch_size)
+
+    insert = f'INSERT INTO {TABLE} (rowid, kind, object_id, rfp_id, title, body) VALUES (%s, %s, %s, %s, %s, %s)'
+    count = 0
+    with using.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        batch = []
+        for document in documents():
+            batch.append(document)
+            if len(batch) >= batch_size:
+                cursor.executemany(insert, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(insert, batch)
+            count += len(batch)
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+    return count
+
+
+# Signal receivers, connected in RfpConfig.ready()
+
+def rfp_saved(sender, instance, created, update_fields=None, **kwargs):
+    if enabled() and _needs_index('rfp', instance, created, update_fields):
+        index_document('rfp', instance.id, *rfp_document(instance))
+        _remember_indexed('rfp', instance)
+
+
+def rfp_deleted(sender, instance, **kwargs):
+    if enabled():
+        remove_document('rfp', instance.id)
+
+
+def proposal_saved(sender, instance, created, update_fields=None, **kwargs):
+    if enabled() and _needs_index('proposal', instance, created, update_fields):
+        index_document('proposal', instance.id, *proposal_document(instance))
+        _remember_indexed('proposal', instance)
+
+
+def proposal_deleted(sender, instance, **kwargs):
+    if enabled():
+        remove_document('proposal', instance.id)
+
+
+def vendor_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Proposal titles include the vendor's name, so a rename re-indexes them
+    if created or not enabled() or (update_fields is not None and 'name' not in update_fields):
+        return
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is None or loaded.get('name') != instance.name:
+        from .models import Proposal
+        index_proposals(Proposal.objects.filter(vendor=instance))
+        instance.__dict__.setdefault('_loaded_values', {})['name'] = instance.name
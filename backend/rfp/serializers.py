@@ -1,5 +1,19 @@
 from rest_framework import serializers
-from .models import Vendor, RFP, Proposal, Comparison
+from django.urls import reverse
+from .models import Vendor, RFP, Proposal, Comparison, Job
+from .fast_serializers import ProposalListSerializer
+
+
+class SparseFieldsMixin:
+    """
+    Accepts an optional ``fields`` argument that limits which fields are serialized
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
 
 class VendorSerializer(serializers.ModelSerializer):
     class Meta:
@@ -12,6 +26,14 @@ class VendorSerializer(serializers.ModelSerializer):
         return value
 
 
+class VendorImportSerializer(VendorSerializer):
+    """
+    Row validation for bulk imports; existing emails are upserted, not rejected
+    """
+    class Meta(VendorSerializer.Meta):
+        extra_kwargs = {'email': {'validators': []}}
+
+
 class RFPSerializer(serializers.ModelSerializer):
     vendor_count = serializers.SerializerMethodField()
     status_display = serializers.SerializerMethodField()
@@ -35,12 +57,6 @@ class RFPSerializer(serializers.ModelSerializer):
         if 'vendor_count' not in representation:
             representation['vendor_count'] = instance.vendors.count()
         
-        # Format datetime fields
-        representation['created_at'] = instance.created_at.isoformat()
-        representation['updated_at'] = instance.updated_at.isoformat()
-        if instance.deadline:
-            representation['deadline'] = instance.deadline.isoformat()
-        
         # Ensure requirements is always a list
         if not isinstance(representation.get('requirements'), list):
             representation['requirements'] = []
@@ -52,21 +68,29 @@ class ProposalSerializer(serializers.ModelSerializer):
     vendor_name = serializers.CharField(source='vendor.name', read_only=True)
     vendor_email = serializers.CharField(source='vendor.email', read_only=True)
     rfp_title = serializers.CharField(source='rfp.title', read_only=True)
+    email_body = serializers.CharField(allow_blank=True)
+    raw_response = serializers.CharField(allow_blank=True)
     
     class Meta:
         model = Proposal
-        fields = '__all__'
+        exclude = ['email_body_blob', 'raw_response_blob']
         read_only_fields = ['received_at', 'is_parsed']
+        # Rendered as a number
+        extra_kwargs = {'total_price': {'coerce_to_string': False}}
+
+
+class ProposalSummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    List representation of a proposal without the email bodies and parsed JSON
+    """
+    vendor_name = serializers.CharField(source='vendor.name', read_only=True)
+    vendor_email = serializers.CharField(source='vendor.email', read_only=True)
+    rfp_title = serializers.CharField(source='rfp.title', read_only=True)
     
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
-        representation['received_at'] = instance.received_at.isoformat()
-        
-        # Format price
-        if representation['total_price']:
-            representation['total_price'] = float(representation['total_price'])
-        
-        return representation
+    class Meta:
+        model = Proposal
+        exclude = ['email_body_blob', 'raw_response_blob', 'parsed_data']
+        extra_kwargs = {'total_price': {'coerce_to_string': False}}
 
 
 class ComparisonSerializer(serializers.ModelSerializer):
@@ -78,5 +102,17 @@ class ComparisonSerializer(serializers.ModelSerializer):
         fields = '__all__'
     
     def get_proposal_details(self, obj):
-        proposals = obj.proposals.all()
-        return ProposalSerializer(proposals, many=True).data
\ No newline at end of file
+        return ProposalListSerializer(obj.proposals.all()).data
+
+
+class JobSerializer(serializers.ModelSerializer):
+    status_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'params', 'status', 'progress', 'progress_message', 'result', 'error',
+                  'attempts', 'max_attempts', 'cancel_requested', 'created_at', 'started_at', 'finished_at',
+                  'status_url']
+    
+    def get_status_url(self, obj):
+        return reverse('job-detail', kwargs={'pk': obj.pk})
@@ -0,0 +1,290 @@
+"""
+Production static files (settings.STATIC_PIPELINE).
+
+`collectstatic` with CompressedManifestStaticFilesStorage minifies the CSS
+and JS it copied into STATIC_ROOT, gives every file a content-hashed name
+through Django's manifest, and writes .gz (and, with the brotli package,
+.br) variants next to each one. serve() then hands out the smallest variant
+the browser accepts. Hashed names never change content, so they are cached
+for a year and a repeat page load requests no assets at all.
+
+The minifiers are deliberately conservative: they drop comments and
+insignificant whitespace but keep line breaks and never touch strings,
+template literals or regular expressions.
+"""
+import gzip
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+COMPRESSIBLE = {'.css', '.js', '.html', '.json', '.map', '.svg', '.txt', '.xml'}
+# A variant is only kept if it is at least this much smaller
+MIN_SAVING = 0.05
+
+# Characters a space next to which is never needed in JS. + - / and . are
+# left out: "a + +b", "x / y / z" (regex or division) and "1 .toString()".
+_JS_TIGHT = set('{}()[];,:=<>?|&!*%^~')
+# A / after one of these starts a regular expression, not a division
+_JS_REGEX_AFTER = set('(,=:[!&|?{};+-*%<>~^')
+_JS_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'delete', 'new', 'throw',
+                      'instanceof', 'yield', 'await'}
+
+
+def _end_of_string(source, i, quote):
+    i += 1
+    while i < len(source) and source[i] != quote:
+        i += 2 if source[i] == '\\' else 1
+    return i + 1
+
+
+def _end_of_regex(source, i):
+    i += 1
+    in_class = False
+    while i < len(source):
+        c = source[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '[':
+            in_class = True
+        elif c == ']':
+            in_class = False
+        elif c == '/' and not in_class:
+            break
+        i += 1
+    i += 1
+    while i < len(source) and source[i].isalpha():
+        i += 1
+    return i
+
+
+def _end_of_template_text(source, i):
+    """From inside a template literal to just past its closing ` (True) or the next ${ (False)"""
+    while i < len(source):
+        c = source[i]
+        if c == '\\':
+            i += 2
+        elif c == '`':
+            return i + 1, True
+        elif c == '$' and source.startswith('${', i):
+            return i + 2, False
+        else:
+            i += 1
+    return i, True
+
+
+def _regex_allowed(out):
+    # Identifiers go out a character at a time, so a dozen pieces cover any keyword
+    code = ''.join(out[-12:]).rstrip()
+    if not code:
+        return True
+    if code[-1] in _JS_REGEX_AFTER:
+        return True
+    word = re.search(r'[A-Za-z_$][\w$]*$', code)
+    return bool(word) and word.group() in _JS_REGEX_KEYWORDS
+
+
+def minify_js(source):
+    out = []
+    # Brace depth at which each enclosing template literal's ${ } closes
+    templates = []
+    depth = 0
+    i, n = 0, len(source)
+    while i < n:
+        c = source[i]
+        if c in ' \t\r':
+            j = i
+            while j < n and source[j] in ' \t\r':
+                j += 1
+            if out and out[-1][-1:] not in _JS_TIGHT and out[-1][-1:] not in ' \n' and j < n \
+                    and source[j] not in _JS_TIGHT and source[j] != '\n':
+                out.append(' ')
+            i = j
+        elif c == '\n':
+            # Line breaks stay so automatic semicolon insertion is unchanged; blank lines go
+            if out and out[-1] == ' ':
+                out.pop()
+            if out and out[-1][-1:] != '\n':
+                out.append('\n')
+            i += 1
+        elif source.startswith('//', i):
+            j = source.find('\n', i)
+            i = n if j == -1 else j
+        elif source.startswith('/*', i):
+            j = source.find('*/', i + 2)
+            i = n if j == -1 else j + 2
+            # "a/**/b" must not become "ab"
+            if out and out[-1][-1:] not in ' \n' and i < n and not source[i].isspace():
+                out.append(' ')
+        elif c == '/' and _regex_allowed(out):
+            j = _end_of_regex(source, i)
+            out.append(source[i:j])
+            i = j
+        elif c in '\'"':
+            j = _end_of_string(source, i, c)
+            out.append(source[i:j])
+            i = j
+        elif c == '`' or (c == '}' and templates and templates[-1] == depth):
+            if c == '}':
+                templates.pop()
+            j, closed = _end_of_template_text(source, i + 1)
+            if not closed:
+                templates.append(depth)
+            out.append(source[i:j])
+            i = j
+        else:
+            if c == '{':
+                depth += 1
+            elif c == '}':
+                depth -= 1
+            out.append(c)
+            i += 1
+    return ''.join(out).strip() + '\n'
+
+
+def minify_css(source):
+    out = []
+    i, n = 0, len(source)
+    while i < n:
+        c = source[i]
+        if source.startswith('/*', i):
+            j = source.find('*/', i + 2)
+            i = n if j == -1 else j + 2
+        elif c in '\'"':
+            j = _end_of_string(source, i, c)
+            out.append(source[i:j])
+            i = j
+        elif c.isspace():
+            while i < n and source[i].isspace():
+                i += 1
+            # Not after ":" either, but keep "a :hover" (a descendant) as it is
+            if out and out[-1][-1:] not in '{};,>:' and i < n and source[i] not in '{};,>':
+                out.append(' ')
+        else:
+            if c == '}' and out and out[-1] == ';':
+                out.pop()
+            out.append(c)
+            i += 1
+    return ''.join(out).strip() + '\n'
+
+
+MINIFIERS = {'.js': minify_js, '.css': minify_css}
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def compress(path):
+    """Write path.gz and path.br next to `path` where they save space; returns the suffixes written"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    encoders = {'.gz': lambda content: gzip.compress(content, compresslevel=9, mtime=0)}
+    brotli = _brotli()
+    if brotli is not None:
+        encoders['.br'] = lambda content: brotli.compress(content, quality=11)
+
+    written = []
+    for suffix, encode in encoders.items():
+        encoded = encode(data)
+        if len(encoded) <= len(data) * (1 - MIN_SAVING):
+            with open(path + suffix, 'wb') as f:
+                f.write(encoded)
+            written.append(suffix)
+    return written
+
+
+def _project_dirs():
+    """STATICFILES_DIRS roots; only these are ours to minify, apps ship their assets as they like"""
+    return {os.path.realpath(entry[1] if isinstance(entry, (list, tuple)) else entry)
+            for entry in settings.STATICFILES_DIRS}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Minified, content-hashed and precompressed copies of every static file"""
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            return
+        project_dirs = _project_dirs()
+        for path, (storage, _) in paths.items():
+            minify = MINIFIERS.get(os.path.splitext(path)[1])
+            location = getattr(storage, 'location', None)
+            if minify and location and os.path.realpath(location) in project_dirs:
+                with open(self.path(path), encoding='utf-8') as f:
+                    minified = minify(f.read())
+                with open(self.path(path), 'w', encoding='utf-8') as f:
+                    f.write(minified)
+
+        # Hash the minified copies in STATIC_ROOT rather than the original sources
+        yield from super().post_process({path: (self, path) for path in paths}, dry_run, **options)
+
+        for name in set(self.hashed_files) | set(self.hashed_files.values()):
+            if os.path.splitext(name)[1] in COMPRESSIBLE and self.exists(name):
+                compress(self.path(name))
+
+
+def _accepted_suffixes(header):
+    """Precompressed variants the Accept-Encoding header allows, best first"""
+    quality = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        params = params.strip()
+        try:
+            quality[coding.strip().lower()] = float(params[2:]) if params.startswith('q=') else 1.0
+        except ValueError:
+            continue
+    return [suffix for coding, suffix in (('br', '.br'), ('gzip', '.gz'))
+            if quality.get(coding, quality.get('*', 0)) > 0]
+
+
+@require_safe
+def serve(request, path):
+    """
+    Serve a file from STATIC_ROOT, precompressed when the client allows it.
+    Hashed names are immutable; anything else is revalidated on every use.
+    """
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Not found')
+    if not os.path.isfile(full_path):
+        raise Http404('Not found')
+
+    immutable = path in set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+    mtime = os.stat(full_path).st_mtime
+    if not immutable and not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), mtime):
+        return HttpResponseNotModified()
+
+    content_type, _ = mimetypes.guess_type(full_path)
+    encoding = None
+    for suffix in _accepted_suffixes(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+        if os.path.isfile(full_path + suffix):
+            full_path += suffix
+            encoding = 'br' if suffix == '.br' else 'gzip'
+            break
+
+    response = FileResponse(open(full_path, 'rb'), content_type=content_type or 'application/octet-stream')
+    response.headers.pop('Content-Disposition', None)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ['Accept-Encoding'])
+    response['Cache-Control'] = IMMUTABLE if immutable else 'no-cache'
+    if not immutable:
+        response['Last-Modified'] = http_date(mtime)
+    return response
@@ -0,0 +1,325 @@
+"""
+Reproducible synthetic data at any scale, for benchmarks and profiling.
+
+`generate()` creates vendors, RFPs with their items and requirements, send
+logs, and proposals with their priced lines and compliance with bulk_create
+in batches, one transaction per chunk of RFPs, so millions of rows take
+minutes rather than hours. Everything is drawn from one seeded RNG: the
+same seed and sizes always produce the same rows. Email bodies come from a
+pool of varied texts stored once as Blobs; identical texts share a Blob
+anyway, so the pool keeps the blob table small without making every
+proposal read the same.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import line_items, requirement_library
+from .models import (Blob, Proposal, ProposalLineItem, RequirementCompliance, RFP, RFPItem, RFPRequirement,
+                     RFPSendLog, Vendor)
+
+BATCH_SIZE = 5000
+# RFPs generated and committed together
+CHUNK_SIZE = 2000
+BODY_POOL_SIZE = 500
+
+STATUS_WEIGHTS = {'draft': 15, 'sent': 45, 'review': 25, 'completed': 10, 'cancelled': 5}
+# Statuses whose RFP went out to vendors, and which of those collect replies
+INVITED_STATUSES = {'sent', 'review', 'completed', 'cancelled'}
+REPLY_STATUSES = {'sent', 'review', 'completed'}
+COMPLIANCE_WEIGHTS = {'yes': 70, 'partial': 20, 'no': 10}
+
+CATEGORIES = {
+    'IT': [
+        ('Laptop', 'Intel i7, 16GB RAM, 512GB SSD', 1200),
+        ('Monitor', '27 inch 4K IPS', 350),
+        ('Docking station', 'USB-C, dual display', 180),
+        ('Network switch', '48 port managed PoE', 2400),
+        ('Server', '2U rack, 256GB RAM', 9500),
+    ],
+    'Office': [
+        ('Printer paper', 'A4, 80gsm, box of 5 reams', 30),
+        ('Toner cartridge', 'High yield, black', 95),
+        ('Whiteboard', '180x120cm magnetic', 220),
+        ('Label printer', 'Thermal, 62mm', 140),
+    ],
+    'Furniture': [
+        ('Office chair', 'Ergonomic, adjustable lumbar support', 420),
+        ('Standing desk', 'Electric, 160x80cm', 650),
+        ('Filing cabinet', '4 drawer, lockable', 260),
+        ('Meeting table', 'Seats 10', 1800),
+    ],
+    'Facilities': [
+        ('Cleaning service', 'Daily office cleaning, monthly', 3200),
+        ('HVAC maintenance', 'Quarterly service visit', 1500),
+        ('Security guard', '24/7 coverage, monthly', 14000),
+    ],
+    'Software': [
+        ('Office suite license', 'Annual, per seat', 150),
+        ('Endpoint protection', 'Annual, per device', 45),
+        ('Project management tool', 'Annual, per seat', 120),
+    ],
+}
+
+REQUIREMENTS = [
+    'New units only with original packaging',
+    'On-site warranty support required',
+    'Must include installation services',
+    'Delivery within the specified timeframe',
+    'ISO 9001 certified supplier',
+    'Itemized pricing for every line',
+    'Net 30 payment terms or better',
+    'Minimum 3 year warranty',
+    'Energy Star certified where applicable',
+    'Dedicated account manager',
+    'Recycling of replaced equipment',
+    'Training session for staff',
+    'Replacement within 48 hours for defective units',
+    'Compliance with local safety regulations',
+    'Quote valid for at least 60 days',
+]
+
+PAYMENT_TERMS = ['Net 15', 'Net 30', 'Net 45', 'Net 60', '50% upfront, 50% on delivery']
+WARRANTIES = ['1 year', '2 years', '3 years', '5 years', '90 days']
+
+NAME_PARTS = (
+    ['Apex', 'Blue', 'Summit', 'Northern', 'Pioneer', 'Metro', 'Global', 'Bright', 'Prime', 'Silver',
+     'Harbor', 'Vertex', 'Evergreen', 'Atlas', 'Quantum', 'Crescent', 'Keystone', 'Redwood'],
+    ['Tech', 'Office', 'Supply', 'Systems', 'Solutions', 'Works', 'Trading', 'Logistics', 'Electronics',
+     'Interiors', 'Services', 'Networks'],
+    ['Inc.', 'LLC', 'Ltd.', 'Co.', 'Group', 'Partners'],
+)
+FIRST_NAMES = ['Alex', 'Sam', 'Priya', 'Chen', 'Maria', 'Omar', 'Lena', 'Kofi', 'Hana', 'Diego', 'Ivan', 'Aisha']
+LAST_NAMES = ['Smith', 'Patel', 'Garcia', 'Kim', 'Okafor', 'Novak', 'Rossi', 'Haddad', 'Silva', 'Tanaka']
+
+GREETINGS = ['Hello,', 'Dear procurement team,', 'Hi there,', 'Good morning,', 'Thank you for the invitation.']
+OPENERS = [
+    'Please find our proposal for your request below.',
+    'We are pleased to submit our quotation.',
+    'Following your RFP, here is our offer.',
+    'As requested, we have prepared pricing for the items listed.',
+]
+CLOSERS = [
+    'Let us know if you need any clarification.',
+    'We look forward to working with you.',
+    'This quote is valid for 60 days.',
+    'Happy to schedule a call to walk through the details.',
+]
+
+
+def _vendor_rows(rng, count, prefix, start):
+    categories = list(CATEGORIES)
+    for i in range(start, start + count):
+        first, second, suffix = (rng.choice(part) for part in NAME_PARTS)
+        yield Vendor(
+            name=f'{first} {second} {suffix} #{i}',
+            email=f'{prefix}-{i:07d}@{second.lower()}{rng.randint(1, 99)}.example.com',
+            contact_person=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            phone=f'555{rng.randint(0, 9999999):07d}',
+            category=rng.choice(categories),
+            rating=round(min(max(rng.gauss(4.0, 0.6), 1.0), 5.0), 1),
+        )
+
+
+def _rfp(rng, now, prefix):
+    category = rng.choice(list(CATEGORIES))
+    items = [
+        {'name': name, 'quantity': rng.choice([1, 2, 5, 10, 20, 50, 100]), 'specifications': spec}
+        for name, spec, _ in rng.sample(CATEGORIES[category], rng.randint(1, min(3, len(CATEGORIES[category]))))
+    ]
+    unit_prices = {name: price for name, _, price in CATEGORIES[category]}
+    budget = sum(item['quantity'] * unit_prices[item['name']] for item in items) * rng.uniform(0.9, 1.4)
+    names = ' and '.join(item['name'].lower() for item in items)
+    status = rng.choices(list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()))[0]
+    requirements = rng.sample(REQUIREMENTS, rng.randint(2, 6))
+    rfp = RFP(
+        title=f'{category} purchase: {names}'[:200],
+        description=f'We need {names} for the {rng.choice(["head office", "new branch", "warehouse", "lab"])}.',
+        structured_data={'synthetic': prefix, 'category': category, 'items': items},
+        status=status,
+        deadline=now + timedelta(days=rng.randint(-60, 60), hours=rng.randint(0, 23)),
+        total_budget=Decimal(f'{min(budget, 99999999):.2f}'),
+        delivery_days=rng.choice([7, 14, 21, 30, 45, 60]),
+        payment_terms=rng.choice(PAYMENT_TERMS),
+        warranty=rng.choice(WARRANTIES),
+        requirements=requirements,
+    )
+    return rfp, category, items, unit_prices
+
+
+def _reply_body(rng):
+    lines = [rng.choice(GREETINGS), '', rng.choice(OPENERS), '']
+    for _ in range(rng.randint(1, 4)):
+        name, spec, price = rng.choice(rng.choice(list(CATEGORIES.values())))
+        lines.append(f'- {name} ({spec}): {rng.randint(1, 100)} x ${price * rng.uniform(0.8, 1.2):,.2f}')
+    lines += [
+        '',
+        f'Delivery in {rng.randint(5, 60)} days. Payment terms: {rng.choice(PAYMENT_TERMS)}. '
+        f'Warranty: {rng.choice(WARRANTIES)}.',
+        '',
+        rng.choice(CLOSERS),
+        '',
+        f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+    ]
+    return '\n'.join(lines)
+
+
+def _body_pool(rng, size):
+    blobs = {}
+    for _ in range(size):
+        blob = Blob.for_text(_reply_body(rng))
+        blobs.setdefault(blob.digest, blob)
+    Blob.save_pending(*blobs.values())
+    return list(blobs.values())
+
+
+def _proposal(rng, rfp, vendor_id, items, unit_prices, body, parsed_rate):
+    quoted = [
+        {**item, 'unit_price': round(unit_prices[item['name']] * rng.lognormvariate(0, 0.12), 2)}
+        for item in items
+    ]
+    total = min(sum(item['quantity'] * item['unit_price'] for item in quoted), 99999999)
+    proposal = Proposal(
+        rfp=rfp,
+        vendor_id=vendor_id,
+        email_subject=f'Re: {rfp.title}'[:300],
+        email_body_blob=body,
+        raw_response_blob=body,
+    )
+    # The rest form a backlog of unparsed replies, as after a busy inbox check
+    if rng.random() < parsed_rate:
+        delivery_days = max(1, int(rfp.delivery_days * rng.uniform(0.6, 1.3)))
+        terms = rng.choice(PAYMENT_TERMS)
+        warranty = rng.choice(WARRANTIES)
+        score = round(rng.triangular(40, 100, 85), 1)
+        proposal.total_price = Decimal(f'{total:.2f}')
+        proposal.proposed_delivery_days = delivery_days
+        proposal.proposed_terms = terms
+        proposal.warranty_offered = warranty
+        proposal.compliance_score = score
+        proposal.is_preferred = rng.random() < 0.05
+        proposal.is_parsed = True
+        proposal.parsed_data = {
+            'total_price': float(proposal.total_price),
+            'delivery_days': delivery_days,
+            'payment_terms': terms,
+            'warranty': warranty,
+            'compliance_score': score,
+            'items': quoted,
+        }
+    return proposal
+
+
+def _compliance(rng, proposal, requirements):
+    """Compliance rows for a parsed proposal, whose score is then worked out from them"""
+    statuses = rng.choices(list(COMPLIANCE_WEIGHTS), weights=list(COMPLIANCE_WEIGHTS.values()), k=len(requirements))
+    if statuses:
+        score = round((statuses.count('yes') + statuses.count('partial') * 0.5) / len(statuses) * 100, 2)
+        proposal.compliance_score = score
+        proposal.parsed_data['compliance_score'] = score
+    return [
+        RequirementCompliance(proposal=proposal, requirement=requirement, status=status)
+        for requirement, status in zip(requirements, statuses)
+    ]
+
+
+def generate(vendors, rfps, invites_per_rfp=8, reply_rate=0.6, parsed_rate=0.9, seed=0, prefix='synthetic',
+             progress=None):
+    """
+    Create `vendors` vendors and `rfps` RFPs. RFPs that went out invite about
+    `invites_per_rfp` vendors, mostly from their own category, and each
+    invited vendor replies with probability `reply_rate`; `parsed_rate` of the
+    replies are already parsed. `progress`, when given, is called as
+    progress(rfps_done, counts) after each chunk. Returns the number of rows
+    created per model.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    counts = {'vendors': 0, 'rfps': 0, 'rfp_items': 0, 'requirement_links': 0, 'send_logs': 0, 'proposals': 0,
+              'line_items': 0, 'compliance': 0}
+    start = Vendor.objects.filter(email__startswith=f'{prefix}-').count()
+
+    with transaction.atomic():
+        created = Vendor.objects.bulk_create(_vendor_rows(rng, vendors, prefix, start), batch_size=BATCH_SIZE)
+    counts['vendors'] = len(created)
+
+    by_category = {}
+    all_vendors = []
+    for vendor_id, category in Vendor.objects.filter(email__startswith=f'{prefix}-').values_list('id', 'category'):
+        by_category.setdefault(category, []).append(vendor_id)
+        all_vendors.append(vendor_id)
+    if not all_vendors:
+        return counts
+
+    bodies = _body_pool(rng, BODY_POOL_SIZE)
+    library = dict(zip(REQUIREMENTS, requirement_library.canonical(REQUIREMENTS)))
+    # Its own stream, so adding compliance left every other generated value as it was
+    compliance_rng = random.Random(f'{seed}-compliance')
+    low, high = max(1, invites_per_rfp // 2), max(1, invites_per_rfp + invites_per_rfp // 2)
+
+    done = 0
+    while done < rfps:
+        chunk = [_rfp(rng, now, prefix) for _ in range(min(CHUNK_SIZE, rfps - done))]
+        with transaction.atomic():
+            RFP.objects.bulk_create([rfp for rfp, *_ in chunk], batch_size=BATCH_SIZE)
+            rfp_items = {rfp.pk: line_items.rfp_item_rows(rfp, items) for rfp, _, items, _ in chunk}
+            RFPItem.objects.bulk_create([row for rows in rfp_items.values() for row in rows], batch_size=BATCH_SIZE)
+            links = [
+                RFPRequirement(rfp=rfp, requirement=library[text], position=position)
+                for rfp, *_ in chunk for position, text in enumerate(rfp.requirements)
+            ]
+            RFPRequirement.objects.bulk_create(links, batch_size=BATCH_SIZE)
+            send_logs, proposals = [], []
+            for rfp, category, items, unit_prices in chunk:
+                if rfp.status not in INVITED_STATUSES:
+                    continue
+                # Mostly vendors of the RFP's category, topped up from everyone
+                pool = by_category.get(category, [])
+                k = min(rng.randint(low, high), len(all_vendors))
+                invited = set(rng.sample(pool, min(k, len(pool)))) if rng.random() < 0.8 else set()
+                while len(invited) < k:
+                    invited.add(rng.choice(all_vendors))
+                for vendor_id in sorted(invited):
+                    send_logs.append(RFPSendLog(
+                        rfp=rfp, vendor_id=vendor_id, email_subject=f'RFP: {rfp.title}'[:300], is_sent=True,
+                    ))
+                    if rfp.status in REPLY_STATUSES and rng.random() < reply_rate:
+                        proposals.append(_proposal(rng, rfp, vendor_id, items, unit_prices, rng.choice(bodies), parsed_rate))
+            RFPSendLog.objects.bulk_create(send_logs, batch_size=BATCH_SIZE)
+            compliance = [
+                row
+                for proposal in proposals if proposal.is_parsed
+                for row in _compliance(compliance_rng, proposal, [library[text] for text in proposal.rfp.requirements])
+            ]
+            Proposal.objects.bulk_create(proposals, batch_size=BATCH_SIZE)
+            quotes = [
+                row
+                for proposal in proposals if proposal.is_parsed
+                for row in line_items.line_item_rows(proposal, proposal.parsed_data['items'], rfp_items[proposal.rfp_id])
+            ]
+            ProposalLineItem.objects.bulk_create(quotes, batch_size=BATCH_SIZE)
+            RequirementCompliance.objects.bulk_create(compliance, batch_size=BATCH_SIZE)
+
+        done += len(chunk)
+        counts['rfps'] += len(chunk)
+        counts['rfp_items'] += sum(len(rows) for rows in rfp_items.values())
+        counts['requirement_links'] += len(links)
+        counts['send_logs'] += len(send_logs)
+        counts['proposals'] += len(proposals)
+        counts['line_items'] += len(quotes)
+        counts['compliance'] += len(compliance)
+        if progress:
+            progress(done, counts)
+    return counts
+
+
+def describe(counts, elapsed):
+    rows = sum(counts.values())
+    return (f"{counts['vendors']:,} vendors, {counts['rfps']:,} RFPs, {counts['rfp_items']:,} RFP items, "
+            f"{counts['requirement_links']:,} RFP requirements, {counts['send_logs']:,} send logs, "
+            f"{counts['proposals']:,} proposals, {counts['line_items']:,} priced lines, "
+            f"{counts['compliance']:,} compliance answers ({rows:,} rows in {elapsed:.1f}s, {rows / max(elapsed, 1e-9):,.0f} rows/s)")
+
@@ -1,3 +1,947 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, TransactionTestCase, modify_settings, override_settings
+from django.utils import timezone
+
+from . import (async_views, benchmarks, events, exports, fast_serializers, jobs, json_codec, line_items, loadtest, logs, metrics, profiling,
+               requirement_library, search, static_assets, synthetic_data, views)
+from .ai_services import AIService
+from .email_services import EmailService
+from .inbox_daemon import InboxSchedule
+from .management.commands import bench_startup
+from .models import (Blob, Event, Vendor, RFP, RFPItem, Proposal, ProposalLineItem, RequirementCompliance, RFPRequirement,
+                     RFPSendLog, Worker)
+from .serializers import ProposalSummarySerializer, RFPSerializer, VendorSerializer
+from .query_plans import capture_query_plans, full_scans
+from .vendor_import import import_vendors
+
+
+class QueryPlanTests(TestCase):
+    """
+    Runs the views and services against a large synthetic dataset and fails
+    when any query they issue has to scan a whole table
+    """
+    VENDORS = 5000
+    RFPS = 500
+    VENDORS_PER_RFP = 20
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        body = Blob.for_text("Dear Procurement Team,\n\nPlease find our proposal attached.")
+        Blob.save_pending(body)
+
+        vendors = Vendor.objects.bulk_create([
+            Vendor(name=f"Vendor {i}", email=f"vendor{i}@example.com", category='IT')
+            for i in range(cls.VENDORS)
+        ], batch_size=1000)
+        rfps = RFP.objects.bulk_create([
+            RFP(
+                title=f"RFP {i}",
+                description="Synthetic RFP",
+                deadline=now + timedelta(days=14),
+                status='sent' if i < 5 else 'completed',
+                requirements=['On-site warranty support', 'Delivery within 30 days'],
+            )
+            for i in range(cls.RFPS)
+        ], batch_size=1000)
+
+        send_logs, proposals = [], []
+        for i, rfp in enumerate(rfps):
+            for j in range(cls.VENDORS_PER_RFP):
+                vendor = vendors[(i * cls.VENDORS_PER_RFP + j) % cls.VENDORS]
+                send_logs.append(RFPSendLog(rfp=rfp, vendor=vendor, email_subject=rfp.title, email_body_blob=body))
+                # Leave the last vendor of each open RFP without a proposal
+                if j < cls.VENDORS_PER_RFP - 1:
+                    proposals.append(Proposal(
+                        rfp=rfp,
+                        vendor=vendor,
+                        email_subject=f"Proposal for RFP: {rfp.title}",
+                        email_body_blob=body,
+                        raw_response_blob=body,
+                        total_price=1000 + j,
+                        proposed_delivery_days=20 + j,
+                        compliance_score=j,
+                        is_parsed=not (rfp.status == 'sent' and j % 4 == 0),
+                    ))
+        RFPSendLog.objects.bulk_create(send_logs, batch_size=1000)
+        Proposal.objects.bulk_create(proposals, batch_size=1000)
+
+        cls.open_rfp = rfps[0]
+        cls.vendor = vendors[cls.VENDORS_PER_RFP - 1]
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertNoFullScans(self, plans):
+        offenders = [(sql, scans) for sql, plan in plans for scans in [full_scans(plan)] if scans]
+        self.assertFalse(offenders, '\n\n'.join(f"{scans}\n{sql}" for sql, scans in offenders))
+
+    def imap_stub(self):
+        message = (
+            f"From: {self.vendor.name} <{self.vendor.email}>\r\n"
+            f"Subject: Re: Request for Proposal: {self.open_rfp.title}\r\n"
+            "\r\nOur quote is $1,200 with delivery in 20 days.\r\n"
+        ).encode()
+        imap = mock.MagicMock()
+        imap.search.return_value = ('OK', [b'1'])
+        imap.fetch.return_value = ('OK', [(b'1 (RFC822)', message)])
+        return mock.patch('imaplib.IMAP4_SSL', return_value=imap)
+
+    def test_read_views(self):
+        urls = [
+            '/api/vendors/',
+            f'/api/vendors/{self.vendor.pk}/',
+            '/api/rfps/',
+            f'/api/rfps/{self.open_rfp.pk}/',
+            '/api/proposals/',
+            f'/api/proposals/?rfp_id={self.open_rfp.pk}',
+            '/api/proposals/?fields=id,vendor_name,total_price',
+            f'/api/proposals/{Proposal.objects.first().pk}/',
+            f'/api/rfps/{self.open_rfp.pk}/item-prices/',
+            f'/api/rfps/{self.open_rfp.pk}/compliance/',
+            '/api/debug/status/',
+        ]
+        for url in urls:
+            with self.subTest(url=url), capture_query_plans() as plans:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+            self.assertNoFullScans(plans)
+
+    def test_write_views(self):
+        vendor_ids = list(Vendor.objects.order_by('-pk').values_list('pk', flat=True)[:5])
+        with self.imap_stub(), capture_query_plans() as plans:
+            self.client.post(f'/api/rfps/{self.open_rfp.pk}/send/', {'vendor_ids': vendor_ids}, content_type='application/json')
+            self.client.post('/api/check-emails/')
+            self.client.get(f'/api/rfps/{self.open_rfp.pk}/compare/')
+        self.assertNoFullScans(plans)
+
+    def test_services(self):
+        with self.imap_stub(), capture_query_plans() as plans:
+            EmailService.check_incoming_emails_real()
+            EmailService.check_incoming_emails_demo()
+            EmailService.parse_new_proposals()
+            InboxSchedule().nearest_deadline(timezone.now())
+        self.assertNoFullScans(plans)
+
+
+class BlobTests(TestCase):
+    def test_unreferenced_blobs_are_deleted(self):
+        vendor = Vendor.objects.create(name='Acme', email='acme@example.com')
+        rfp = RFP.objects.create(title='Laptops', description='d', deadline=timezone.now())
+        proposal = Proposal.objects.create(rfp=rfp, vendor=vendor, email_subject='Quote', email_body='first draft',
+                                           raw_response='shared text')
+        old_body = proposal.email_body_blob_id
+        proposal.email_body = 'second draft'
+        proposal.save()
+        Blob.save_pending(Blob.for_text('just stored'))
+        Blob.objects.update(created_at=timezone.now() - timedelta(hours=2))
+        Blob.save_pending(Blob.for_text('not yet used'))
+
+        out = io.StringIO()
+        call_command('delete_unused_blobs', stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'Deleted 2 unused blob(s)')
+        self.assertEqual(set(Blob.objects.values_list('digest', flat=True)), {
+            proposal.email_body_blob_id, proposal.raw_response_blob_id, Blob.for_text('not yet used').digest,
+        })
+        self.assertNotEqual(proposal.email_body_blob_id, old_body)
+        proposal.refresh_from_db()
+        self.assertEqual((proposal.email_body, proposal.raw_response), ('second draft', 'shared text'))
+
+
+class VendorImportTests(TestCase):
+    def test_csv_upserts_on_email_and_reports_bad_rows(self):
+        Vendor.objects.create(name='Old Name', email='a@example.com', category='IT')
+        rows = [
+            b'name,email,category,rating\n',
+            b'New Name,a@example.com,Office,4.5\n',
+            b'Second,b@example.com,IT,3\n',
+            b'Broken,not-an-email,IT,1\n',
+        ]
+        report = import_vendors(iter(rows), 'csv', chunk_size=1)
+
+        self.assertEqual((report['rows'], report['imported'], report['failed']), (3, 2, 1))
+        self.assertEqual(report['errors'][0]['line'], 4)
+        self.assertIn('email', report['errors'][0]['errors'])
+        self.assertEqual(Vendor.objects.count(), 2)
+        self.assertEqual(Vendor.objects.get(email='a@example.com').name, 'New Name')
+
+    def test_fewer_columns_leave_the_others_alone(self):
+        Vendor.objects.create(name='Old Name', email='a@example.com', category='IT', rating=4.5, is_active=False,
+                              contact_person='Ann')
+        rows = [b'name,email,phone\n', b'New Name,a@example.com,555\n', b'Fresh,c@example.com,777\n']
+        report = import_vendors(iter(rows), 'csv')
+
+        self.assertEqual(report['imported'], 2)
+        vendor = Vendor.objects.get(email='a@example.com')
+        self.assertEqual((vendor.name, vendor.phone), ('New Name', '555'))
+        self.assertEqual((vendor.category, vendor.rating, vendor.is_active, vendor.contact_person),
+                         ('IT', 4.5, False, 'Ann'))
+        self.assertEqual(Vendor.objects.get(email='c@example.com').phone, '777')
+
+    def test_bad_encoding_and_duplicate_emails_are_reported(self):
+        rows = [
+            b'name,email\n',
+            b'First,a@example.com\n',
+            b'Caf\xe9 Ltd,b@example.com\n',
+            b'Second,a@example.com\n',
+        ]
+        report = import_vendors(iter(rows), 'csv')
+
+        self.assertEqual((report['rows'], report['imported'], report['failed']), (3, 1, 2))
+        self.assertEqual(sorted(error['line'] for error in report['errors']), [2, 3])
+        self.assertEqual(Vendor.objects.get().name, 'Second')
+
+        report = import_vendors(iter([b'{"name": "A", "email": "z@example.com"}\n', b'{"name": "\xff"}\n']), 'jsonl')
+        self.assertEqual((report['imported'], report['failed']), (1, 1))
+        self.assertEqual(report['errors'][0]['errors'], {'non_field_errors': ['Row is not valid UTF-8']})
+
+    def test_jsonl_upload(self):
+        upload = SimpleUploadedFile('vendors.jsonl', b'{"name": "A", "email": "a@example.com"}\nnot json\n')
+        response = self.client.post('/api/vendors/import/', {'file': upload})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['imported'], 1)
+        self.assertEqual(response.json()['errors'][0]['line'], 2)
+
+
+class ExportTests(TestCase):
+    def test_proposal_export_streams_filtered_rows(self):
+        vendor = Vendor.objects.create(name='A', email='a@example.com')
+        rfp = RFP.objects.create(title='Laptops', description='d', deadline=timezone.now())
+        Proposal.objects.create(rfp=rfp, vendor=vendor, email_subject='Quote', email_body='body', raw_response='body',
+                                total_price='1200.50', is_parsed=True)
+
+        response = self.client.get(f'/api/proposals/export/?file_type=jsonl&status=parsed&rfp_id={rfp.pk}')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(len(lines), 1)
+        self.assertIn('"total_price": 1200.5', lines[0])
+        response = self.client.get('/api/proposals/export/?status=unparsed')
+        self.assertEqual(b''.join(response.streaming_content).decode().count('\n'), 1)
+
+    def test_invalid_filters_are_rejected(self):
+        for query in ('rfp_id=abc', 'date_from=2024-02-30', 'date_to=yesterday', 'status=parsed'):
+            self.assertEqual(self.client.get(f'/api/comparisons/export/?{query}').status_code, 400)
+        response = self.client.get('/api/proposals/export/?status=accepted')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Invalid status')
+        self.assertEqual(self.client.get('/api/comparisons/export/?status=sent').status_code, 200)
+
+    async def test_asgi_export_streams_asynchronously(self):
+        rfp = await RFP.objects.acreate(title='Laptops', description='d', deadline=timezone.now())
+        for i in range(3):
+            vendor = await Vendor.objects.acreate(name=f'Vendor {i}', email=f'vendor{i}@example.com')
+            await Proposal.objects.acreate(rfp=rfp, vendor=vendor, email_subject=f'Quote {i}', email_body='body',
+                                           raw_response='body')
+
+        with mock.patch.object(exports, 'CHUNK_SIZE', 2):
+            response = await self.async_client.get('/api/proposals/export/')
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(b''.join(chunks).decode().count('\n'), 4)
+
+
+class SearchTests(TestCase):
+    def test_index_follows_saves_and_deletes(self):
+        vendor = Vendor.objects.create(name='Acme', email='acme@example.com')
+        rfp = RFP.objects.create(title='Laptops', description='Developer laptops', deadline=timezone.now(),
+                                 requirements=['On-site warranty support'])
+        proposal = Proposal.objects.create(rfp=rfp, vendor=vendor, email_subject='Quote',
+                                           email_body='x', raw_response='We include on-site installation.')
+
+        response = self.client.get('/api/search/?q=on-site installation')
+        results = response.json()['results']
+        self.assertEqual([(r['kind'], r['object_id']) for r in results], [('proposal', proposal.pk)])
+        self.assertIn('<mark>installation</mark>', results[0]['snippet'])
+        self.assertEqual(results[0]['vendor_name'], 'Acme')
+
+        proposal.delete()
+        self.assertEqual(self.client.get('/api/search/?q=installation').json()['count'], 0)
+        self.assertEqual(self.client.get('/api/search/?q=warranty&kind=rfp').json()['count'], 1)
+
+    def test_reindexes_only_when_indexed_fields_change(self):
+        vendor = Vendor.objects.create(name='Acme', email='acme@example.com')
+        rfp = RFP.objects.create(title='Laptops', description='d', deadline=timezone.now())
+        proposal = Proposal.objects.create(rfp=rfp, vendor=vendor, email_subject='Quote',
+                                           email_body='x', raw_response='We include installation.')
+
+        proposal = Proposal.objects.get(pk=proposal.pk)
+        with mock.patch.object(search, 'index_document') as index_document:
+            proposal.is_preferred = True
+            proposal.save()
+            proposal.raw_response = 'We include installation.'
+            proposal.save(update_fields=['raw_response_blob', 'is_preferred'])
+            RFP.objects.get(pk=rfp.pk).save()
+            index_document.assert_not_called()
+            proposal.email_subject = 'Revised quote'
+            proposal.save()
+            self.assertEqual(index_document.call_count, 1)
+
+        # In-place edits to an indexed JSON list count as changes
+        rfp = RFP.objects.get(pk=rfp.pk)
+        rfp.requirements.append('Onsite calibration')
+        rfp.save()
+        self.assertEqual(self.client.get('/api/search/?q=calibration&kind=rfp').json()['count'], 1)
+        rfp.requirements.append('Extended lifecycle')
+        rfp.save()
+        self.assertEqual(self.client.get('/api/search/?q=lifecycle&kind=rfp').json()['count'], 1)
+
+        vendor = Vendor.objects.get(pk=vendor.pk)
+        vendor.name = 'Zenith'
+        vendor.save()
+        self.assertEqual(self.client.get('/api/search/?q=zenith').json()['count'], 1)
+
+        import_vendors([b'{"name": "Nadir", "email": "acme@example.com"}\n'], 'jsonl')
+        self.assertEqual(self.client.get('/api/search/?q=zenith').json()['count'], 0)
+        self.assertEqual(self.client.get('/api/search/?q=nadir').json()['count'], 1)
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.rfp = RFP.objects.create(title='Laptops', description='d', deadline=timezone.now(),
+                                      total_budget=5000, delivery_days=30, requirements=['16GB RAM'])
+        for i in range(3):
+            vendor = Vendor.objects.create(name=f'Vendor {i}', email=f'v{i}@example.com')
+            Proposal.objects.create(rfp=self.rfp, vendor=vendor, email_subject='Quote',
+                                    email_body='x', raw_response='Price $4,000, delivery 20 days')
+
+    async def test_parse_then_compare_matches_sync_view(self):
+        with mock.patch.object(AIService, 'DEMO_MODE', True):
+            self.assertEqual(await EmailService.aparse_new_proposals(concurrency=2), 3)
+            request = AsyncRequestFactory().get(f'/api/rfps/{self.rfp.pk}/compare/')
+            response = await async_views.compare_proposals(request, pk=self.rfp.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(await Proposal.objects.filter(is_parsed=True).acount(), 3)
+
+        async_body = json.loads(response.content)
+        sync_body = (await self.async_client.get(f'/api/rfps/{self.rfp.pk}/compare/')).json()
+        self.assertEqual(async_body.keys(), sync_body.keys())
+        self.assertEqual(async_body['proposal_details'], sync_body['proposal_details'])
+
+    def test_parse_rejects_bodies_that_are_not_json_objects(self):
+        sync_view = views.ParseNaturalLanguageView.as_view()
+        for body in (b'{"text": ', b'[]', b'"10 laptops"', b'{}'):
+            request = AsyncRequestFactory().post('/api/parse-natural-language/', body, content_type='application/json')
+            response = async_to_sync(async_views.parse_natural_language)(request)
+            sync_response = sync_view(RequestFactory().post('/api/parse-natural-language/', body,
+                                                            content_type='application/json'))
+            self.assertEqual((response.status_code, sync_response.status_code), (400, 400))
+            self.assertEqual(json.loads(response.content).keys(), sync_response.data.keys())
+            if body == b'{"text": ':
+                self.assertIn('JSON parse error', json.loads(response.content)['detail'])
+
+
+class JobTests(TestCase):
+    def test_check_emails_job_runs_in_the_worker(self):
+        with mock.patch('imaplib.IMAP4_SSL', side_effect=OSError('offline')):
+            # Without a worker to pick the job up the request does the work itself
+            response = self.client.post('/api/check-emails/', HTTP_PREFER='respond-async')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['new_emails'], 0)
+
+            jobs.heartbeat('test-worker')
+            response = self.client.post('/api/check-emails/', HTTP_PREFER='respond-async')
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response['Location'], f"/api/jobs/{response.json()['id']}/")
+            # A second click reuses the queued job
+            self.assertEqual(self.client.post('/api/check-emails/', HTTP_PREFER='respond-async').json()['id'],
+                             response.json()['id'])
+
+            self.assertEqual(jobs.run_pending('test-worker'), 1)
+
+        job = self.client.get(response['Location']).json()
+        self.assertEqual((job['status'], job['progress'], job['attempts']), ('succeeded', 100, 1))
+        self.assertEqual(job['result']['new_emails'], 0)
+        self.assertEqual(self.client.post(f"/api/jobs/{job['id']}/cancel/").status_code, 409)
+
+    def test_failures_retry_then_give_up_and_cancel(self):
+        rfp = RFP.objects.create(title='Laptops', description='d', deadline=timezone.now())
+        job = jobs.enqueue('compare_proposals', rfp_id=rfp.pk)
+        jobs.run_pending('test-worker')
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.result['error'], 'Need at least 1 parsed proposal for comparison')
+
+        self.assertTrue(job.is_finished)
+
+        job = jobs.enqueue('check_emails')
+        self.assertFalse(job.is_finished)
+        with mock.patch.object(EmailService, 'check_incoming_emails', side_effect=RuntimeError('boom')):
+            jobs.run_pending('test-worker')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.error), ('queued', 1, 'boom'))
+        self.assertFalse(job.is_finished)
+        self.assertGreater(job.run_after, timezone.now())
+
+        response = self.client.post(f'/api/jobs/{job.pk}/cancel/')
+        self.assertEqual(response.json()['status'], 'cancelled')
+        self.assertIsNone(jobs.claim('test-worker'))
+
+
+class WorkerHeartbeatTests(TransactionTestCase):
+    def test_heartbeats_continue_while_a_handler_blocks(self):
+        def slow(job):
+            time.sleep(0.5)
+            return {}
+
+        with mock.patch.dict(jobs.HANDLERS, {'slow': slow}), mock.patch.object(jobs, 'HEARTBEAT_INTERVAL', 0.05), \
+                mock.patch('signal.signal'):
+            job = jobs.enqueue('slow')
+            call_command('run_jobs', '--burst', stdout=io.StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('succeeded', 1))
+        self.assertGreater(job.heartbeat_at, job.started_at + timedelta(seconds=0.2))
+        self.assertFalse(Worker.objects.exists())
+
+
+class EventStreamTests(TestCase):
+    def read_stream(self, **headers):
+        # Under WSGI the stream ends once it has sent what is there
+        response = self.client.get('/api/events/', **headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return b''.join(response.streaming_content).decode()
+
+    def test_resumes_after_last_event_id(self):
+        vendor = Vendor.objects.create(name='Acme', email='acme@example.com')
+        rfp = RFP.objects.create(title='Laptops', description='d', deadline=timezone.now())
+        first = events.latest_id()
+        proposal = Proposal.objects.create(rfp=rfp, vendor=vendor, email_subject='Quote',
+                                           email_body='x', raw_response='$900, 10 days')
+        EmailService._apply_parsed_data(proposal, {'total_price': 900, 'delivery_days': 10,
+                                                   'payment_terms': 'Net 30', 'warranty': '1 year'})
+
+        body = self.read_stream(HTTP_LAST_EVENT_ID=str(first))
+        self.assertTrue(body.startswith('retry: '))
+        self.assertIn(f'id: {first + 1}\nevent: proposal.created\ndata: {{"id":{proposal.pk}', body)
+        self.assertIn('event: proposal.parsed', body)
+        # Carrying what the proposal cards show
+        parsed = json.loads(body.split('event: proposal.parsed\ndata: ')[1].split('\n')[0])['proposal']
+        self.assertEqual((parsed['vendor_name'], parsed['rfp_title'], parsed['total_price'], parsed['is_parsed']),
+                         ('Acme', 'Laptops', 900.0, True))
+
+        body = self.read_stream(HTTP_LAST_EVENT_ID=str(first + 1))
+        self.assertNotIn('proposal.created', body)
+        self.assertIn('proposal.parsed', body)
+
+        # A fresh connection starts at the newest event; a pruned id asks for a reset
+        self.assertNotIn('event: proposal', self.read_stream())
+        Event.objects.filter(pk__lte=first + 1).delete()
+        self.assertIn('event: reset', self.read_stream(HTTP_LAST_EVENT_ID='0'))
+
+
+class JsonCodecTests(TestCase):
+    def test_renders_datetimes_and_decimals_natively(self):
+        data = {'when': datetime(2024, 5, 1, 10, 30, 0, 123456, tzinfo=dt_timezone.utc), 'price': Decimal('1.50'), 1: 'x'}
+        self.assertEqual(json_codec.ORJSONRenderer().render(data),
+                         b'{"when":"2024-05-01T10:30:00.123456Z","price":1.5,"1":"x"}')
+        self.assertEqual(json_codec.ORJSONRenderer().render({'big': 2 ** 70}), b'{"big":1180591620717411303424}')
+
+    def test_api_round_trip(self):
+        response = self.client.post('/api/vendors/', json.dumps({'name': 'Acme – Ünited', 'email': 'acme@example.com'}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['name'], 'Acme – Ünited')
+        self.assertTrue(response.json()['created_at'].endswith('Z'))
+
+        when = datetime(2024, 5, 1, 10, 30, 0, 123456, tzinfo=dt_timezone.utc)
+        self.assertEqual(json_codec.JsonResponse({'when': when}).content, b'{"when":"2024-05-01T10:30:00.123456Z"}')
+        event = events.publish('test', when=when, price=Decimal('1.50'))
+        self.assertIn('data: {"when":"2024-05-01T10:30:00.123456Z","price":1.5}', events.format_event(event))
+
+        response = self.client.post('/api/vendors/', '{"name": ', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('JSON parse error', response.json()['detail'])
+
+    def test_large_responses_are_gzipped(self):
+        for i in range(30):
+            Vendor.objects.create(name=f'Vendor {i}', email=f'vendor{i}@example.com')
+        response = self.client.get('/api/vendors/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))), 30)
+
+        small = self.client.get(f'/api/vendors/{Vendor.objects.first().pk}/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(small.status_code, 200)
+        self.assertFalse(small.has_header('Content-Encoding'))
+
+        with mock.patch.object(events, 'STREAM_LIFETIME', 0):
+            stream = self.client.get('/api/events/', HTTP_ACCEPT_ENCODING='gzip')
+            self.assertFalse(stream.has_header('Content-Encoding'))
+            b''.join(stream.streaming_content)
+
+
+class InboxScheduleTests(TestCase):
+    def test_interval_follows_deadlines_and_mail(self):
+        now = timezone.now()
+        schedule = InboxSchedule(min_interval=60, max_interval=1800, idle_interval=3600, jitter=0)
+        self.assertEqual(schedule.next_interval(now), 3600)
+
+        RFP.objects.create(title='Far', description='d', deadline=now + timedelta(days=10), status='sent')
+        self.assertEqual(schedule.next_interval(now), 1800)
+        rfp = RFP.objects.create(title='Near', description='d', deadline=now + timedelta(hours=1), status='sent')
+        self.assertEqual(schedule.next_interval(now), 60)
+        # Just past the deadline late replies are still expected
+        self.assertEqual(schedule.next_interval(rfp.deadline + timedelta(minutes=30)), 60)
+
+        schedule.record_poll(new_emails=0)
+        schedule.record_poll(new_emails=0)
+        self.assertEqual(schedule.next_interval(now), 240)
+        schedule.record_poll(new_emails=3)
+        self.assertEqual(schedule.next_interval(now), 60)
+
+
+class SendRFPTests(TestCase):
+    def test_fan_out_is_bulk_and_resends_update_logs(self):
+        rfp = RFP.objects.create(title='Laptops', description='d', deadline=timezone.now(), requirements=['16GB RAM'])
+        vendors = Vendor.objects.bulk_create([Vendor(name=f'V{i}', email=f'v{i}@example.com') for i in range(60)])
+        ids = [vendor.pk for vendor in vendors]
+
+        # The status change does not touch the search index
+        with self.assertNumQueries(8):
+            EmailService.send_rfp_to_vendors(rfp, ids[:5])
+        with self.assertNumQueries(8):
+            results = EmailService.send_rfp_to_vendors(rfp, ids)
+
+        self.assertEqual({r['status'] for r in results}, {'sent'})
+        self.assertEqual(sum(r['resent'] for r in results), 5)
+        self.assertEqual(RFPSendLog.objects.filter(rfp=rfp).count(), 60)
+        self.assertEqual(rfp.vendors.count(), 60)
+        self.assertIn('• 16GB RAM', RFPSendLog.objects.filter(rfp=rfp).first().email_body)
+
+
+@modify_settings(MIDDLEWARE={'prepend': 'rfp.profiling.ProfilingMiddleware'})
+class ProfilingTests(TestCase):
+    def setUp(self):
+        profiling.install_sql_wrapper(None, connection)
+        self.addCleanup(connection.execute_wrappers.remove, profiling.sql_wrapper)
+
+    def test_server_timing_breaks_down_the_request(self):
+        Vendor.objects.create(name='Acme', email='acme@example.com')
+        timing = self.client.get('/api/vendors/')['Server-Timing']
+        self.assertRegex(timing, r'^sql;dur=[\d.]+;desc="1 queries", serialize;dur=[\d.]+;desc="Serialization", total;dur=')
+
+        completion = mock.MagicMock(usage=mock.MagicMock(total_tokens=42, prompt_tokens=30, completion_tokens=12))
+        completion.choices[0].message.content = '{"title": "Laptops", "requirements": []}'
+        with mock.patch.object(AIService, 'DEMO_MODE', False), \
+                mock.patch('openai.ChatCompletion.create', return_value=completion):
+            response = self.client.post('/api/parse-natural-language/', {'text': '10 laptops'},
+                                        content_type='application/json')
+        self.assertIn('ai;dur=', response['Server-Timing'])
+        self.assertIn('desc="1 calls, 42 tokens"', response['Server-Timing'])
+
+
+class MetricsTests(TestCase):
+    def test_histogram_exposition(self):
+        histogram = metrics.Histogram('test_seconds', 'Test histogram', ['op'], buckets=(0.1, 1))
+        metrics.REGISTRY.remove(histogram)
+        histogram.observe(0.05, op='a "quoted"\nname')
+        histogram.observe(0.5, op='a "quoted"\nname')
+        histogram.observe(5, op='a "quoted"\nname')
+        self.assertEqual(histogram.render(), [
+            '# HELP test_seconds Test histogram',
+            '# TYPE test_seconds histogram',
+            'test_seconds_bucket{op="a \\"quoted\\"\\nname",le="0.1"} 1',
+            'test_seconds_bucket{op="a \\"quoted\\"\\nname",le="1"} 2',
+            'test_seconds_bucket{op="a \\"quoted\\"\\nname",le="+Inf"} 3',
+            'test_seconds_sum{op="a \\"quoted\\"\\nname"} 5.55',
+            'test_seconds_count{op="a \\"quoted\\"\\nname"} 3',
+        ])
+
+    def test_endpoint_reports_views_llm_and_queues(self):
+        vendor = Vendor.objects.create(name='Acme', email='acme@example.com')
+        rfp = RFP.objects.create(title='Laptops', description='d', deadline=timezone.now(), requirements=['16GB RAM'])
+        Proposal.objects.create(rfp=rfp, vendor=vendor, email_subject='Re: Laptops', email_body='b',
+                                raw_response='$900', proposed_terms='Net 30', warranty_offered='1 year')
+        jobs.enqueue('check_emails')
+
+        views_before = metrics.HTTP_REQUEST_SECONDS.count(view='vendor-list', method='GET', status=200)
+        self.client.get('/api/vendors/')
+        self.assertEqual(metrics.HTTP_REQUEST_SECONDS.count(view='vendor-list', method='GET', status=200),
+                         views_before + 1)
+
+        completion = mock.MagicMock(usage=mock.MagicMock(total_tokens=50, prompt_tokens=40, completion_tokens=10))
+        completion.choices[0].message.content = 'not json'
+        tokens_before = metrics.LLM_TOKENS.value(method='parse_vendor_response', type='prompt')
+        errors_before = metrics.LLM_ERRORS.value(method='parse_vendor_response')
+        parsed_before = metrics.PROPOSALS_PARSED.value(outcome='parsed')
+        with mock.patch.object(AIService, 'DEMO_MODE', False), \
+                mock.patch('openai.ChatCompletion.create', return_value=completion):
+            self.assertEqual(EmailService.parse_new_proposals(), 1)
+        self.assertEqual(metrics.LLM_TOKENS.value(method='parse_vendor_response', type='prompt'), tokens_before + 40)
+        self.assertEqual(metrics.LLM_ERRORS.value(method='parse_vendor_response'), errors_before + 1)
+        self.assertEqual(metrics.PROPOSALS_PARSED.value(outcome='parsed'), parsed_before + 1)
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        body = response.content.decode()
+        self.assertIn('# TYPE rfp_http_request_duration_seconds histogram', body)
+        self.assertIn('rfp_llm_request_duration_seconds_count{method="parse_vendor_response"}', body)
+        self.assertIn('rfp_job_queue_depth{status="queued"} 1', body)
+        self.assertIn('rfp_unparsed_proposals 0', body)
+
+
+class LoggingTests(TestCase):
+    def test_queue_handler_delivers_and_drains_on_close(self):
+        records = []
+        target = logging.Handler()
+        target.emit = records.append
+        handler = logs.QueueHandler([target])
+        logger = logging.getLogger('rfp.tests.queue')
+        logger.addHandler(handler)
+        try:
+            for i in range(100):
+                logger.warning("message %d", i)
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+        self.assertEqual([record.getMessage() for record in records], [f'message {i}' for i in range(100)])
+
+    def test_rate_limit_filter_samples_each_call_site(self):
+        log_filter = logs.RateLimitFilter(per_second=0.001, burst=2)
+
+        def record(level, line):
+            return logging.LogRecord('rfp', level, 'views.py', line, 'hello', None, None)
+
+        passed = [log_filter.filter(record(logging.DEBUG, 10)) for _ in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+        # Other call sites and higher levels are not affected
+        self.assertTrue(log_filter.filter(record(logging.DEBUG, 11)))
+        self.assertTrue(log_filter.filter(record(logging.INFO, 10)))
+
+        log_filter.sites[('rfp', 'views.py', 10)][0] = 1
+        sampled = record(logging.DEBUG, 10)
+        self.assertTrue(log_filter.filter(sampled))
+        self.assertEqual(sampled.getMessage(), 'hello [3 similar suppressed]')
+
+    def test_payload_is_redacted_and_capped(self):
+        payload = {
+            'title': 'Laptops',
+            'api_key': 'sk-live',
+            'structured_data': {'password': 'hunter2', 'notes': 'x' * 5000},
+            'requirements': [f'req {i}' for i in range(50)],
+        }
+        text = str(logs.Payload(payload))
+        self.assertNotIn('sk-live', text)
+        self.assertNotIn('hunter2', text)
+        self.assertIn('(5000 chars)', text)
+        self.assertIn('... 30 more', text)
+        with self.settings(LOG_PAYLOAD_MAX_CHARS=100):
+            self.assertTrue(str(logs.Payload(payload)).endswith(f'... ({len(text)} chars)'))
+
+
+class BenchmarkTests(TestCase):
+    @mock.patch.multiple(benchmarks, SERIALIZER_ROWS=10, INBOX_MESSAGES=5, FAN_OUT_VENDORS=10, PARSE_PROPOSALS=5,
+                         LOGGED_REQUESTS=2, JSON_ROWS=15)
+    def test_suite_runs_and_flags_regressions(self):
+        results = benchmarks.run(sizes=[10, 20], repeat=1)
+        self.assertEqual(set(results), {
+            'serialize_rfps[10]', 'serialize_proposals[10]', 'check_incoming_emails_real[5]',
+            'list_serializer_vendors[drf]', 'list_serializer_vendors[values]', 'list_serializer_rfps[drf]',
+            'list_serializer_rfps[values]', 'list_serializer_proposals[drf]', 'list_serializer_proposals[values]',
+            'send_rfp_to_vendors[10]', 'parse_new_proposals[5]',
+            'create_rfp_logged[sync]', 'create_rfp_logged[queued]',
+            'render_json[drf]', 'parse_json[drf]', 'render_json[orjson]', 'parse_json[orjson]',
+            'list_vendors[10]', 'list_rfps[10]', 'list_proposals[10]',
+            'list_vendors[20]', 'list_rfps[20]', 'list_proposals[20]',
+        })
+        # Measured before the other cases grew the dataset
+        self.assertEqual((results['list_vendors[10]']['rows'], results['list_rfps[10]']['rows']), (10, 10))
+        # Every case rolled back its own writes
+        self.assertFalse(RFP.objects.filter(title__startswith='Bench ').exists())
+        self.assertFalse(Proposal.objects.filter(is_parsed=False).exists())
+
+        baseline = benchmarks.baseline_document({
+            'list_vendors[10]': {'seconds': 1.0, 'rows': 10},
+            'list_rfps[10]': {'seconds': 1.0, 'rows': 10},
+        })
+        current = {
+            'list_vendors[10]': {'seconds': 1.2, 'rows': 10},
+            'list_rfps[10]': {'seconds': 1.3, 'rows': 10},
+            'list_proposals[10]': {'seconds': 9.0, 'rows': 10},
+        }
+        self.assertEqual(benchmarks.regressions(current, baseline, 0.25), [('list_rfps[10]', 1.0, 1.3)])
+
+
+class LineItemTests(TestCase):
+    def setUp(self):
+        self.rfp = RFP.objects.create(title='Office kit', description='d', deadline=timezone.now())
+        line_items.save_rfp_items(self.rfp, [
+            {'name': 'Laptop', 'quantity': 20, 'specifications': '16GB RAM'},
+            {'name': '27-inch Monitor', 'quantity': '15 units'},
+            'not an item',
+        ])
+
+    def quote(self, name, items):
+        vendor = Vendor.objects.create(name=name, email=f'{name.lower()}@example.com')
+        proposal = Proposal.objects.create(rfp=self.rfp, vendor=vendor, email_subject='Re', email_body='x',
+                                           raw_response='x', is_parsed=True)
+        line_items.save_line_items(proposal, items)
+        return proposal
+
+    def test_rfp_items_from_the_parser(self):
+        response = self.client.post('/api/rfps/', {'structured_data': {
+            'title': 'Laptops', 'description': 'Laptops for the team', 'total_budget': 50000, 'requirements': [],
+            'items': [{'name': 'Laptop', 'quantity': 20, 'specifications': '16GB RAM'}],
+        }}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(list(RFPItem.objects.filter(rfp_id=response.json()['id']).values_list('name', 'quantity')),
+                         [('Laptop', Decimal('20.00'))])
+        self.assertEqual([(item.name, item.quantity) for item in self.rfp.items.all()],
+                         [('Laptop', Decimal('20.00')), ('27-inch Monitor', Decimal('15.00'))])
+
+    def test_quoted_lines_are_matched_and_completed(self):
+        proposal = self.quote('Acme', [
+            {'name': 'Laptops', 'quantity': 20, 'unit_price': '$1,150.00'},
+            {'name': 'Dell 27-inch monitors', 'quantity': 15, 'total_price': 4500},
+            {'name': 'Installation', 'total_price': 'free'},
+        ])
+        laptop, monitor = self.rfp.items.all()
+        self.assertEqual(
+            [(line.rfp_item, line.unit_price, line.total_price) for line in proposal.line_items.all()],
+            [(laptop, Decimal('1150.00'), Decimal('23000.00')), (monitor, Decimal('300.00'), Decimal('4500.00')),
+             (None, None, None)],
+        )
+
+    def test_item_prices_in_one_query(self):
+        self.quote('Acme', [{'name': 'Laptop', 'quantity': 20, 'unit_price': 1150}])
+        self.quote('Bolt', [{'name': 'laptop', 'quantity': 20, 'unit_price': 1000},
+                            {'name': '27-inch Monitor', 'quantity': 15, 'unit_price': 310}])
+        self.quote('Core', [{'name': 'Laptop', 'quantity': 20}])
+
+        with self.assertNumQueries(1):
+            laptop, monitor = line_items.item_prices(self.rfp)
+        self.assertEqual(
+            (laptop['vendor_count'], laptop['lowest_unit_price'], laptop['average_unit_price'],
+             laptop['highest_unit_price'], laptop['cheapest_vendor_name']),
+            (2, Decimal('1000.00'), Decimal('1075.00'), Decimal('1150.00'), 'Bolt'),
+        )
+        self.assertEqual((monitor['vendor_count'], monitor['cheapest_vendor_name']), (1, 'Bolt'))
+
+        response = self.client.get(f'/api/rfps/{self.rfp.pk}/item-prices/')
+        self.assertEqual(response.json()['items'][0]['lowest_unit_price'], 1000.0)
+
+
+class RequirementLibraryTests(TestCase):
+    def test_wordings_share_a_requirement(self):
+        texts = ['On-site warranty support required', 'on-site Warranty Support', 'Must include installation services']
+        warranty, same, installation = requirement_library.canonical(texts)
+        self.assertEqual(warranty, same)
+        self.assertNotEqual(warranty, installation)
+        self.assertEqual(warranty.text, 'On-site warranty support required')
+        # Known wordings: the alias lookup and the requirements, nothing written
+        with self.assertNumQueries(2):
+            self.assertEqual(requirement_library.canonical(texts), [warranty, same, installation])
+
+    def test_embeddings_match_new_wordings_once(self):
+        vectors = {
+            'On-site warranty support': [1.0, 0.0, 0.0],
+            'Onsite warranty service': [0.99, 0.1, 0.0],
+            'ISO 9001 certified supplier': [0.0, 1.0, 0.0],
+        }
+        with mock.patch.object(AIService, 'embed', side_effect=lambda texts: [vectors[text] for text in texts]) as embed:
+            [warranty] = requirement_library.canonical(['On-site warranty support'])
+            onsite, iso = requirement_library.canonical(['Onsite warranty service', 'ISO 9001 certified supplier'])
+            embed.reset_mock()
+            self.assertEqual(requirement_library.canonical(['onsite warranty services']), [warranty])
+            embed.assert_not_called()
+        self.assertEqual(onsite, warranty)
+        self.assertNotEqual(iso, warranty)
+        self.assertEqual(set(warranty.aliases.values_list('key', flat=True)), {'site support warranty', 'onsite service warranty'})
+
+    def test_compliance_is_stored_per_requirement(self):
+        response = self.client.post('/api/rfps/', {'structured_data': {
+            'title': 'Laptops', 'description': 'Laptops for the team', 'total_budget': 50000,
+            'requirements': ['On-site warranty support required', 'Must include installation services'],
+        }}, content_type='application/json')
+        rfp = RFP.objects.get(pk=response.json()['id'])
+        warranty, installation = [link.requirement for link in rfp.requirement_links.all()]
+        acme = Vendor.objects.create(name='Acme', email='acme@example.com')
+        bolt = Vendor.objects.create(name='Bolt', email='bolt@example.com')
+
+        # The demo parser answers in the RFP's own wording
+        EmailService.create_demo_proposal_for_vendor(rfp, acme)
+        proposal = Proposal.objects.create(rfp=rfp, vendor=bolt, email_subject='Re', email_body='x', raw_response='x')
+        EmailService._apply_parsed_data(proposal, {'payment_terms': 'Net 30', 'warranty': '1 year', 'compliance_analysis': [
+            {'requirement': 'Warranty handled on site', 'status': 'Partial', 'notes': 'Depot repair in remote areas'},
+            {'requirement': 'Installation', 'status': 'n/a'},
+        ]})
+        self.assertEqual(
+            list(proposal.compliance.order_by('requirement_id').values_list('requirement', 'status', 'notes')),
+            [(warranty.pk, 'partial', 'Depot repair in remote areas'), (installation.pk, 'no', '')],
+        )
+
+        with self.assertNumQueries(2):
+            summary = requirement_library.compliance_summary(rfp)
+        self.assertEqual([(row['text'], row['yes'], row['partial'], row['no']) for row in summary['requirements']],
+                         [(warranty.text, 1, 1, 0), (installation.text, 1, 0, 1)])
+        self.assertEqual([(row['vendor_name'], row['compliance_score']) for row in summary['proposals']],
+                         [('Acme', 100.0), ('Bolt', 25.0)])
+        self.assertEqual(self.client.get(f'/api/rfps/{rfp.pk}/compliance/').json()['proposals'][1]['partial'], 1)
+
+
+class SyntheticDataTests(TestCase):
+    def test_same_seed_same_rows(self):
+        def snapshot():
+            return (
+                list(Vendor.objects.order_by('email').values_list('name', 'category', 'rating')),
+                list(RFP.objects.order_by('id').values_list('title', 'status', 'total_budget', 'requirements')),
+                list(Proposal.objects.order_by('rfp_id', 'vendor_id').values_list('total_price', 'is_parsed')),
+            )
+
+        counts = synthetic_data.generate(vendors=50, rfps=40, seed=7, prefix='a')
+        self.assertEqual(counts['vendors'], 50)
+        self.assertEqual(counts['rfps'], 40)
+        self.assertEqual(counts['proposals'], Proposal.objects.count())
+        self.assertGreater(counts['proposals'], 0)
+        self.assertEqual(RFPSendLog.objects.count(), counts['send_logs'])
+        # Only RFPs that went out have send logs, and replies come from invited vendors
+        self.assertFalse(RFPSendLog.objects.filter(rfp__status='draft').exists())
+        self.assertEqual(Proposal.objects.exclude(vendor__rfpsendlog__rfp=F('rfp')).count(), 0)
+        self.assertEqual(RFPItem.objects.count(), counts['rfp_items'])
+        self.assertEqual(ProposalLineItem.objects.count(), counts['line_items'])
+        self.assertFalse(ProposalLineItem.objects.filter(rfp_item__isnull=True).exists())
+        self.assertEqual(RFPRequirement.objects.count(), counts['requirement_links'])
+        self.assertEqual(RequirementCompliance.objects.count(), counts['compliance'])
+        self.assertFalse(RequirementCompliance.objects.exclude(
+            requirement__rfp_links__rfp=F('proposal__rfp')).exists())
+        first = snapshot()
+
+        Proposal.objects.all().delete()
+        RFPSendLog.objects.all().delete()
+        RFP.objects.all().delete()
+        Vendor.objects.all().delete()
+        synthetic_data.generate(vendors=50, rfps=40, seed=7, prefix='a')
+        self.assertEqual(snapshot(), first)
+
+
+class FastSerializerParityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        synthetic_data.generate(vendors=40, rfps=30, invites_per_rfp=4, parsed_rate=0.5, seed=3, prefix='p')
+        # Shapes the generator doesn't produce
+        vendor = Vendor.objects.create(name='Ünïcode “Supplies”', email='u@example.com', rating=4)
+        rfp = RFP.objects.create(title='Odd', description='d', deadline=timezone.now(), requirements={'not': 'a list'},
+                                 total_budget=Decimal('1234.5'))
+        RFPSendLog.objects.create(rfp=rfp, vendor=vendor, email_subject='RFP')
+        Proposal.objects.create(rfp=rfp, vendor=vendor, email_subject='Re: RFP', email_body='x', raw_response='x',
+                                total_price=Decimal('0.10'))
+
+    def assertSameJSON(self, fast, reference):
+        render = json_codec.ORJSONRenderer().render
+        self.assertEqual(render(fast.data).decode(), render(reference.data).decode())
+
+    def test_vendors(self):
+        self.assertSameJSON(fast_serializers.VendorListSerializer(Vendor.objects.all()),
+                            VendorSerializer(Vendor.objects.all(), many=True))
+
+    def test_rfps(self):
+        rfps = RFP.objects.order_by('-created_at')
+        self.assertSameJSON(fast_serializers.RFPListSerializer(rfps), RFPSerializer(rfps, many=True))
+        # One query for the RFPs and one for every RFP's vendors
+        with self.assertNumQueries(2):
+            fast_serializers.RFPListSerializer(rfps).data
+
+    def test_proposals(self):
+        proposals = Proposal.objects.all()
+        self.assertSameJSON(fast_serializers.ProposalListSerializer(proposals),
+                            ProposalSummarySerializer(proposals, many=True))
+        for fields in (['total_price', 'vendor_name', 'id'], ['received_at'], []):
+            self.assertSameJSON(fast_serializers.ProposalListSerializer(proposals, fields=fields),
+                                ProposalSummarySerializer(proposals, many=True, fields=fields))
+
+    def test_current_time_zone(self):
+        with timezone.override('Asia/Kolkata'):
+            self.assertSameJSON(fast_serializers.VendorListSerializer(Vendor.objects.all()),
+                                VendorSerializer(Vendor.objects.all(), many=True))
+            self.assertSameJSON(fast_serializers.RFPListSerializer(RFP.objects.all()),
+                                RFPSerializer(RFP.objects.all(), many=True))
+
+
+class StartupTests(TestCase):
+    def test_sdks_load_on_first_use(self):
+        for scenario in ('web', 'worker', 'test'):
+            imported = bench_startup.import_times(bench_startup.SCENARIOS[scenario])
+            self.assertIn('rfp.ai_services', imported)
+            self.assertEqual([name for name in bench_startup.LAZY_MODULES if name in imported], [])
+
+
+class LoadTestTests(TransactionTestCase):
+    def test_cycles_go_through_smtp_and_imap(self):
+        summary = loadtest.run(cycles=2, concurrency=1, vendors_per_rfp=3, reply_delay=0)
+        self.assertEqual(summary['completed_cycles'], 2)
+        self.assertEqual(summary['failed_cycles'], 0)
+        self.assertEqual(summary['emails_sent'], 6)
+        self.assertEqual(summary['replies'], 6)
+        self.assertEqual(Proposal.objects.filter(is_parsed=True).count(), 6)
+        self.assertEqual(summary['stages']['cycle']['count'], 2)
+
+
+class StaticAssetsTests(TestCase):
+    def test_minify_js_keeps_strings_templates_and_regexes(self):
+        source = (
+            "// comment\n"
+            "const url = '/api/  x';  /* block */\n"
+            "const re = /a  b\\/c/g, half = total / 2 / 1;\n"
+            "const html = `<p>  ${ items.map(i => `${ i }  `).join('') }  </p>`;\n"
+            "\n"
+            "if (a)  { return  x }\n"
+        )
+        self.assertEqual(static_assets.minify_js(source), (
+            "const url='/api/  x';\n"
+            "const re=/a  b\\/c/g,half=total / 2 / 1;\n"
+            "const html=`<p>  ${items.map(i=>`${i}  `).join('')}  </p>`;\n"
+            "if(a){return x}\n"
+        ))
+        self.assertEqual(static_assets.minify_js(static_assets.minify_js(source)), static_assets.minify_js(source))
+
+    def test_minify_css(self):
+        source = "/* header */\n.a  > .b :hover {\n  color: red;\n  content: '  ';\n}\n"
+        self.assertEqual(static_assets.minify_css(source), ".a>.b :hover{color:red;content:'  '}\n")
+
+    def test_collectstatic_hashes_compresses_and_serves(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        storages = {
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+            'staticfiles': {'BACKEND': 'rfp.static_assets.CompressedManifestStaticFilesStorage'},
+        }
+        with override_settings(STATIC_ROOT=root.name, STORAGES=storages, DEBUG=False):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            from django.contrib.staticfiles.storage import staticfiles_storage
+            hashed = staticfiles_storage.stored_name('js/api.js')
+            self.assertRegex(hashed, r'^js/api\.[0-9a-f]{12}\.js$')
+            self.assertTrue(os.path.exists(os.path.join(root.name, hashed + '.gz')))
+
+            factory = RequestFactory()
+            response = static_assets.serve(factory.get('/', HTTP_ACCEPT_ENCODING='gzip, br;q=0'), hashed)
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(response['Cache-Control'], static_assets.IMMUTABLE)
+            self.assertIn('Accept-Encoding', response['Vary'])
+            response.close()
+
+            response = static_assets.serve(factory.get('/', HTTP_ACCEPT_ENCODING='gzip;q=0'), hashed)
+            self.assertFalse(response.has_header('Content-Encoding'))
+            response.close()
+
+            response = static_assets.serve(factory.get('/'), 'js/api.js')
+            self.assertEqual(response['Cache-Control'], 'no-cache')
+            response.close()
+            not_modified = static_assets.serve(
+                factory.get('/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']), 'js/api.js')
+            self.assertEqual(not_modified.status_code, 304)
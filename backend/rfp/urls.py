@@ -1,31 +1,60 @@
 from django.urls import path
-from . import views
+from django.conf import settings
+from . import async_views, views
 from django.http import JsonResponse
 
 
+if settings.ASYNC_VIEWS:
+    parse_natural_language_view = async_views.parse_natural_language
+    compare_proposals_view = async_views.compare_proposals
+    check_emails_view = async_views.check_emails
+else:
+    parse_natural_language_view = views.ParseNaturalLanguageView.as_view()
+    compare_proposals_view = views.CompareProposalsView.as_view()
+    check_emails_view = views.CheckEmailsView.as_view()
+
+
 urlpatterns = [
     # Vendor endpoints
     path('vendors/', views.VendorListCreateView.as_view(), name='vendor-list'),
+    path('vendors/import/', views.VendorImportView.as_view(), name='vendor-import'),
     path('vendors/<int:pk>/', views.VendorDetailView.as_view(), name='vendor-detail'),
     
     # RFP endpoints
     path('rfps/', views.RFPListCreateView.as_view(), name='rfp-list'),
     path('rfps/<int:pk>/', views.RFPDetailView.as_view(), name='rfp-detail'),
     path('rfps/<int:pk>/send/', views.SendRFPView.as_view(), name='send-rfp'),
-    path('rfps/<int:pk>/compare/', views.CompareProposalsView.as_view(), name='compare-proposals'),
+    path('rfps/<int:pk>/compare/', compare_proposals_view, name='compare-proposals'),
     path('rfps/<int:pk>/comparison/', views.GetComparisonView.as_view(), name='get-comparison'),
+    path('rfps/<int:pk>/item-prices/', views.ItemPricesView.as_view(), name='item-prices'),
+    path('rfps/<int:pk>/compliance/', views.ComplianceView.as_view(), name='rfp-compliance'),
     
     # Proposal endpoints
     path('proposals/', views.ProposalListView.as_view(), name='proposal-list'),
+    path('proposals/export/', views.ProposalExportView.as_view(), name='proposal-export'),
+    path('proposals/<int:pk>/', views.ProposalDetailView.as_view(), name='proposal-detail'),
+    
+    # Comparison endpoints
+    path('comparisons/export/', views.ComparisonExportView.as_view(), name='comparison-export'),
+    
+    # Search
+    path('search/', views.SearchView.as_view(), name='search'),
     
     # AI endpoints
-    path('parse-natural-language/', views.ParseNaturalLanguageView.as_view(), name='parse-natural-language'),
+    path('parse-natural-language/', parse_natural_language_view, name='parse-natural-language'),
     
     # Email endpoints
-    path('check-emails/', views.CheckEmailsView.as_view(), name='check-emails'),
+    path('check-emails/', check_emails_view, name='check-emails'),
     path('test-email/', views.TestEmailView.as_view(), name='test-email'),
     path('test-email-config/', views.TestEmailConfigView.as_view(), name='test-email-config'),
     
+    # Live updates
+    path('events/', views.event_stream, name='event-stream'),
+    
+    # Background jobs
+    path('jobs/<int:pk>/', views.JobDetailView.as_view(), name='job-detail'),
+    path('jobs/<int:pk>/cancel/', views.JobCancelView.as_view(), name='job-cancel'),
+    
     # Debug endpoints
     path('debug/status/',views.debug_status, name='debug-status'),
 ]
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""
+Streaming bulk import of vendors from CSV or JSONL files
+"""
+import codecs
+import csv
+import json
+import logging
+
+from rest_framework import serializers
+
+from . import search
+from .models import Proposal, Vendor
+from .serializers import VendorImportSerializer
+
+logger = logging.getLogger(__name__)
+
+FILE_TYPES = ('csv', 'jsonl')
+
+# Columns a row may overwrite when its email already exists; only those the row
+# actually has are written, so a file with fewer columns leaves the rest alone
+UPSERT_FIELDS = ['name', 'contact_person', 'phone', 'category', 'rating', 'is_active']
+
+# Keep the error report bounded no matter how bad the file is
+MAX_REPORTED_ERRORS = 1000
+
+
+def file_type_for(filename, default=None):
+    """Guess the import format from a file name"""
+    name = (filename or '').lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return default
+
+
+def _decode(lines, bad_lines):
+    """
+    Decode byte lines as UTF-8 one at a time. A line that is not valid UTF-8
+    is decoded with replacement characters and its number added to
+    ``bad_lines``, so the row is reported instead of failing the whole upload.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        if line_number == 1 and line.startswith(codecs.BOM_UTF8):
+            line = line[len(codecs.BOM_UTF8):]
+        try:
+            yield line.decode('utf-8')
+        except UnicodeDecodeError:
+            bad_lines.add(line_number)
+            yield line.decode('utf-8', errors='replace')
+
+
+def _read_rows(lines, file_type):
+    """Yield ``(line_number, row, error)``; ``row`` is None when the line cannot be read"""
+    bad_lines = set()
+    text = _decode(lines, bad_lines)
+    if file_type == 'csv':
+        reader = csv.DictReader(text)
+        last_line = 1
+        for row in reader:
+            # A quoted field can span lines; the row is bad if any of them is
+            if bad_lines.intersection(range(last_line + 1, reader.line_num + 1)):
+                yield reader.line_num, None, 'Row is not valid UTF-8'
+            else:
+                yield reader.line_num, row, None
+            last_line = reader.line_num
+    else:
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            if line_number in bad_lines:
+                yield line_number, None, 'Row is not valid UTF-8'
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            if isinstance(row, dict):
+                yield line_number, row, None
+            else:
+                yield line_number, None, 'Row is not a valid JSON object'
+
+
+def _upsert(vendors):
+    """
+    Upsert ``(columns, vendor)`` pairs, grouped by the columns their rows
+    had. Emails are unique within a chunk (see import_vendors).
+    """
+    groups = {}
+    for columns, vendor in vendors:
+        groups.setdefault(frozenset(columns), []).append(vendor)
+    # bulk_create sends no post_save, so renames are found here for the search index
+    names = {vendor.email: vendor.name for columns, vendor in vendors if 'name' in columns} if search.enabled() else {}
+    previous = dict(Vendor.objects.filter(email__in=names).values_list('email', 'name')) if names else {}
+    for columns, group in groups.items():
+        update_fields = [field for field in UPSERT_FIELDS if field in columns]
+        Vendor.objects.bulk_create(
+            group,
+            update_conflicts=True,
+            unique_fields=['email'],
+            update_fields=update_fields + ['updated_at'],
+        )
+    renamed = [email for email, name in previous.items() if name != names[email]]
+    if renamed:
+        search.index_proposals(Proposal.objects.filter(vendor__email__in=renamed))
+    return len(vendors)
+
+
+def import_vendors(lines, file_type, chunk_size=1000):
+    """
+    Validate and upsert vendors from an iterable of byte lines (an open file or
+    an upload), one chunk at a time so memory stays flat for any file size.
+    Returns a report with counts and per-row errors.
+    """
+    if file_type not in FILE_TYPES:
+        raise ValueError(f"Unsupported file type: {file_type}")
+
+    validator = VendorImportSerializer()
+    report = {'rows': 0, 'imported': 0, 'failed': 0, 'errors': [], 'errors_truncated': False}
+    # email -> (line number, row, columns, vendor)
+    chunk = {}
+
+    def record_error(line_number, row, errors):
+        report['failed'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({
+                'line': line_number,
+                'email': (row or {}).get('email'),
+                'errors': errors,
+            })
+        else:
+            report['errors_truncated'] = True
+
+    def flush():
+        report['imported'] += _upsert([(columns, vendor) for _, _, columns, vendor in chunk.values()])
+        chunk.clear()
+
+    for line_number, row, error in _read_rows(lines, file_type):
+        report['rows'] += 1
+        if row is None:
+            record_error(line_number, row, {'non_field_errors': [error]})
+            continue
+        try:
+            data = validator.run_validation(row)
+        except serializers.ValidationError as e:
+            record_error(line_number, row, e.detail)
+            continue
+
+        # The same email twice in one chunk: the later row wins, the earlier one is reported
+        previous = chunk.pop(data['email'], None)
+        if previous:
+            record_error(previous[0], previous[1], {'email': [f'Replaced by line {line_number} with the same email']})
+        chunk[data['email']] = (line_number, row, set(data), Vendor(**data))
+        if len(chunk) >= chunk_size:
+            flush()
+
+    if chunk:
+        flush()
+
+    logger.info(f"Vendor import: {report['rows']} rows, {report['imported']} imported, {report['failed']} failed")
+    return report
@@ -2,16 +2,22 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from datetime import datetime, timedelta
 import json
 import logging
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.conf import settings
+from django.utils.dateparse import parse_date
 
-from .models import Vendor, RFP, Proposal, Comparison, RFPSendLog
-from .serializers import VendorSerializer, RFPSerializer, ProposalSerializer, ComparisonSerializer
+from .models import Vendor, RFP, Proposal, Comparison, RFPSendLog, Job
+from .serializers import VendorSerializer, RFPSerializer, ProposalSerializer, ProposalSummarySerializer, ComparisonSerializer, JobSerializer
+from .fast_serializers import ProposalListSerializer, RFPListSerializer, VendorListSerializer
 from .ai_services import AIService
 from .email_services import EmailService
+from .vendor_import import FILE_TYPES, file_type_for, import_vendors
+from . import comparisons, events, exports, jobs, line_items, logs, metrics, profiling, requirement_library, search
 
 logger = logging.getLogger(__name__)
 
@@ -33,11 +39,37 @@ def debug_status(request):
     except Exception as e:
         return JsonResponse({'error': str(e), 'status': 'error'})
 
+debug_status.read_database = True
+
+def prometheus_metrics(request):
+    """Counters, histograms and queue depths in the Prometheus text format"""
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+prometheus_metrics.read_database = True
+
+def event_stream(request):
+    """Server-sent events for the frontend, resumable with Last-Event-ID"""
+    last_id = events.parse_last_event_id(
+        request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    )
+    # ASGI servers get an async iterator so an open stream does not pin a thread;
+    # under WSGI the stream ends at once and the browser polls by reconnecting
+    if isinstance(request, ASGIRequest):
+        source = events.astream(last_id)
+    else:
+        source = events.stream(last_id, lifetime=events.WSGI_STREAM_LIFETIME)
+    response = StreamingHttpResponse(source, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 class VendorListCreateView(APIView):
+    read_database = True
+    
     def get(self, request):
         vendors = Vendor.objects.all()
-        serializer = VendorSerializer(vendors, many=True)
-        return Response(serializer.data)
+        serializer = VendorListSerializer(vendors)
+        return Response(profiling.serialized(serializer))
     
     def post(self, request):
         serializer = VendorSerializer(data=request.data)
@@ -47,11 +79,33 @@ class VendorListCreateView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class VendorImportView(APIView):
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({'error': 'No file uploaded', 'message': '❌ Please upload a CSV or JSONL file'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        file_type = request.data.get('file_type') or file_type_for(upload.name)
+        if file_type not in FILE_TYPES:
+            return Response({
+                'error': 'Unsupported file type',
+                'message': '❌ Vendor imports must be .csv or .jsonl files'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        report = import_vendors(upload, file_type)
+        report['success'] = report['failed'] == 0
+        report['message'] = f"✅ Imported {report['imported']} vendor(s) from {report['rows']} row(s)."
+        if report['failed']:
+            report['message'] += f"\n\n⚠️ {report['failed']} row(s) failed validation."
+        return Response(report)
+
 class VendorDetailView(APIView):
+    read_database = True
+    
     def get(self, request, pk):
         vendor = get_object_or_404(Vendor, pk=pk)
         serializer = VendorSerializer(vendor)
-        return Response(serializer.data)
+        return Response(profiling.serialized(serializer))
     
     def put(self, request, pk):
         vendor = get_object_or_404(Vendor, pk=pk)
@@ -67,27 +121,21 @@ class VendorDetailView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 class RFPListCreateView(APIView):
+    read_database = True
+    
     def get(self, request):
         rfps = RFP.objects.all().order_by('-created_at')
-        serializer = RFPSerializer(rfps, many=True)
-        return Response(serializer.data)
+        serializer = RFPListSerializer(rfps)
+        return Response(profiling.serialized(serializer))
     
     def post(self, request):
-        logger.info(f"RFP Creation Request: {request.data}")
-        logger.info(f"Request data keys: {list(request.data.keys())}")
+        # Lazy, redacted and size-capped; the payload may be a whole document
+        logger.info("RFP creation request: %s", logs.Payload(request.data))
         
         try:
             # Handle both AI and manual RFP creation
             rfp_data = request.data.copy()
-            
-            # Debug: Log all data
-            for key, value in rfp_data.items():
-                if key == 'requirements' and isinstance(value, list):
-                    logger.info(f"{key}: {value}")
-                elif key == 'structured_data':
-                    logger.info(f"{key}: (JSON data)")
-                else:
-                    logger.info(f"{key}: {value}")
+            items = None
             
             # Set default deadline if not provided
             if 'deadline' not in rfp_data:
@@ -128,13 +176,19 @@ class RFPListCreateView(APIView):
                         'structured_data': structured_data,
                         'natural_language_input': user_input
                     })
+                
+                # Stored as RFPItem rows once the RFP is saved
+                if isinstance(structured_data, dict):
+                    items = structured_data.get('items')
             
-            logger.info(f"Final RFP data for serializer: {rfp_data}")
+            logger.debug("Final RFP data for serializer: %s", logs.Payload(rfp_data))
             
             serializer = RFPSerializer(data=rfp_data)
             
             if serializer.is_valid():
                 rfp = serializer.save()
+                line_items.save_rfp_items(rfp, items)
+                requirement_library.link_rfp(rfp, rfp.requirements)
                 logger.info(f"RFP created successfully: {rfp.title} (ID: {rfp.id})")
                 
                 response_data = serializer.data
@@ -158,13 +212,17 @@ class RFPListCreateView(APIView):
             
         
 class RFPDetailView(APIView):
+    read_database = True
+    
     def get(self, request, pk):
         rfp = get_object_or_404(RFP, pk=pk)
         serializer = RFPSerializer(rfp)
-        return Response(serializer.data)
+        return Response(profiling.serialized(serializer))
 
 class ParseNaturalLanguageView(APIView):
     def post(self, request):
+        if not isinstance(request.data, dict):
+            return Response({'error': 'Request body must be a JSON object'}, status=status.HTTP_400_BAD_REQUEST)
         user_input = request.data.get('text', '')
         if not user_input:
             return Response({'error': 'No text provided'}, status=status.HTTP_400_BAD_REQUEST)
@@ -249,8 +307,16 @@ class SendRFPView(APIView):
                 'message': f'❌ Error sending RFP: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def _job_accepted(job):
+    """202 response pointing the client at the job that will do the work"""
+    return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED,
+                    headers={'Location': reverse('job-detail', kwargs={'pk': job.pk})})
+
 class CheckEmailsView(APIView):
     def post(self, request):
+        if jobs.prefers_async(request):
+            return _job_accepted(jobs.enqueue('check_emails'))
+        
         try:
             # Check for new emails
             new_proposal_ids = EmailService.check_incoming_emails()
@@ -258,24 +324,7 @@ class CheckEmailsView(APIView):
             # Parse new proposals
             parsed_count = EmailService.parse_new_proposals()
             
-            # Count total proposals
-            total_proposals = Proposal.objects.count()
-            parsed_total = Proposal.objects.filter(is_parsed=True).count()
-            
-            if settings.DEMO_MODE:
-                message = f'📧 DEMO MODE: Checked emails and created {len(new_proposal_ids)} new demo proposal(s).'
-            else:
-                message = f'📧 Found {len(new_proposal_ids)} new email(s), parsed {parsed_count} proposal(s).'
-            
-            return Response({
-                'success': True,
-                'new_emails': len(new_proposal_ids),
-                'parsed_proposals': parsed_count,
-                'total_proposals': total_proposals,
-                'total_parsed': parsed_total,
-                'demo_mode': settings.DEMO_MODE,
-                'message': message
-            })
+            return Response(EmailService.inbox_summary(new_proposal_ids, parsed_count))
             
         except Exception as e:
             logger.error(f"Check emails error: {str(e)}", exc_info=True)
@@ -286,92 +335,98 @@ class CheckEmailsView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class ProposalListView(APIView):
+    read_database = True
+    
     def get(self, request):
+        fields = request.query_params.get('fields')
+        if fields:
+            fields = [name.strip() for name in fields.split(',') if name.strip()]
+            unknown = set(fields) - set(ProposalSummarySerializer().fields)
+            if unknown:
+                return Response({
+                    'error': 'Unknown fields requested',
+                    'details': sorted(unknown)
+                }, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            fields = None
+        
         rfp_id = request.query_params.get('rfp_id')
         if rfp_id:
             proposals = Proposal.objects.filter(rfp_id=rfp_id)
         else:
             proposals = Proposal.objects.all()
         
-        serializer = ProposalSerializer(proposals, many=True)
-        return Response(serializer.data)
+        serializer = ProposalListSerializer(proposals, fields=fields)
+        return Response(profiling.serialized(serializer))
+
+class ProposalDetailView(APIView):
+    read_database = True
+    
+    def get(self, request, pk):
+        proposal = get_object_or_404(Proposal.objects.select_related('vendor', 'rfp', 'email_body_blob', 'raw_response_blob'), pk=pk)
+        serializer = ProposalSerializer(proposal)
+        return Response(profiling.serialized(serializer))
+
+def _export_response(request, name, filter_queryset, build_rows, columns, statuses):
+    """Shared parameter handling for the streaming export endpoints"""
+    params = request.query_params
+    file_type = params.get('file_type', 'csv')
+    if file_type not in exports.FILE_TYPES:
+        return Response({'error': 'Unsupported file type', 'message': '❌ Exports are available as csv or jsonl'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    export_status = params.get('status') or None
+    if export_status is not None and export_status not in statuses:
+        return Response({'error': 'Invalid status', 'message': f"❌ status must be one of {', '.join(statuses)}"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    rfp_id = params.get('rfp_id') or None
+    if rfp_id is not None and not rfp_id.isdigit():
+        return Response({'error': 'Invalid rfp_id', 'message': '❌ rfp_id must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    dates = {}
+    for key in ('date_from', 'date_to'):
+        if params.get(key):
+            try:
+                dates[key] = parse_date(params[key])
+            except ValueError:
+                # Well formed but impossible, like 2024-02-30
+                dates[key] = None
+            if dates[key] is None:
+                return Response({'error': f'Invalid {key}', 'message': f'❌ {key} must be a YYYY-MM-DD date'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    queryset = filter_queryset(rfp_id=rfp_id, status=export_status, **dates)
+    rows = build_rows(queryset)
+    # Under ASGI a sync iterator would be collected into a list before the first byte is sent
+    content = exports.astream(rows, columns, file_type) if isinstance(request._request, ASGIRequest) else exports.stream(rows, columns, file_type)
+    response = StreamingHttpResponse(content, content_type=exports.CONTENT_TYPES[file_type])
+    response['Content-Disposition'] = f'attachment; filename="{name}-{datetime.now():%Y%m%d}.{file_type}"'
+    return response
+
+class ProposalExportView(APIView):
+    def get(self, request):
+        return _export_response(request, 'proposals', exports.filter_proposals, exports.proposal_rows, list(exports.PROPOSAL_COLUMNS),
+                                exports.PROPOSAL_STATUSES)
+
+class ComparisonExportView(APIView):
+    def get(self, request):
+        return _export_response(request, 'comparisons', exports.filter_comparisons, exports.comparison_rows, exports.COMPARISON_COLUMNS,
+                                exports.COMPARISON_STATUSES)
 
 class CompareProposalsView(APIView):
     def get(self, request, pk):
         try:
             rfp = get_object_or_404(RFP, pk=pk)
             
-            # Get total proposals for this RFP
-            all_proposals = Proposal.objects.filter(rfp=rfp)
-            parsed_proposals = all_proposals.filter(is_parsed=True)
-            
-            if parsed_proposals.count() < 1:
-                # Provide helpful message based on whether there are any proposals
-                if all_proposals.count() == 0:
-                    message = "❌ No proposals found for this RFP. Please send the RFP to vendors first."
-                else:
-                    message = f"⚠️ Found {all_proposals.count()} proposals but none are parsed yet. Please click 'Check Emails' to parse them."
-                
-                return Response({
-                    'error': 'Need at least 1 parsed proposal for comparison',
-                    'available_proposals': all_proposals.count(),
-                    'parsed_proposals': parsed_proposals.count(),
-                    'message': message
-                }, status=status.HTTP_400_BAD_REQUEST)
+            if jobs.prefers_async(request):
+                return _job_accepted(jobs.enqueue('compare_proposals', rfp_id=rfp.pk))
             
-            # Prepare data for AI
-            proposals_data = [{
-                'vendor_name': p.vendor.name,
-                'vendor_id': p.vendor.id,
-                'total_price': float(p.total_price) if p.total_price else 0,
-                'proposed_delivery_days': p.proposed_delivery_days,
-                'compliance_score': p.compliance_score,
-                'warranty_offered': p.warranty_offered,
-                'proposed_terms': p.proposed_terms
-            } for p in parsed_proposals]
-            
-            rfp_data = {
-                'title': rfp.title,
-                'total_budget': float(rfp.total_budget),
-                'delivery_days': rfp.delivery_days,
-                'requirements': rfp.requirements
-            }
+            inputs = comparisons.comparison_inputs(rfp)
+            if not inputs['parsed_proposals']:
+                return Response(comparisons.missing_proposals_error(inputs), status=status.HTTP_400_BAD_REQUEST)
             
             # Get AI comparison
-            ai_result = AIService.compare_proposals_and_recommend(proposals_data, rfp_data)
-            
-            # Create or update comparison record
-            comparison, created = Comparison.objects.get_or_create(
-                rfp=rfp,
-                defaults={
-                    'ai_recommendation': ai_result,
-                    'summary': ai_result.get('summary', 'AI Comparison Generated')
-                }
-            )
+            ai_result = AIService.compare_proposals_and_recommend(inputs['proposals_data'], inputs['rfp_data'])
             
-            if not created:
-                comparison.ai_recommendation = ai_result
-                comparison.summary = ai_result.get('summary', 'AI Comparison Updated')
-                comparison.save()
-            
-            comparison.proposals.set(parsed_proposals)
-            
-            # Mark recommended proposal as preferred
-            recommended_vendor_id = ai_result.get('recommendation', {}).get('vendor_id')
-            if recommended_vendor_id:
-                Proposal.objects.filter(rfp=rfp).update(is_preferred=False)
-                Proposal.objects.filter(rfp=rfp, vendor_id=recommended_vendor_id).update(is_preferred=True)
-            
-            serializer = ComparisonSerializer(comparison)
-            response_data = serializer.data
-            response_data['proposal_details'] = proposals_data
-            response_data['rfp_details'] = rfp_data
-            
-            # Add success message
-            recommendation = ai_result.get('recommendation', {})
-            response_data['message'] = f'✅ AI comparison generated successfully.\n\n📊 Compared {len(parsed_proposals)} proposals.\n🏆 Recommended vendor: {recommendation.get("vendor_name", "N/A")}\n🎯 Confidence: {recommendation.get("confidence_score", 0)}%'
-            
-            return Response(response_data)
+            return Response(comparisons.save_comparison(rfp, ai_result, inputs))
             
         except Exception as e:
             logger.error(f"Compare proposals error: {str(e)}", exc_info=True)
@@ -383,16 +438,95 @@ class CompareProposalsView(APIView):
             
             
 class GetComparisonView(APIView):
+    read_database = True
+    
     def get(self, request, rfp_id):
         try:
             comparison = Comparison.objects.filter(rfp_id=rfp_id).first()
             if comparison:
                 serializer = ComparisonSerializer(comparison)
-                return Response(serializer.data)
+                return Response(profiling.serialized(serializer))
             return Response({'message': 'No comparison found for this RFP'})
         except Exception as e:
             return Response({'error': str(e), 'message': f'❌ Error: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class ItemPricesView(APIView):
+    read_database = True
+    
+    def get(self, request, pk):
+        """Per-item price comparison across the vendors who quoted this RFP"""
+        rfp = get_object_or_404(RFP, pk=pk)
+        return Response({
+            'rfp_id': rfp.id,
+            'items': line_items.item_prices(rfp)
+        })
+
+class ComplianceView(APIView):
+    read_database = True
+    
+    def get(self, request, pk):
+        """Compliance with each requirement across the vendors who answered this RFP"""
+        rfp = get_object_or_404(RFP, pk=pk)
+        return Response({
+            'rfp_id': rfp.id,
+            **requirement_library.compliance_summary(rfp)
+        })
+
+class SearchView(APIView):
+    read_database = True
+    
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        kind = request.query_params.get('kind')
+        if not query:
+            return Response({'error': 'No search query provided', 'message': '❌ Please enter something to search for'}, status=status.HTTP_400_BAD_REQUEST)
+        if kind and kind not in search.KINDS:
+            return Response({'error': f'Unknown kind: {kind}', 'message': '❌ kind must be rfp or proposal'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            limit = 20
+        
+        hits = search.search(query, kind=kind, limit=limit)
+        
+        # Attach display fields with one query per kind
+        rfp_ids = {hit['rfp_id'] for hit in hits}
+        proposal_ids = [hit['object_id'] for hit in hits if hit['kind'] == 'proposal']
+        rfps = {r['id']: r for r in RFP.objects.filter(id__in=rfp_ids).values('id', 'title', 'status')}
+        vendors = dict(Proposal.objects.filter(id__in=proposal_ids).values_list('id', 'vendor__name'))
+        
+        results = []
+        for hit in hits:
+            rfp = rfps.get(hit['rfp_id'])
+            if rfp is None:
+                continue
+            hit['rfp_title'] = rfp['title']
+            hit['rfp_status'] = rfp['status']
+            if hit['kind'] == 'proposal':
+                hit['vendor_name'] = vendors.get(hit['object_id'])
+            results.append(hit)
+        
+        return Response({'query': query, 'count': len(results), 'results': results})
+
+class JobDetailView(APIView):
+    def get(self, request, pk):
+        job = get_object_or_404(Job, pk=pk)
+        return Response(JobSerializer(job).data)
+
+class JobCancelView(APIView):
+    def post(self, request, pk):
+        job = get_object_or_404(Job, pk=pk)
+        if not jobs.cancel(job):
+            job.refresh_from_db()
+            return Response({
+                'error': 'Job already finished',
+                'status': job.status,
+                'message': f'⚠️ This job has already {job.status}.'
+            }, status=status.HTTP_409_CONFLICT)
+        
+        job.refresh_from_db()
+        return Response(JobSerializer(job).data)
+
 class TestEmailView(APIView):
     def post(self, request):
         to_email = request.data.get('email')
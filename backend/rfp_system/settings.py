@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'rfp.middleware.GZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -84,6 +85,50 @@ DATABASES = {
     }
 }
 
+# Applied to every new SQLite connection by rfp.db_routers.apply_sqlite_pragmas
+SQLITE_PRAGMAS = {}
+
+# Production profile (DB_PROFILE=production): WAL journaling so readers never
+# block the writer, a busy timeout instead of immediate "database is locked",
+# persistent connections, and a second connection for read-only views
+DB_PROFILE = os.getenv('DB_PROFILE', 'default')
+
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'timeout': 20},
+    })
+    DATABASES['read'] = {
+        **DATABASES['default'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['rfp.db_routers.ReadWriteRouter']
+    MIDDLEWARE.append('rfp.middleware.ReadDatabaseMiddleware')
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'temp_store': 'MEMORY',
+        'cache_size': -20000,  # 20 MB
+        'mmap_size': 268435456,  # 256 MB
+    }
+
+# Opt-in per-request profiling: Server-Timing headers plus a sampled JSON log line
+PROFILING_ENABLED = os.getenv('PROFILING', 'False').lower() == 'true'
+PROFILING_LOG_SAMPLE_RATE = float(os.getenv('PROFILING_LOG_SAMPLE_RATE', '0'))
+
+if PROFILING_ENABLED:
+    MIDDLEWARE.insert(0, 'rfp.profiling.ProfilingMiddleware')
+
+# In-process Prometheus metrics, served at /metrics (see rfp/metrics.py)
+METRICS_ENABLED = os.getenv('METRICS', 'True').lower() == 'true'
+
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, 'rfp.metrics.MetricsMiddleware')
+
+# Responses smaller than this go out uncompressed (see rfp.middleware.GZipMiddleware)
+GZIP_MIN_LENGTH = int(os.getenv('GZIP_MIN_LENGTH', '1024'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -125,7 +170,18 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, '..', 'frontend'),  # Points to frontend folder
 ]
 
-# STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# Production static pipeline: collectstatic minifies, content-hashes and
+# precompresses the frontend, and rfp.static_assets.serve hands out the
+# gzip/brotli variants with far-future caching (see rfp/static_assets.py)
+STATIC_PIPELINE = os.getenv('STATIC_PIPELINE', str(not DEBUG)).lower() == 'true'
+
+if STATIC_PIPELINE:
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'rfp.static_assets.CompressedManifestStaticFilesStorage'},
+    }
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -139,11 +195,17 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rfp.json_codec.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'rfp.json_codec.ORJSONParser',
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
     ],
+    # Datetimes reach the renderer as they are and orjson formats them
+    'DATETIME_FORMAT': None,
 }
 
 # Email Configuration
@@ -162,13 +224,28 @@ EMAIL_IMAP_PORT = PORT NO
 DEMO_MODE = False  # When True, creates demo data instead of real emails
 AI_DEMO_MODE = True  # When True, uses demo AI responses
 
+# Serve the AI and inbox endpoints from native async views (set by asgi.py)
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False').lower() == 'true'
+
 # OpenAI Configuration
 OPENAI_API_KEY =os.getenv("OPENAI_API_KEY")
 
 # Logging configuration
+# Records go through a bounded queue to a background thread that does the
+# formatting and writing (see rfp/logs.py); DEBUG call sites are sampled
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+LOG_DEBUG_PER_SECOND = float(os.getenv('LOG_DEBUG_PER_SECOND', '10'))
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv('LOG_PAYLOAD_MAX_CHARS', '2000'))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        'rate_limit': {
+            '()': 'rfp.logs.RateLimitFilter',
+            'per_second': LOG_DEBUG_PER_SECOND,
+        },
+    },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
@@ -178,19 +255,26 @@ LOGGING = {
             'filename': 'debug.log',
             'level': 'DEBUG',
         },
+        # Named to sort after the handlers it feeds, so they exist by the time it is built
+        'queue': {
+            '()': 'rfp.logs.QueueHandler',
+            'handlers': ['cfg://handlers.console', 'cfg://handlers.file'],
+            'maxsize': LOG_QUEUE_SIZE,
+            'filters': ['rate_limit'],
+        },
     },
     'root': {
-        'handlers': ['console', 'file'],
+        'handlers': ['queue'],
         'level': 'INFO',
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
         'rfp': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
             'level': 'DEBUG',
             'propagate': False,
         },
@@ -15,17 +15,26 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+from django.views.decorators.cache import cache_control
 from django.views.generic import TemplateView
 from django.conf import settings
 from django.conf.urls.static import static
+from rfp import static_assets
+from rfp import views as rfp_views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('rfp.urls')),
-    path('', TemplateView.as_view(template_name='index.html')),
+    # Revalidated on every load so a deploy's new asset names are picked up at once
+    path('', cache_control(no_cache=True)(TemplateView.as_view(template_name='index.html'))),
 ]
 
-# Serve static files during development
-if settings.DEBUG:
+if settings.METRICS_ENABLED:
+    urlpatterns.append(path('metrics', rfp_views.prometheus_metrics, name='metrics'))
+
+# Hashed, precompressed files from collectstatic; in development, the sources as they are
+if settings.STATIC_PIPELINE:
+    urlpatterns.append(re_path(r'^static/(?P<path>.+)$', static_assets.serve, name='static'))
+elif settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATICFILES_DIRS[0])
\ No newline at end of file
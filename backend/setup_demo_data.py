@@ -1,4 +1,6 @@
+import argparse
 import os
+import time
 import django
 from datetime import datetime, timedelta
 
@@ -6,6 +8,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rfp_system.settings')
 django.setup()
 
 from rfp.models import Vendor, RFP
+from rfp import synthetic_data
 
 def setup_demo_data():
     print("Setting up demo data...")
@@ -68,5 +71,23 @@ def setup_demo_data():
     
     print("Demo data setup complete!")
 
+def setup_synthetic_data(vendors, rfps, seed):
+    """
+    Bulk-generate a large, reproducible dataset on top of the demo data.
+    `manage.py generate_synthetic_data` exposes every option.
+    """
+    print(f"Generating {vendors} synthetic vendors and {rfps} RFPs (seed {seed})...")
+    started = time.perf_counter()
+    counts = synthetic_data.generate(vendors=vendors, rfps=rfps, seed=seed)
+    print(f"Created {synthetic_data.describe(counts, time.perf_counter() - started)}")
+
 if __name__ == '__main__':
-    setup_demo_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Create demo data, optionally with a large synthetic dataset')
+    parser.add_argument('--vendors', type=int, default=0, help='Synthetic vendors to add')
+    parser.add_argument('--rfps', type=int, default=0, help='Synthetic RFPs to add, with send logs and proposals')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    
+    setup_demo_data()
+    if args.vendors or args.rfps:
+        setup_synthetic_data(args.vendors, args.rfps, args.seed)
\ No newline at end of file
@@ -1,108 +1,164 @@
 const API_BASE_URL = 'http://localhost:8000/api';
 
+// Client data layer: every request goes through fetchWithTimeout, identical
+// GETs in flight share one request, and GET results are cached. Within
+// FRESH_MS a cached result is returned as is; up to STALE_MS it is returned
+// at once and refreshed in the background (stale-while-revalidate), with an
+// 'api:updated' event on document if the refresh brought new data. Mutations
+// invalidate exactly the paths they change.
 class ApiService {
-    // Vendors
-    static async getVendors() {
-        const response = await fetch(`${API_BASE_URL}/vendors/`);
-        if (!response.ok) {
-            throw new Error(`Failed to fetch vendors: ${response.statusText}`);
+    static FRESH_MS = 5000;
+    static STALE_MS = 5 * 60 * 1000;
+    static TIMEOUT_MS = 10000;
+    // AI parsing, SMTP and jobs run without a worker can take a while
+    static SLOW_TIMEOUT_MS = 120000;
+
+    static cache = new Map();
+    static inFlight = new Map();
+
+    static request(path, options = {}, timeout = this.TIMEOUT_MS) {
+        return this.fetchWithTimeout(`${API_BASE_URL}${path}`, options, timeout);
+    }
+
+    static async cachedGet(path, what) {
+        const entry = this.cache.get(path);
+        const age = entry ? Date.now() - entry.fetchedAt : Infinity;
+        if (age < this.FRESH_MS) {
+            return entry.data;
         }
-        return response.json();
+
+        const refresh = this.revalidate(path, what);
+        if (age < this.STALE_MS) {
+            refresh.catch(error => console.warn(`Background refresh of ${path} failed:`, error));
+            return entry.data;
+        }
+        return refresh;
     }
 
-    static async createVendor(vendorData) {
-        const response = await fetch(`${API_BASE_URL}/vendors/`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify(vendorData)
-        });
-        if (!response.ok) {
-            const error = await response.json();
-            throw new Error(error.details || error.error || `Failed to create vendor: ${response.statusText}`);
+    static revalidate(path, what) {
+        if (this.inFlight.has(path)) {
+            return this.inFlight.get(path);
         }
-        return response.json();
+
+        const request = (async () => {
+            try {
+                const response = await this.request(path);
+                if (!response.ok) {
+                    throw new Error(`Failed to fetch ${what}: ${response.statusText}`);
+                }
+                const text = await response.text();
+                const data = JSON.parse(text);
+                // Invalidated while in flight: the answer may predate the change
+                if (this.inFlight.get(path) === request) {
+                    const previous = this.cache.get(path);
+                    this.cache.set(path, { data, text, fetchedAt: Date.now() });
+                    if (previous && previous.text !== text) {
+                        document.dispatchEvent(new CustomEvent('api:updated', { detail: { path } }));
+                    }
+                }
+                return data;
+            } finally {
+                if (this.inFlight.get(path) === request) {
+                    this.inFlight.delete(path);
+                }
+            }
+        })();
+        this.inFlight.set(path, request);
+        return request;
     }
 
-    static async updateVendor(id, vendorData) {
-        const response = await fetch(`${API_BASE_URL}/vendors/${id}/`, {
-            method: 'PUT',
+    // Forget cached and in-flight GETs for these paths, including their
+    // query-string variants ('/proposals/' also covers '/proposals/?rfp_id=3')
+    static invalidate(...paths) {
+        const matches = key => paths.some(path => key === path || key.startsWith(`${path}?`));
+        for (const map of [this.cache, this.inFlight]) {
+            for (const key of [...map.keys()]) {
+                if (matches(key)) {
+                    map.delete(key);
+                }
+            }
+        }
+    }
+
+    static invalidateAll() {
+        this.cache.clear();
+        this.inFlight.clear();
+    }
+
+    static async sendJSON(path, method, data, what, timeout = this.TIMEOUT_MS) {
+        const response = await this.request(path, {
+            method,
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify(vendorData)
-        });
+            body: JSON.stringify(data)
+        }, timeout);
         if (!response.ok) {
             const error = await response.json();
-            throw new Error(error.details || error.error || `Failed to update vendor: ${response.statusText}`);
+            throw new Error(error.details || error.error || `Failed to ${what}: ${response.statusText}`);
         }
         return response.json();
     }
 
+    // Vendors
+    static async getVendors() {
+        return this.cachedGet('/vendors/', 'vendors');
+    }
+
+    static async createVendor(vendorData) {
+        const vendor = await this.sendJSON('/vendors/', 'POST', vendorData, 'create vendor');
+        this.invalidate('/vendors/');
+        return vendor;
+    }
+
+    static async updateVendor(id, vendorData) {
+        const vendor = await this.sendJSON(`/vendors/${id}/`, 'PUT', vendorData, 'update vendor');
+        // Proposals show the vendor's name
+        this.invalidate('/vendors/', `/vendors/${id}/`, '/proposals/');
+        return vendor;
+    }
+
     static async deleteVendor(id) {
-        const response = await fetch(`${API_BASE_URL}/vendors/${id}/`, {
+        const response = await this.request(`/vendors/${id}/`, {
             method: 'DELETE'
         });
+        if (response.ok) {
+            // Their proposals go with them
+            this.invalidate('/vendors/', `/vendors/${id}/`, '/proposals/');
+        }
         return response.ok;
     }
 
     // RFPs
     static async getRFPs() {
-        const response = await fetch(`${API_BASE_URL}/rfps/`);
-        if (!response.ok) {
-            throw new Error(`Failed to fetch RFPs: ${response.statusText}`);
-        }
-        return response.json();
+        return this.cachedGet('/rfps/', 'RFPs');
     }
 
     static async getRFP(id) {
-        const response = await fetch(`${API_BASE_URL}/rfps/${id}/`);
-        if (!response.ok) {
-            throw new Error(`Failed to fetch RFP: ${response.statusText}`);
-        }
-        return response.json();
+        return this.cachedGet(`/rfps/${id}/`, 'RFP');
     }
 
     static async createRFP(rfpData) {
-        const response = await fetch(`${API_BASE_URL}/rfps/`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify(rfpData)
-        });
-        if (!response.ok) {
-            const error = await response.json();
-            throw new Error(error.details || error.error || `Failed to create RFP: ${response.statusText}`);
-        }
-        return response.json();
+        const rfp = await this.sendJSON('/rfps/', 'POST', rfpData, 'create RFP', this.SLOW_TIMEOUT_MS);
+        this.invalidate('/rfps/');
+        return rfp;
     }
 
     static async createRFPFromNaturalLanguage(text) {
-        const response = await fetch(`${API_BASE_URL}/parse-natural-language/`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({ text })
-        });
-        if (!response.ok) {
-            const error = await response.json();
-            throw new Error(error.details || error.error || `Failed to parse natural language: ${response.statusText}`);
-        }
-        return response.json();
+        // Only parses; nothing is saved until createRFP
+        return this.sendJSON('/parse-natural-language/', 'POST', { text }, 'parse natural language',
+            this.SLOW_TIMEOUT_MS);
     }
 
     static async sendRFP(rfpId, vendorIds) {
         try {
-            const response = await fetch(`${API_BASE_URL}/rfps/${rfpId}/send/`, {
+            const response = await this.request(`/rfps/${rfpId}/send/`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
                 },
                 body: JSON.stringify({ vendor_ids: vendorIds })
-            });
+            }, this.SLOW_TIMEOUT_MS);
             
             const result = await response.json();
             
@@ -114,73 +170,75 @@ class ApiService {
         } catch (error) {
             console.error('API Error in sendRFP:', error);
             throw error;
+        } finally {
+            this.invalidate('/rfps/', `/rfps/${rfpId}/`);
         }
     }
 
     // Proposals
     static async getProposals(rfpId = null) {
-        let url = `${API_BASE_URL}/proposals/`;
+        let path = '/proposals/';
         if (rfpId) {
-            url += `?rfp_id=${rfpId}`;
-        }
-        const response = await fetch(url);
-        if (!response.ok) {
-            throw new Error(`Failed to fetch proposals: ${response.statusText}`);
+            path += `?rfp_id=${rfpId}`;
         }
-        return response.json();
+        return this.cachedGet(path, 'proposals');
     }
 
-    static async checkEmails() {
-        const response = await fetch(`${API_BASE_URL}/check-emails/`, {
-            method: 'POST'
-        });
-        if (!response.ok) {
-            const error = await response.json();
-            throw new Error(error.details || error.error || `Failed to check emails: ${response.statusText}`);
+    static async getProposal(id) {
+        return this.cachedGet(`/proposals/${id}/`, 'proposal');
+    }
+
+    static async checkEmails(onProgress = null) {
+        try {
+            const response = await this.request('/check-emails/', {
+                method: 'POST',
+                headers: {
+                    'Prefer': 'respond-async',
+                }
+            }, this.SLOW_TIMEOUT_MS);
+            if (!response.ok) {
+                const error = await response.json();
+                throw new Error(error.details || error.error || `Failed to check emails: ${response.statusText}`);
+            }
+            return await this.jobResult(response, onProgress);
+        } finally {
+            // New proposals may have arrived even if the job failed part way
+            this.invalidate('/proposals/', '/rfps/');
         }
-        return response.json();
     }
 
     // Comparison
-    static async compareProposals(rfpId) {
-        const response = await fetch(`${API_BASE_URL}/rfps/${rfpId}/compare/`, {
-            method: 'GET'
-        });
-        if (!response.ok) {
-            const error = await response.json();
-            throw new Error(error.details || error.error || `Failed to compare proposals: ${response.statusText}`);
+    static async compareProposals(rfpId, onProgress = null) {
+        try {
+            const response = await this.request(`/rfps/${rfpId}/compare/`, {
+                method: 'GET',
+                headers: {
+                    'Prefer': 'respond-async',
+                }
+            }, this.SLOW_TIMEOUT_MS);
+            if (!response.ok) {
+                const error = await response.json();
+                throw new Error(error.details || error.error || `Failed to compare proposals: ${response.statusText}`);
+            }
+            return await this.jobResult(response, onProgress);
+        } finally {
+            this.invalidate(`/rfps/${rfpId}/comparison/`, '/rfps/', `/rfps/${rfpId}/`);
         }
-        return response.json();
     }
 
     static async getComparison(rfpId) {
-        const response = await fetch(`${API_BASE_URL}/rfps/${rfpId}/comparison/`);
-        if (!response.ok) {
-            throw new Error(`Failed to fetch comparison: ${response.statusText}`);
-        }
-        return response.json();
+        return this.cachedGet(`/rfps/${rfpId}/comparison/`, 'comparison');
     }
 
     // Email Testing
     static async testEmail(email) {
-        const response = await fetch(`${API_BASE_URL}/test-email/`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({ email })
-        });
-        if (!response.ok) {
-            const error = await response.json();
-            throw new Error(error.details || error.error || `Failed to send test email: ${response.statusText}`);
-        }
-        return response.json();
+        return this.sendJSON('/test-email/', 'POST', { email }, 'send test email', this.SLOW_TIMEOUT_MS);
     }
 
     static async testEmailConfig() {
-        const response = await fetch(`${API_BASE_URL}/test-email-config/`, {
+        const response = await this.request('/test-email-config/', {
             method: 'GET'
-        });
+        }, this.SLOW_TIMEOUT_MS);
         if (!response.ok) {
             const error = await response.json();
             throw new Error(error.details || error.error || `Failed to test email config: ${response.statusText}`);
@@ -188,6 +246,63 @@ class ApiService {
         return response.json();
     }
 
+    // Background jobs: never cached, their whole point is to change
+    static async getJob(id) {
+        const response = await this.request(`/jobs/${id}/`);
+        if (!response.ok) {
+            throw new Error(`Failed to fetch job: ${response.statusText}`);
+        }
+        return response.json();
+    }
+
+    static async cancelJob(id) {
+        const response = await this.request(`/jobs/${id}/cancel/`, {
+            method: 'POST'
+        });
+        return response.json();
+    }
+
+    // Resolve a response that may be a 202 + job into the job's result body,
+    // following the job over live updates (or polling without them) and
+    // reporting its progress until it finishes
+    static async jobResult(response, onProgress = null, interval = 1000) {
+        const body = await response.json();
+        if (response.status !== 202) {
+            return body;
+        }
+
+        const finished = job => ['succeeded', 'failed', 'cancelled'].includes(job.status);
+        let job = body;
+        if (onProgress) {
+            onProgress(job);
+        }
+
+        if (typeof LiveUpdates !== 'undefined' && LiveUpdates.connected()) {
+            // Wait for the job's events; the fetch covers a job that finished
+            // before we subscribed
+            const done = LiveUpdates.waitForJob(job.id, onProgress);
+            job = await this.getJob(job.id);
+            if (!finished(job)) {
+                await done;
+                job = await this.getJob(job.id);
+            }
+            LiveUpdates.forgetJob(job.id);
+        }
+
+        while (!finished(job)) {
+            await new Promise(resolve => setTimeout(resolve, interval));
+            job = await this.getJob(job.id);
+            if (onProgress && !finished(job)) {
+                onProgress(job);
+            }
+        }
+
+        if (job.result) {
+            return job.result;
+        }
+        throw new Error(job.status === 'cancelled' ? 'Job was cancelled' : job.error || 'Job failed');
+    }
+
     // Utility
     static async fetchWithTimeout(url, options = {}, timeout = 10000) {
         const controller = new AbortController();
@@ -202,6 +317,9 @@ class ApiService {
             return response;
         } catch (error) {
             clearTimeout(id);
+            if (error.name === 'AbortError') {
+                throw new Error(`Request timed out after ${timeout / 1000}s`);
+            }
             throw error;
         }
     }
@@ -0,0 +1,82 @@
+// Live updates pushed by the backend over server-sent events (/api/events/).
+// Each event patches only the part of the page it affects; EventSource
+// reconnects on its own and resumes from the last event id it received.
+class LiveUpdates {
+    static source = null;
+    static jobWaiters = new Map();
+
+    static start() {
+        if (!window.EventSource || this.source) {
+            return;
+        }
+
+        this.source = new EventSource(`${API_BASE_URL}/events/`);
+        this.on('proposal.created', data => this.refreshProposal(data, true));
+        this.on('proposal.parsed', data => this.refreshProposal(data, false));
+        this.on('rfp.send_progress', data => this.onSendProgress(data));
+        this.on('comparison.ready', data => {
+            ApiService.invalidate(`/rfps/${data.rfp_id}/comparison/`);
+            UIController.refreshComparison(data.rfp_id);
+        });
+        this.on('job.progress', data => this.notifyJob(data));
+        this.on('job.updated', data => this.notifyJob(data));
+        // Events were pruned while we were away: fall back to a full reload
+        this.on('reset', () => {
+            ApiService.invalidateAll();
+            UIController.reloadActivePage();
+        });
+    }
+
+    static connected() {
+        return this.source !== null && this.source.readyState === EventSource.OPEN;
+    }
+
+    static on(type, handler) {
+        this.source.addEventListener(type, event => {
+            try {
+                handler(JSON.parse(event.data));
+            } catch (error) {
+                console.error(`Error handling ${type} event:`, error);
+            }
+        });
+    }
+
+    // The event carries the fields the cards show, so nothing is fetched
+    static refreshProposal(data, isNew) {
+        ApiService.invalidate('/proposals/', `/proposals/${data.id}/`);
+        if (data.proposal) {
+            UIController.patchProposal(data.proposal, isNew);
+        }
+    }
+
+    static async onSendProgress(data) {
+        if (data.done === data.total) {
+            ApiService.invalidate('/rfps/', `/rfps/${data.rfp_id}/`);
+            UIController.patchRFP(await ApiService.getRFP(data.rfp_id));
+        }
+    }
+
+    // Resolve once the job reaches a final status, reporting progress meanwhile
+    static waitForJob(id, onProgress = null) {
+        return new Promise(resolve => {
+            this.jobWaiters.set(id, { resolve, onProgress });
+        });
+    }
+
+    static forgetJob(id) {
+        this.jobWaiters.delete(id);
+    }
+
+    static notifyJob(data) {
+        const waiter = this.jobWaiters.get(data.id);
+        if (!waiter) {
+            return;
+        }
+        if (['succeeded', 'failed', 'cancelled'].includes(data.status)) {
+            this.forgetJob(data.id);
+            waiter.resolve(data);
+        } else if (waiter.onProgress && data.progress !== undefined) {
+            waiter.onProgress({ status: 'running', progress: data.progress, progress_message: data.message });
+        }
+    }
+}
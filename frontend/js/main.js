@@ -13,6 +13,17 @@ document.addEventListener('DOMContentLoaded', () => {
     // Load dashboard by default
     UIController.loadPage('dashboard');
     
+    // Patch lists as proposals, comparisons and jobs change on the server
+    LiveUpdates.start();
+    
+    // A page drawn from cached data is redrawn once the background refresh
+    // brings something new; several refreshes landing together redraw once
+    let redraw = null;
+    document.addEventListener('api:updated', () => {
+        clearTimeout(redraw);
+        redraw = setTimeout(() => UIController.reloadActivePage(), 50);
+    });
+    
     // Set default deadline to 2 weeks from now
     const deadlineInput = document.getElementById('rfp-deadline');
     if (deadlineInput) {
@@ -71,7 +82,8 @@ function setupEventListeners() {
 // Backend Connection Test
 async function testBackendConnection() {
     try {
-        await fetch('http://localhost:8000/api/vendors/');
+        // Also warms the cache the dashboard reads from
+        await ApiService.getVendors();
         console.log('Backend connection successful');
     } catch (error) {
         console.error('Backend connection failed:', error);
@@ -511,11 +523,13 @@ async function sendRFP() {
         // Close modal
         UIController.closeModal('send-rfp-modal');
         
-        // Refresh all data
+        // Refresh all data, unless live updates are already patching it
         setTimeout(() => {
-            UIController.loadRFPs();
-            UIController.loadProposals();
-            UIController.loadDashboard();
+            if (!LiveUpdates.connected()) {
+                UIController.loadRFPs();
+                UIController.loadProposals();
+                UIController.loadDashboard();
+            }
             
             // If demo proposals were created, offer to check emails
             if (result.demo_mode && result.created_proposals > 0) {
@@ -535,12 +549,20 @@ async function sendRFP() {
     }
 }
 
+// Background job progress
+function showJobProgress(icon) {
+    return (job) => {
+        const label = job.status === 'queued' ? 'Queued, waiting for a worker...' : (job.progress_message || 'Working...');
+        showNotification(`${icon} ${label} (${job.progress}%)`, 'info', 0);
+    };
+}
+
 // Proposal Functions
 async function checkEmails() {
     try {
         showNotification('📧 Checking for new emails...', 'info', 0);
         
-        const result = await ApiService.checkEmails();
+        const result = await ApiService.checkEmails(showJobProgress('📧'));
         
         if (result.error) {
             showNotification('❌ Error: ' + result.error, 'error');
@@ -555,9 +577,11 @@ async function checkEmails() {
             showNotification('📭 No new emails found', 'info');
         }
         
-        // Refresh proposals list
-        UIController.loadProposals();
-        UIController.loadDashboard();
+        // Refresh proposals list, unless live updates are already patching it
+        if (!LiveUpdates.connected()) {
+            UIController.loadProposals();
+            UIController.loadDashboard();
+        }
         
     } catch (error) {
         showNotification('❌ Error checking emails: ' + error.message, 'error');
@@ -577,7 +601,7 @@ async function compareProposals(rfpId) {
     try {
         showNotification('🤖 Checking proposals for comparison...', 'info', 0);
         
-        const comparison = await ApiService.compareProposals(rfpId);
+        const comparison = await ApiService.compareProposals(rfpId, showJobProgress('🤖'));
         
         if (comparison.error) {
             // Show helpful message based on the error
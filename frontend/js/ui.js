@@ -44,6 +44,72 @@ class UIController {
         }
     }
 
+    static reloadActivePage() {
+        const page = document.querySelector('.page.active');
+        if (page) {
+            this.loadPageData(page.id.replace(/-page$/, ''));
+        }
+    }
+
+    // Live updates: patch a single card instead of re-rendering whole lists
+    static replaceOrInsert(container, selector, html, insert) {
+        const existing = container.querySelector(selector);
+        if (existing) {
+            existing.outerHTML = html;
+            return true;
+        }
+        if (insert) {
+            container.querySelector('.empty-state, .empty-message')?.remove();
+            container.insertAdjacentHTML('afterbegin', html);
+        }
+        return false;
+    }
+
+    static adjustCount(elementId, delta) {
+        const element = document.getElementById(elementId);
+        if (element && element.textContent !== '') {
+            element.textContent = (parseInt(element.textContent, 10) || 0) + delta;
+        }
+    }
+
+    static patchProposal(proposal, isNew) {
+        const selector = `[data-proposal-id="${proposal.id}"]`;
+
+        const list = document.getElementById('proposal-list');
+        if (list && list.childElementCount > 0) {
+            const rfpFilter = document.getElementById('rfp-filter')?.value;
+            const statusFilter = document.getElementById('status-filter')?.value;
+            const visible = (!rfpFilter || String(proposal.rfp) === rfpFilter) &&
+                (statusFilter !== 'parsed' || proposal.is_parsed) &&
+                (statusFilter !== 'unparsed' || !proposal.is_parsed);
+            if (visible) {
+                this.replaceOrInsert(list, selector, this.proposalCard(proposal), isNew);
+            } else {
+                list.querySelector(selector)?.remove();
+            }
+        }
+
+        const recent = document.getElementById('recent-proposals');
+        if (recent) {
+            this.replaceOrInsert(recent, selector, this.recentProposalItem(proposal), isNew);
+            recent.querySelectorAll('.recent-item:nth-child(n+6)').forEach(item => item.remove());
+        }
+
+        if (isNew) {
+            this.adjustCount('total-proposals', 1);
+        }
+        if (proposal.is_parsed) {
+            this.adjustCount('parsed-proposals', 1);
+        }
+    }
+
+    static patchRFP(rfp) {
+        const list = document.getElementById('rfp-list');
+        if (list) {
+            this.replaceOrInsert(list, `[data-rfp-id="${rfp.id}"]`, this.rfpCard(rfp), false);
+        }
+    }
+
     // Modal Control
     static showModal(modalId) {
         const modal = document.getElementById(modalId);
@@ -137,8 +203,12 @@ class UIController {
             return;
         }
 
-        container.innerHTML = proposals.map(proposal => `
-            <div class="recent-item">
+        container.innerHTML = proposals.map(proposal => this.recentProposalItem(proposal)).join('');
+    }
+
+    static recentProposalItem(proposal) {
+        return `
+            <div class="recent-item" data-proposal-id="${proposal.id}">
                 <div>
                     <div class="title">${proposal.vendor_name || 'Unknown Vendor'}</div>
                     <div class="date">Received: ${new Date(proposal.received_at).toLocaleDateString()}</div>
@@ -148,7 +218,7 @@ class UIController {
                     `<span class="status-badge unparsed">⏳ Pending</span>`
                 }
             </div>
-        `).join('');
+        `;
     }
 
     // Vendors
@@ -243,12 +313,15 @@ class UIController {
         return;
     }
 
-    container.innerHTML = rfps.map(rfp => {
+    container.innerHTML = rfps.map(rfp => this.rfpCard(rfp)).join('');
+}
+
+    static rfpCard(rfp) {
         // Get proposal count for this RFP
         const hasProposals = rfp.vendor_count > 0;
         
         return `
-            <div class="list-card" style="background: white; border-radius: 15px; padding: 1.5rem; box-shadow: 0 5px 15px rgba(0,0,0,0.1); margin: 1rem 0; border: 1px solid #e0e0e0;">
+            <div class="list-card" data-rfp-id="${rfp.id}" style="background: white; border-radius: 15px; padding: 1.5rem; box-shadow: 0 5px 15px rgba(0,0,0,0.1); margin: 1rem 0; border: 1px solid #e0e0e0;">
                 <div class="list-card-header" style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 1rem;">
                     <div class="list-card-title" style="font-weight: 600; color: #2c3e50; font-size: 1.1rem;">${rfp.title || 'Untitled RFP'}</div>
                     <span class="list-card-badge ${rfp.status || 'draft'}" style="background: #e74c3c; color: white; padding: 0.25rem 0.75rem; border-radius: 20px; font-size: 0.8rem;">
@@ -288,8 +361,7 @@ class UIController {
                 </div>
             </div>
         `;
-    }).join('');
-}
+    }
 
     // Proposals
     static async loadProposals() {
@@ -330,8 +402,12 @@ class UIController {
             return;
         }
 
-        container.innerHTML = proposals.map(proposal => `
-            <div class="list-card ${proposal.is_preferred ? 'preferred' : ''}">
+        container.innerHTML = proposals.map(proposal => this.proposalCard(proposal)).join('');
+    }
+
+    static proposalCard(proposal) {
+        return `
+            <div class="list-card ${proposal.is_preferred ? 'preferred' : ''}" data-proposal-id="${proposal.id}">
                 ${proposal.is_preferred ? `
                     <div class="recommended-badge">
                         <i class="fas fa-crown"></i> AI Recommended
@@ -378,7 +454,7 @@ class UIController {
                     </div>
                 </div>
             </div>
-        `).join('');
+        `;
     }
 
     static async loadRFPFilterOptions() {
@@ -474,6 +550,7 @@ class UIController {
 
     // Comparison View
     static async showComparison(rfpId) {
+        this.comparisonRfpId = rfpId;
         try {
             const comparison = await ApiService.getComparison(rfpId);
             if (comparison.message) {
@@ -488,6 +565,13 @@ class UIController {
         }
     }
 
+    static async refreshComparison(rfpId) {
+        if (this.comparisonRfpId !== rfpId || !document.getElementById('comparison-content')) {
+            return;
+        }
+        this.renderComparison(await ApiService.getComparison(rfpId));
+    }
+
     static renderComparison(comparison) {
         const container = document.getElementById('comparison-content');
         